@@ -1,10 +1,16 @@
 import os
-import re
 import json
+import time
 from typing import List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 from datetime import datetime
 import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from rate_limiter import TokenBucket
+from llm_cache import llm_cache
+from event_bus import event_bus
+from response_parser import parse_analysis, parse_analysis_array
+from llm_providers import GeminiProvider, OpenAIProvider, ProviderRouter
 
 # Robust AI imports with fallbacks
 try:
@@ -25,6 +31,133 @@ except ImportError as e:
 
 load_dotenv()
 
+GEMINI_MODEL_NAME = 'gemini-2.5-flash'
+OPENAI_MODEL_NAME = 'gpt-4o-mini'
+
+# Prompt sablon verziók - a sablon módosításakor emelni kell, így a régi
+# válaszok nem jönnek vissza a cache-ből
+ANALYSIS_PROMPT_VERSION = 'analysis-v2'
+BATCH_PROMPT_VERSION = 'analysis-batch-v1'
+BRIEFING_PROMPT_VERSION = 'briefing-v1'
+TRANSLATION_PROMPT_VERSION = 'translation-v1'
+
+# Párhuzamos Gemini elemzések száma és a percenkénti kéréskvóta
+ANALYSIS_MAX_CONCURRENCY = int(os.getenv('ANALYSIS_MAX_CONCURRENCY', '4'))
+ANALYSIS_RATE_PER_MINUTE = float(os.getenv('ANALYSIS_RATE_PER_MINUTE', '60'))
+
+# Adatbázissal az új elemzések a tartós analysis_tasks soron át futnak (újraindítás
+# után folytathatók, külön analysis_worker.py folyamatok is besegíthetnek);
+# false = csak ebben a folyamatban, memóriában
+ANALYSIS_QUEUE = os.getenv('ANALYSIS_QUEUE', 'true').lower() == 'true'
+
+# Kötegelt elemzés: max cikk / kérés (1 = kikapcsolva) és token keretek
+ANALYSIS_BATCH_SIZE = int(os.getenv('ANALYSIS_BATCH_SIZE', '5'))
+ANALYSIS_BATCH_INPUT_TOKENS = int(os.getenv('ANALYSIS_BATCH_INPUT_TOKENS', '12000'))
+ANALYSIS_BATCH_OUTPUT_TOKENS = int(os.getenv('ANALYSIS_BATCH_OUTPUT_TOKENS', '16000'))
+CHARS_PER_TOKEN = 4
+
+# Vezetői összefoglaló streamelése: a részletek ennyi másodpercenként mennek ki
+# 'briefing_chunk' SSE eseményként (false = egyben, a teljes válasz után)
+BRIEFING_STREAM = os.getenv('BRIEFING_STREAM', 'true').lower() == 'true'
+BRIEFING_STREAM_FLUSH_SECONDS = float(os.getenv('BRIEFING_STREAM_FLUSH_SECONDS', '0.5'))
+
+# Vezetői összefoglaló bemenete: a top N cikk. Ha ezekből kevesebb változott
+# (új cikk vagy új elemzés), mint BRIEFING_MIN_CHANGES, nem generáljuk újra
+# (1 = csak teljesen azonos bemenetnél marad a régi)
+BRIEFING_TOP_ARTICLES = 10
+BRIEFING_MIN_CHANGES = int(os.getenv('BRIEFING_MIN_CHANGES', '1'))
+
+# Hibás generálás jelzése - az ilyen összefoglaló bemenetét nem rögzítjük
+BRIEFING_ERROR_PREFIX = '⚠️ HIBA'
+
+# Az elemzési szempontok és a válasz séma - az egyedi és a kötegelt prompt is ezt használja
+ANALYSIS_REQUIREMENTS = """
+KÖTELEZŐ ELEMZÉSI SZEMPONTOK:
+
+0. MAGYAR CÍM
+   - Adj egy rövid, tömör magyar címet a hírnek (max 80 karakter)
+   - A cím legyen informatív és szakszerű
+
+1. VEZETŐI ÖSSZEFOGLALÓ (3-5 mondat)
+   - A hír lényege és azonnali relevanciája
+   - Miért fontos ezt MOST tudni a döntéshozóknak
+
+2. MAKROGAZDASÁGI HATÁSOK
+   - Közvetlen és közvetett hatások a magyar gazdaságra
+   - Lehetséges költségvetési következmények
+   - Inflációs és GDP hatások becslése
+   - Devizapiaci kockázatok és lehetőségek
+   - Időhorizont: rövid, közép és hosszú távú hatások
+
+3. SZEKTORÁLIS ELEMZÉS
+   - Mely magyar gazdasági szektorokat érinti
+   - Konkrét vállalati példák (ha releváns)
+   - Munkaerőpiaci hatások
+
+4. GEOPOLITIKAI KONTEXTUS
+   - EU-s vonatkozások
+   - Regionális (V4, CEE) következmények
+   - Globális gazdasági trendekbe illeszkedés
+
+5. KOCKÁZATOK ÉS LEHETŐSÉGEK
+   - Főbb kockázati tényezők
+   - Kihasználható lehetőségek
+   - Időhorizont (rövid/közép/hosszú táv)
+
+6. SZAKPOLITIKAI MEGFONTOLÁSOK
+   - Lehetséges válaszopciók elemzése
+   - Szabályozási kihívások és lehetőségek
+   - Stakeholder érintettség
+   - Nemzetközi koordináció szükségessége
+
+7. MONITORING PONTOK
+   - Mit kell figyelni a következő időszakban
+   - Kulcs indikátorok és küszöbértékek
+
+8. FONTOSSÁGI BESOROLÁS
+   - Skála: 1-10 (10 = kritikus, azonnali intézkedést igényel)
+   - Sürgősség: azonnali / 24 órán belül / 1 héten belül / monitoring
+""".strip()
+
+ANALYSIS_JSON_SCHEMA = """
+{
+    "hungarian_title": "magyar cím",
+    "executive_summary": "vezetői összefoglaló",
+    "importance_score": <1-10>,
+    "urgency": "azonnali/24h/1hét/monitoring",
+    "macro_impacts": {
+        "gdp_effect": "hatás leírása",
+        "inflation_effect": "hatás leírása",
+        "budget_effect": "hatás leírása",
+        "currency_effect": "HUF árfolyamra gyakorolt hatás"
+    },
+    "sectoral_analysis": {
+        "affected_sectors": ["szektor1", "szektor2"],
+        "company_examples": ["cég1", "cég2"],
+        "employment_impact": "munkaerőpiaci hatás"
+    },
+    "geopolitical_context": {
+        "eu_relevance": "EU vonatkozások",
+        "regional_impact": "regionális hatások",
+        "global_trends": "globális trendek"
+    },
+    "risks_opportunities": {
+        "main_risks": ["kockázat1", "kockázat2"],
+        "opportunities": ["lehetőség1", "lehetőség2"],
+        "time_horizon": "rövid/közép/hosszú táv"
+    },
+    "policy_considerations": [
+        "megfontolás1",
+        "megfontolás2"
+    ],
+    "monitoring_points": [
+        "figyelendő1",
+        "figyelendő2"
+    ],
+    "keywords_hu": ["kulcsszó1", "kulcsszó2", "kulcsszó3"]
+}
+""".strip()
+
 class GovernmentEconomicAnalyzer:
     """
     Kormányzati szintű gazdasági elemző rendszer
@@ -40,7 +173,7 @@ class GovernmentEconomicAnalyzer:
             gemini_api_key = os.getenv("GEMINI_API_KEY")
             if gemini_api_key:
                 genai.configure(api_key=gemini_api_key)
-                self.gemini_model = genai.GenerativeModel('gemini-2.5-flash')
+                self.gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
                 print("✅ Gemini 2.5 Flash inicializálva")
             else:
                 self.gemini_model = None
@@ -49,6 +182,12 @@ class GovernmentEconomicAnalyzer:
             self.gemini_model = None
             print("⚠️ google-generativeai package nem elérhető!")
         
+        # Gemini kvóta: percenkénti limit, legfeljebb a párhuzamosságnyi löket
+        self.gemini_rate_limiter = TokenBucket(ANALYSIS_RATE_PER_MINUTE, capacity=ANALYSIS_MAX_CONCURRENCY)
+        
+        # Becsült kimeneti token / cikk a kötegméret tervezéséhez (a válaszokból tanul)
+        self.output_tokens_per_article = 1500
+        
         # OpenAI GPT-4o mini inicializálása
         if OPENAI_AVAILABLE:
             openai_api_key = os.getenv("OPENAI_API_KEY")
@@ -61,6 +200,26 @@ class GovernmentEconomicAnalyzer:
         else:
             self.openai_client = None
             print("⚠️ openai package nem elérhető!")
+        
+        # Szolgáltatók újrapróbálással és megszakítóval; az elemzés Gemini-vel, a vezetői
+        # összefoglaló OpenAI-jal indul, kiesés esetén a másikra áll át (llm_providers)
+        self.gemini_provider = GeminiProvider(
+            self.gemini_model, GEMINI_MODEL_NAME, rate_limiter=self.gemini_rate_limiter
+        ) if self.gemini_model else None
+        self.openai_provider = OpenAIProvider(self.openai_client, OPENAI_MODEL_NAME) if self.openai_client else None
+        self.analysis_llm = ProviderRouter([self.gemini_provider, self.openai_provider])
+        self.briefing_llm = ProviderRouter([self.openai_provider, self.gemini_provider])
+    
+    def provider_stats(self) -> Dict:
+        """Szolgáltatónkénti hívás / hiba / megszakító állapot és p95 késleltetés (/api/stats)"""
+        return {
+            'providers': {
+                provider.name: provider.stats()
+                for router in (self.analysis_llm, self.briefing_llm) for provider in router.providers
+            },
+            'analysis': self.analysis_llm.stats(),
+            'briefing': self.briefing_llm.stats()
+        }
     
     def _get_full_article_content(self, article: Dict) -> str:
         """Teljes cikk tartalom összeállítása"""
@@ -85,7 +244,7 @@ class GovernmentEconomicAnalyzer:
         """
         Kormányzati szintű részletes elemzés egy cikkről
         """
-        if not self.gemini_model:
+        if not self.analysis_llm.available:
             return None
         
         full_content = self._get_full_article_content(article)
@@ -96,174 +255,168 @@ class GovernmentEconomicAnalyzer:
         
         {full_content}
         
-        KÖTELEZŐ ELEMZÉSI SZEMPONTOK:
-        
-        0. MAGYAR CÍM
-           - Adj egy rövid, tömör magyar címet a hírnek (max 80 karakter)
-           - A cím legyen informatív és szakszerű
-        
-        1. VEZETŐI ÖSSZEFOGLALÓ (3-5 mondat)
-           - A hír lényege és azonnali relevanciája
-           - Miért fontos ezt MOST tudni a döntéshozóknak
-        
-        2. MAKROGAZDASÁGI HATÁSOK
-           - Közvetlen és közvetett hatások a magyar gazdaságra
-           - Lehetséges költségvetési következmények
-           - Inflációs és GDP hatások becslése
-           - Devizapiaci kockázatok és lehetőségek
-           - Időhorizont: rövid, közép és hosszú távú hatások
-        
-        3. SZEKTORÁLIS ELEMZÉS
-           - Mely magyar gazdasági szektorokat érinti
-           - Konkrét vállalati példák (ha releváns)
-           - Munkaerőpiaci hatások
-        
-        4. GEOPOLITIKAI KONTEXTUS
-           - EU-s vonatkozások
-           - Regionális (V4, CEE) következmények
-           - Globális gazdasági trendekbe illeszkedés
-        
-        5. KOCKÁZATOK ÉS LEHETŐSÉGEK
-           - Főbb kockázati tényezők
-           - Kihasználható lehetőségek
-           - Időhorizont (rövid/közép/hosszú táv)
-        
-        6. SZAKPOLITIKAI MEGFONTOLÁSOK
-           - Lehetséges válaszopciók elemzése
-           - Szabályozási kihívások és lehetőségek
-           - Stakeholder érintettség
-           - Nemzetközi koordináció szükségessége
-        
-        7. MONITORING PONTOK
-           - Mit kell figyelni a következő időszakban
-           - Kulcs indikátorok és küszöbértékek
-        
-        8. FONTOSSÁGI BESOROLÁS
-           - Skála: 1-10 (10 = kritikus, azonnali intézkedést igényel)
-           - Sürgősség: azonnali / 24 órán belül / 1 héten belül / monitoring
+        {ANALYSIS_REQUIREMENTS}
         
         Válaszolj JSON formátumban:
-        {{
-            "hungarian_title": "magyar cím",
-            "executive_summary": "vezetői összefoglaló",
-            "importance_score": <1-10>,
-            "urgency": "azonnali/24h/1hét/monitoring",
-            "macro_impacts": {{
-                "gdp_effect": "hatás leírása",
-                "inflation_effect": "hatás leírása",
-                "budget_effect": "hatás leírása",
-                "currency_effect": "HUF árfolyamra gyakorolt hatás"
-            }},
-            "sectoral_analysis": {{
-                "affected_sectors": ["szektor1", "szektor2"],
-                "company_examples": ["cég1", "cég2"],
-                "employment_impact": "munkaerőpiaci hatás"
-            }},
-            "geopolitical_context": {{
-                "eu_relevance": "EU vonatkozások",
-                "regional_impact": "regionális hatások",
-                "global_trends": "globális trendek"
-            }},
-            "risks_opportunities": {{
-                "main_risks": ["kockázat1", "kockázat2"],
-                "opportunities": ["lehetőség1", "lehetőség2"],
-                "time_horizon": "rövid/közép/hosszú táv"
-            }},
-            "policy_considerations": [
-                "megfontolás1",
-                "megfontolás2"
-            ],
-            "monitoring_points": [
-                "figyelendő1",
-                "figyelendő2"
-            ],
-            "keywords_hu": ["kulcsszó1", "kulcsszó2", "kulcsszó3"]
-        }}
+        {ANALYSIS_JSON_SCHEMA}
         """
         
         try:
-            response = self.gemini_model.generate_content(prompt)
-            # Improved JSON extraction - remove THOUGHT sections and find only clean JSON
-            response_text = response.text
-            
-            # Remove THOUGHT sections that break JSON
-            if "THOUGHT:" in response_text:
-                response_text = re.sub(r'THOUGHT:.*?(?=\{)', '', response_text, flags=re.DOTALL)
+            # Azonos prompt -> azonos válasz: előbb a perzisztens cache-ben nézzük
+            response_text = llm_cache.get_any(self.analysis_llm.models, ANALYSIS_PROMPT_VERSION, prompt)
+            from_cache = response_text is not None
+            if not from_cache:
+                # Az első értelmezhető válasz nyer (átállásnál / fedezeti kérésnél a másik szolgáltatóé)
+                completion = self.analysis_llm.generate(
+                    prompt, kind='analysis', validate=lambda c: parse_analysis(c.text) is not None
+                )
+                response_text, model = completion.text, completion.model
             
-            # Find COMPLETE JSON block - not just first level!
-            json_start = response_text.find('{')
-            if json_start != -1:
-                # Count braces to find complete JSON
-                brace_count = 0
-                json_end = json_start
-                for i, char in enumerate(response_text[json_start:], json_start):
-                    if char == '{':
-                        brace_count += 1
-                    elif char == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            json_end = i + 1
-                            break
-                
-                json_text = response_text[json_start:json_end]
-                
-                # Clean up common JSON issues
-                json_text = re.sub(r',(\s*[}\]])', r'\1', json_text)  # Remove trailing commas
-                json_text = re.sub(r'[\n\r\t]', ' ', json_text)  # Remove newlines
-                
-                try:
-                    analysis = json.loads(json_text)
-                    print(f"✅ TELJES JSON elemzés sikeresen feldolgozva ({len(analysis)} mező)")
-                    return analysis
-                except json.JSONDecodeError as e:
-                    print(f"❌ JSON parsing hiba: {e}")
-                    print(f"JSON részlet: {json_text[:200]}...")
-                    return None
-            else:
-                print(f"❌ Nem található JSON válasz a Gemini kimenetében")
+            # Egy menetes, string-tudatos JSON kinyerés + séma ellenőrzés (response_parser)
+            analysis = parse_analysis(response_text)
+            if analysis is None:
+                print(f"❌ Nem található használható JSON elemzés a Gemini kimenetében")
+                print(f"Részlet: {response_text[:200]}...")
                 return None
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON parsing hiba: {e}")
-            print(f"Részlet: {response.text[:500]}...")
             
-            # ULTIMATE FALLBACK: Extract just the executive summary
-            try:
-                exec_match = re.search(r'"executive_summary":\s*"([^"]*)', response_text)
-                if exec_match:
-                    summary = exec_match.group(1)
-                    print(f"✅ Fallback: Extracted executive summary")
-                    return {
-                        "hungarian_title": "Gazdasági hír",
-                        "executive_summary": summary,
-                        "importance_score": 5,
-                        "urgency": "monitoring",
-                        "macro_impacts": {"gdp_effect": "N/A", "inflation_effect": "N/A", "budget_effect": "N/A", "currency_effect": "N/A"},
-                        "sectoral_analysis": {"affected_sectors": [], "company_examples": [], "employment_impact": "N/A"},
-                        "risks_opportunities": {"main_risks": [], "opportunities": [], "time_horizon": "N/A"},
-                        "policy_considerations": [],
-                        "monitoring_points": [],
-                        "keywords_hu": []
-                    }
-            except:
-                pass
-            return None
+            if from_cache:
+                print(f"♻️ Elemzés a cache-ből")
+            elif analysis.repaired:
+                # Csonka válaszból javítva - nem cache-eljük, legközelebb újra kérjük
+                print(f"✂️ Csonka JSON válasz javítva")
+            else:
+                llm_cache.put(model, ANALYSIS_PROMPT_VERSION, prompt, response_text)
+                print(f"✅ TELJES JSON elemzés sikeresen feldolgozva ({model})")
+            return analysis.to_dict()
         except Exception as e:
             print(f"❌ Kormányzati elemzési hiba: {e}")
             return None
     
-    def generate_executive_briefing(self, articles: List[Dict]) -> Optional[str]:
+    def plan_batches(self, articles: List[Dict]) -> List[List[Dict]]:
+        """
+        Cikkek kötegekbe osztása a bemeneti és a becsült kimeneti token keret szerint.
+        A kimeneti becslés a korábbi válaszokból igazodik, csonkolásnál csökken a köteg.
+        """
+        if ANALYSIS_BATCH_SIZE <= 1:
+            return [[article] for article in articles]
+        
+        overhead = (len(ANALYSIS_REQUIREMENTS) + len(ANALYSIS_JSON_SCHEMA)) // CHARS_PER_TOKEN
+        batches, current, input_tokens = [], [], overhead
+        for article in articles:
+            article_tokens = len(self._get_full_article_content(article)) // CHARS_PER_TOKEN
+            fits = (len(current) < ANALYSIS_BATCH_SIZE and
+                    input_tokens + article_tokens <= ANALYSIS_BATCH_INPUT_TOKENS and
+                    (len(current) + 1) * self.output_tokens_per_article <= ANALYSIS_BATCH_OUTPUT_TOKENS)
+            if current and not fits:
+                batches.append(current)
+                current, input_tokens = [], overhead
+            current.append(article)
+            input_tokens += article_tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    def analyze_batch(self, articles: List[Dict]) -> Dict[str, Optional[Dict]]:
         """
-        Vezetői sajtószemle készítése GPT-4o mini-vel
+        Több cikk elemzése egyetlen kéréssel. Ha a válasz nem értelmezhető vagy
+        csonka, a hiányzó cikkeket kisebb kötegekben, végül egyenként elemezzük.
+        Visszatérés: cikk id -> elemzés (None, ha nem sikerült)
+        """
+        if len(articles) == 1:
+            return {articles[0]['id']: self.analyze_for_government(articles[0])}
+        
+        try:
+            analyses = self._analyze_batch_once(articles)
+        except Exception as e:
+            print(f"❌ Kötegelt elemzési hiba ({len(articles)} cikk): {e} - egyenkénti elemzés")
+            return {article['id']: self.analyze_for_government(article) for article in articles}
+        
+        missing = [article for article in articles if article['id'] not in analyses]
+        if not missing:
+            return analyses
+        
+        if analyses:
+            # Részben sikerült: csak a hiányzókat kérjük újra
+            print(f"⚠️ {len(missing)}/{len(articles)} cikk hiányzik a kötegelt válaszból - újrakérés")
+            analyses.update(self.analyze_batch(missing))
+        else:
+            # Teljesen hibás válasz: kettébontjuk a köteget
+            print(f"⚠️ Értelmezhetetlen kötegelt válasz ({len(articles)} cikk) - köteg felezése")
+            middle = len(articles) // 2
+            analyses.update(self.analyze_batch(articles[:middle]))
+            analyses.update(self.analyze_batch(articles[middle:]))
+        return analyses
+    
+    def _analyze_batch_once(self, articles: List[Dict]) -> Dict[str, Dict]:
+        """Egy kötegelt elemzési kérés; a sikeresen értelmezett elemzéseket adja vissza"""
+        if not self.analysis_llm.available:
+            return {}
+        
+        articles_block = "\n\n".join(
+            f"=== CIKK ID: {article['id']} ===\n{self._get_full_article_content(article)}"
+            for article in articles
+        )
+        
+        prompt = f"""
+        Készíts RÉSZLETES KORMÁNYZATI ELEMZÉST az alábbi {len(articles)} gazdasági hír MINDEGYIKÉRŐL, külön-külön.
+        Te egy vezető közgazdasági elemző vagy, aki a magyar kormány számára készít jelentéseket.
+        
+        {articles_block}
+        
+        {ANALYSIS_REQUIREMENTS}
+        
+        Válaszolj egyetlen JSON TÖMBBEL, cikkenként egy objektummal, a fenti sorrendben.
+        Minden objektum "article_id" mezője a cikk azonosítója legyen (a "CIKK ID:" utáni érték),
+        a többi mező pedig kövesse ezt a sémát:
+        {ANALYSIS_JSON_SCHEMA}
+        """
+        
+        ids = [article['id'] for article in articles]
+        response_text = llm_cache.get_any(self.analysis_llm.models, BATCH_PROMPT_VERSION, prompt)
+        from_cache = response_text is not None
+        truncated = False
+        if not from_cache:
+            completion = self.analysis_llm.generate(
+                prompt, kind='batch', validate=lambda c: bool(self._parse_batch_response(c.text, ids))
+            )
+            response_text, model, truncated = completion.text, completion.model, completion.truncated
+        
+        analyses = self._parse_batch_response(response_text, ids)
+        
+        if truncated:
+            # Csonka válasz: a következő kötegek kisebbek lesznek
+            self.output_tokens_per_article = int(self.output_tokens_per_article * 1.5)
+            print(f"✂️ Csonka kötegelt válasz ({len(analyses)}/{len(articles)} elemzés)")
+        elif len(analyses) == len(articles) and not from_cache:
+            observed = len(response_text) / CHARS_PER_TOKEN / len(articles)
+            self.output_tokens_per_article = int(0.7 * self.output_tokens_per_article + 0.3 * observed)
+            llm_cache.put(model, BATCH_PROMPT_VERSION, prompt, response_text)
+        
+        if analyses:
+            print(f"✅ Kötegelt elemzés: {len(analyses)}/{len(articles)} cikk{' (cache)' if from_cache else ''}")
+        return analyses
+    
+    @staticmethod
+    def _parse_batch_response(response_text: str, ids: List[str]) -> Dict[str, Dict]:
         """
-        if not self.openai_client or not articles:
+        JSON tömb feldolgozása elemenként, így csonka válaszból is megmaradnak
+        a hiánytalan objektumok. Csak a kért azonosítókat fogadjuk el.
+        """
+        return {
+            article_id: analysis.to_dict()
+            for article_id, analysis in parse_analysis_array(response_text, ids).items()
+        }
+    
+    def generate_executive_briefing(self, articles: List[Dict], progress=None) -> Optional[str]:
+        """
+        Vezetői sajtószemle készítése GPT-4o mini-vel, kiesésnél Gemini-vel (BRIEFING_STREAM
+        esetén streamelve - a részletek azonnal megjelennek a nyitott oldalakon)
+        """
+        if not self.briefing_llm.available or not articles:
             return None
         
         # Top 10 legfontosabb hír
-        top_articles = sorted(
-            [a for a in articles if a.get('ai_analysis')],
-            key=lambda x: x.get('ai_analysis', {}).get('importance_score', 0),
-            reverse=True
-        )[:10]
+        top_articles = self.select_briefing_articles(articles)
         
         # Részletesebb cikk információk összegyűjtése
         detailed_articles = []
@@ -345,26 +498,114 @@ class GovernmentEconomicAnalyzer:
         - Elemzői, NEM döntéshozói szemlélet
         """
         
+        system_prompt = "Te egy vezető közgazdasági elemző vagy, aki a magyar kormány számára készít napi gazdasági jelentéseket."
+        cache_prompt = f"{system_prompt}\n{prompt}"
+        cached = llm_cache.get_any(self.briefing_llm.models, BRIEFING_PROMPT_VERSION, cache_prompt)
+        if cached is not None:
+            print("♻️ Vezetői briefing a cache-ből")
+            return cached
+        
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "Te egy vezető közgazdasági elemző vagy, aki a magyar kormány számára készít napi gazdasági jelentéseket."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=2000
-            )
-            return response.choices[0].message.content
+            if BRIEFING_STREAM:
+                briefing, model = self._stream_briefing(system_prompt, prompt, progress)
+            else:
+                completion = self.briefing_llm.generate(
+                    prompt, system=system_prompt, temperature=0.7, max_tokens=2000,
+                    kind='briefing', validate=lambda c: bool(c.text.strip())
+                )
+                briefing, model = completion.text, completion.model
+            llm_cache.put(model, BRIEFING_PROMPT_VERSION, cache_prompt, briefing)
+            return briefing
         except Exception as e:
             print(f"❌ Vezetői briefing generálási hiba: {e}")
             if "invalid_api_key" in str(e) or "401" in str(e):
-                return "⚠️ HIBA: Érvénytelen OpenAI API kulcs. A vezetői összefoglaló generálásához frissíteni kell az OPENAI_API_KEY környezeti változót."
-            return f"⚠️ HIBA a vezetői összefoglaló generálásában: {str(e)}"
+                return f"{BRIEFING_ERROR_PREFIX}: Érvénytelen OpenAI API kulcs. A vezetői összefoglaló generálásához frissíteni kell az OPENAI_API_KEY környezeti változót."
+            return f"{BRIEFING_ERROR_PREFIX} a vezetői összefoglaló generálásában: {str(e)}"
+    
+    @staticmethod
+    def select_briefing_articles(articles: List[Dict]) -> List[Dict]:
+        """A vezetői összefoglaló bemenete: a top N elemzett cikk fontosság szerint"""
+        return sorted(
+            [a for a in articles if a.get('ai_analysis')],
+            key=lambda x: x.get('ai_analysis', {}).get('importance_score', 0),
+            reverse=True
+        )[:BRIEFING_TOP_ARTICLES]
     
-    def process_articles_for_government(self, articles: List[Dict]) -> Tuple[List[Dict], str]:
+    @staticmethod
+    def briefing_fingerprint(top_articles: List[Dict]) -> Tuple[str, List[str]]:
+        """
+        Az összefoglaló bemenetének ujjlenyomata. Az első elem a prompt verzió és a
+        dátum (napi szemle), a többi "cikk hash:elemzés verzió" (az elemzés JSON
+        hash-e) - új cikk és újraelemzett cikk is változásnak számít.
+        """
+        items = []
+        for article in top_articles:
+            analysis = json.dumps(article.get('ai_analysis'), sort_keys=True, ensure_ascii=False, default=str)
+            items.append(f"{article.get('id')}:{hashlib.sha256(analysis.encode('utf-8')).hexdigest()[:12]}")
+        items = [f"@{BRIEFING_PROMPT_VERSION}/{datetime.now().strftime('%Y-%m-%d')}"] + sorted(items)
+        return hashlib.sha256('\n'.join(items).encode('utf-8')).hexdigest(), items
+    
+    @staticmethod
+    def briefing_unchanged(previous: Optional[Dict], fingerprint: str, items: List[str]) -> bool:
+        """Újragenerálás kihagyható-e a legutóbbi összefoglaló bemenetéhez képest"""
+        if not previous:
+            return False
+        if previous['input_fingerprint'] == fingerprint:
+            return True
+        previous_items = previous['input_items']
+        # Más nap / prompt verzió vagy más cikkszám: mindig újragenerálunk
+        if not previous_items or previous_items[0] != items[0] or len(previous_items) != len(items):
+            return False
+        changed = len(set(items[1:]) - set(previous_items[1:]))
+        return changed < BRIEFING_MIN_CHANGES
+    
+    def _stream_briefing(self, system_prompt: str, prompt: str, progress=None) -> Tuple[str, str]:
+        """
+        Streamelt generálás. A beérkező részleteket BRIEFING_STREAM_FLUSH_SECONDS-onként
+        'briefing_chunk' eseményként küldjük ki (sorszámmal, hogy a kliens észrevegye,
+        ha lemaradt), és a feladat haladásába is beírjuk a többi folyamatnak.
+        A kész szöveget a hívó menti (save_executive_briefing).
+        Visszatérés: (szöveg, a válaszoló modell)
+        """
+        model = self.briefing_llm.models[0]
+        
+        def on_start(provider):
+            # Átállásnál a másik szolgáltató válaszol - a cache kulcsához kell
+            nonlocal model
+            model = provider.model
+        
+        stream = self.briefing_llm.stream(
+            prompt, system=system_prompt, temperature=0.7, max_tokens=2000, kind='briefing', on_start=on_start
+        )
+        
+        job_id = progress.id if progress else None
+        parts = []
+        pending = []
+        seq = 0
+        last_flush = time.monotonic()
+        
+        def flush():
+            nonlocal seq, last_flush
+            if pending:
+                parts.extend(pending)
+                event_bus.publish('briefing_chunk', {'job_id': job_id, 'seq': seq, 'delta': ''.join(pending)})
+                if progress:
+                    progress.set_briefing_draft(''.join(parts))
+                pending.clear()
+                seq += 1
+            last_flush = time.monotonic()
+        
+        for delta in stream:
+            pending.append(delta)
+            if time.monotonic() - last_flush >= BRIEFING_STREAM_FLUSH_SECONDS:
+                flush()
+        flush()
+        return ''.join(parts), model
+    
+    def process_articles_for_government(self, articles: List[Dict], progress=None) -> Tuple[List[Dict], str]:
         """
         Teljes kormányzati feldolgozás - DATABASE VERZIÓ
+        `progress` (jobs.Job) esetén a haladást is jelentjük: cached / analyzed / failed
         """
         print(f"\n🏛️ Kormányzati elemzés indítása {len(articles)} cikkre...")
         
@@ -373,9 +614,6 @@ class GovernmentEconomicAnalyzer:
         # Import database manager
         from database_manager import db_manager
         
-        # Start processing status
-        db_manager.start_processing()
-        
         # Import test mode safely
         try:
             from app import TEST_MODE
@@ -384,55 +622,52 @@ class GovernmentEconomicAnalyzer:
         except ImportError:
             max_articles_to_analyze = len(articles)
         
-        # EGYSZER betöltjük az összes meglévő cikket (GYORSABB!)
-        existing_articles = db_manager.get_latest_articles(1000)
-        existing_analyses = {article.get('id'): article.get('full_analysis') for article in existing_articles if article.get('full_analysis')}
+        # EGYETLEN célzott lekérdezés: csak a mostani cikkek (és közel azonos példányaik) elemzései
+        cycle_hashes = []
+        for article in articles[:max_articles_to_analyze]:
+            cycle_hashes.append(article.get('id'))
+            cycle_hashes.extend(related['id'] for related in article.get('related_sources', []))
+        existing_analyses = db_manager.get_analyses_by_hashes(cycle_hashes)
         print(f"📊 {len(existing_analyses)} meglévő elemzés az adatbázisban")
         
+        total = min(max_articles_to_analyze, len(articles))
+        try:
+            from app import TEST_MODE
+            update_frequency = 1 if TEST_MODE else 3
+        except ImportError:
+            update_frequency = 3
+        
         # Minden cikk részletes elemzése - CSAK HA NINCS MÉG ELEMZÉS
+        to_analyze = []
         for i, article in enumerate(articles[:max_articles_to_analyze]):
             article_id = article.get('id')
             existing_analysis = existing_analyses.get(article_id)
+            if not existing_analysis:
+                # Közel azonos példány korábban már elemezve (másik forrásból)
+                for related in article.get('related_sources', []):
+                    existing_analysis = existing_analyses.get(related['id'])
+                    if existing_analysis:
+                        break
             
             if existing_analysis:
-                print(f"Meglévő elemzés: {i+1}/{min(max_articles_to_analyze, len(articles))} - {article.get('source', 'N/A')} (KIHAGYVA)")
+                print(f"Meglévő elemzés: {i+1}/{total} - {article.get('source', 'N/A')} (KIHAGYVA)")
                 # Használjuk a meglévő elemzést
                 article['ai_analysis'] = existing_analysis
                 article['importance_score'] = existing_analysis.get('importance_score', 5)
                 article['urgency'] = existing_analysis.get('urgency', 'monitoring')
+                processed_articles.append(article)
             else:
-                print(f"Új elemzés: {i+1}/{min(max_articles_to_analyze, len(articles))} - {article.get('source', 'N/A')}")
-                
-                analysis = self.analyze_for_government(article)
-                if analysis:
-                    article['ai_analysis'] = analysis
-                    article['importance_score'] = analysis.get('importance_score', 5)
-                    article['urgency'] = analysis.get('urgency', 'monitoring')
-                else:
-                    article['importance_score'] = 5
-                    article['urgency'] = 'monitoring'
-                
-                # DATABASE SAVE - Csak új elemzéseket mentjük
-                db_manager.save_article(article, analysis)
-            
-            processed_articles.append(article)
-            
-            try:
-                from app import TEST_MODE
-                update_frequency = 1 if TEST_MODE else 3
-            except ImportError:
-                update_frequency = 3
-            if i % update_frequency == 0:
-                print(f"💾 {i+1} cikk mentve az adatbázisba")
-                
-                # STREAMING: MINDIG frissítjük a newsletter_data-t
-                from app import newsletter_data
-                newsletter_data['articles'] = [
-                    self.format_article_for_display(a) 
-                    for a in sorted(processed_articles, 
-                                  key=lambda x: x.get('importance_score', 5), 
-                                  reverse=True)[:10]
-                ]
+                to_analyze.append(article)
+        
+        if processed_articles:
+            self._update_live_articles(processed_articles)
+        if progress:
+            progress.update(cached=len(processed_articles), to_analyze=len(to_analyze))
+        
+        if db_manager.available and ANALYSIS_QUEUE:
+            self._analyze_queued(to_analyze, processed_articles, progress)
+        else:
+            self._analyze_in_process(to_analyze, processed_articles, progress, update_frequency)
         
         # Rendezés fontosság szerint
         processed_articles.sort(
@@ -443,15 +678,30 @@ class GovernmentEconomicAnalyzer:
             reverse=True
         )
         
-        # Vezetői összefoglaló generálása CSAK A FELDOLGOZOTT CIKKEKBŐL
-        executive_briefing = self.generate_executive_briefing(processed_articles)
-        
-        # Save executive briefing to database
-        if executive_briefing:
-            db_manager.save_executive_briefing(executive_briefing, len(processed_articles))
-        
-        # Mark processing as completed
-        db_manager.complete_processing(len(processed_articles))
+        # Vezetői összefoglaló generálása CSAK A FELDOLGOZOTT CIKKEKBŐL -
+        # ha a top cikkek és elemzéseik nem változtak, a legutóbbi marad
+        if progress:
+            progress.update(stage='briefing')
+        fingerprint, input_items = self.briefing_fingerprint(self.select_briefing_articles(processed_articles))
+        previous_briefing = db_manager.get_latest_briefing_inputs()
+        if self.briefing_unchanged(previous_briefing, fingerprint, input_items):
+            print("♻️ Vezetői összefoglaló bemenete változatlan - újragenerálás kihagyva")
+            executive_briefing = previous_briefing['content']
+        else:
+            executive_briefing = self.generate_executive_briefing(processed_articles, progress=progress)
+            if executive_briefing and executive_briefing.startswith(BRIEFING_ERROR_PREFIX):
+                # Hibás generálás: a következő futás ne tekintse ezt a bemenetet késznek
+                fingerprint, input_items = None, None
+            
+            # Save executive briefing to database
+            if executive_briefing:
+                db_manager.save_executive_briefing(executive_briefing, len(processed_articles),
+                                                   input_fingerprint=fingerprint, input_items=input_items)
+                event_bus.publish('briefing', {
+                    'content': executive_briefing,
+                    'article_count': len(processed_articles),
+                    'created_at': datetime.utcnow().isoformat()
+                })
         
         # VÉGSŐ FRISSÍTÉS: newsletter_data betöltése az adatbázisból (TOP 30)
         from app import newsletter_data
@@ -464,6 +714,110 @@ class GovernmentEconomicAnalyzer:
         print(f"✅ Kormányzati elemzés kész! ({len(processed_articles)} cikk feldolgozva)")
         return processed_articles, executive_briefing
     
+    def _analyze_in_process(self, to_analyze: List[Dict], processed_articles: List[Dict], progress, update_frequency: int):
+        """Új elemzések ebben a folyamatban (adatbázis nélkül, vagy ANALYSIS_QUEUE=false)"""
+        from database_manager import db_manager
+        
+        # Új elemzések kötegekben és párhuzamosan, a kvótát token bucket-tel tartva;
+        # az eredményeket beérkezési sorrendben mentjük és streameljük
+        batches = self.plan_batches(to_analyze)
+        print(f"🤖 {len(to_analyze)} új elemzés {len(batches)} kérésben (max {ANALYSIS_MAX_CONCURRENCY} párhuzamos, {ANALYSIS_RATE_PER_MINUTE:g} kérés/perc)")
+        done = 0
+        with ThreadPoolExecutor(max_workers=ANALYSIS_MAX_CONCURRENCY, thread_name_prefix='analysis') as executor:
+            futures = {executor.submit(self.analyze_batch, batch): batch for batch in batches}
+            
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    analyses = future.result()
+                except Exception as e:
+                    print(f"❌ Kormányzati elemzési hiba: {e}")
+                    analyses = {}
+                
+                batch_rows = []
+                for article in batch:
+                    done += 1
+                    analysis = analyses.get(article['id'])
+                    print(f"Új elemzés: {done}/{len(to_analyze)} - {article.get('source', 'N/A')}")
+                    self.apply_analysis(article, analysis)
+                    
+                    batch_rows.append((article, analysis))
+                    processed_articles.append(article)
+                
+                # DATABASE SAVE - Csak új elemzéseket mentjük, kötegenként egy tranzakcióban
+                db_manager.save_articles_bulk(batch_rows)
+                
+                # PUSH: a nyitott oldalak helyben frissítik a listát
+                for article, analysis in batch_rows:
+                    if analysis:
+                        event_bus.publish('article', self.format_article_summary(article))
+                if progress:
+                    analyzed = sum(1 for _, analysis in batch_rows if analysis)
+                    progress.increment(analyzed=analyzed, failed=len(batch_rows) - analyzed)
+                if done % update_frequency < len(batch) or done == len(to_analyze):
+                    print(f"💾 {done} új cikk mentve az adatbázisba")
+                    self._update_live_articles(processed_articles)
+    
+    def _analyze_queued(self, to_analyze: List[Dict], processed_articles: List[Dict], progress):
+        """
+        Új elemzések a tartós feladatsoron át: sorba állítjuk, ez a folyamat is
+        dolgozik rajta, és megvárjuk a más workereknél futó feladatokat is.
+        Az eredményeket (bárki elemezte) az adatbázisból olvassuk vissza.
+        """
+        from database_manager import db_manager
+        from analysis_queue import AnalysisQueueWorker
+        
+        if not to_analyze:
+            return
+        job_id = progress.id if progress else None
+        queued = db_manager.enqueue_analysis_tasks(to_analyze, job_id)
+        print(f"📥 {queued} elemzési feladat a sorban (max {ANALYSIS_MAX_CONCURRENCY} párhuzamos, {ANALYSIS_RATE_PER_MINUTE:g} kérés/perc)")
+        
+        worker = AnalysisQueueWorker(self, ANALYSIS_MAX_CONCURRENCY, ANALYSIS_BATCH_SIZE)
+        counts = worker.drain(job_id=job_id, progress=progress)
+        if counts:
+            print(f"💾 Feladatsor: {counts['done']} elemzés kész, {counts['failed']} sikertelen")
+        
+        analyses = db_manager.get_analyses_by_hashes([article['id'] for article in to_analyze])
+        for article in to_analyze:
+            analysis = analyses.get(article['id'])
+            self.apply_analysis(article, analysis)
+            processed_articles.append(article)
+            if analysis and article['id'] not in worker.analyzed:
+                # Más worker elemezte - a nyitott oldalak innen kapják meg
+                event_bus.publish('article', self.format_article_summary(article))
+        self._update_live_articles(processed_articles)
+    
+    @staticmethod
+    def apply_analysis(article: Dict, analysis: Optional[Dict]):
+        """Elemzés a cikkhez (sikertelen elemzésnél alapértelmezett fontosság / sürgősség)"""
+        if analysis:
+            if article.get('related_sources'):
+                analysis['related_sources'] = article['related_sources']
+            article['ai_analysis'] = analysis
+            article['importance_score'] = analysis.get('importance_score', 5)
+            article['urgency'] = analysis.get('urgency', 'monitoring')
+        else:
+            article['importance_score'] = 5
+            article['urgency'] = 'monitoring'
+    
+    def _update_live_articles(self, processed_articles: List[Dict]):
+        """STREAMING: a newsletter_data frissítése a feldolgozás közben"""
+        from app import newsletter_data
+        newsletter_data['articles'] = [
+            self.format_article_for_display(a) 
+            for a in sorted(processed_articles, 
+                          key=lambda x: x.get('importance_score', 5), 
+                          reverse=True)[:10]
+        ]
+    
+    def format_article_summary(self, article: Dict) -> Dict:
+        """Lista nézet mezői (mint Article.to_summary_dict) - a teljes elemzés igény szerint töltődik"""
+        formatted = self.format_article_for_display(article)
+        for key in ('full_analysis', 'description', 'original_description'):
+            formatted.pop(key)
+        return formatted
+    
     def format_article_for_display(self, article: Dict) -> Dict:
         """
         Cikk formázása megjelenítéshez
@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Set
+
+from database_manager import db_manager
+from event_bus import event_bus
+from jobs import process_owner
+
+# Ennyi másodpercenként újítja meg a worker a nála lévő feladatok lease-ét
+# (a lease ANALYSIS_TASK_LEASE_TTL-ig érvényes, ennek töredéke legyen)
+ANALYSIS_TASK_HEARTBEAT_SECONDS = float(os.getenv('ANALYSIS_TASK_HEARTBEAT_SECONDS', '30'))
+# Üres sornál ennyi másodperc után próbál újra feladatot felvenni
+ANALYSIS_QUEUE_POLL_SECONDS = float(os.getenv('ANALYSIS_QUEUE_POLL_SECONDS', '2'))
+
+
+class AnalysisQueueWorker:
+    """
+    Az analysis_tasks sor feldolgozója. `concurrency` szálon vesz fel feladatokat
+    (egyszerre legfeljebb `batch_size` darabot, ami egy kötegelt AI kérés), az
+    eredményt egy tranzakcióban menti a cikkekkel együtt, és amíg dolgozik,
+    megújítja a feladatai lease-ét. A feldolgozó folyamat is ezt használja a
+    saját futása feladatainak lefuttatására, a külön worker folyamatok
+    (analysis_worker.py) pedig ugyanabból a sorból vesznek - így a kapacitás
+    újabb worker folyamatokkal bővíthető.
+    """
+
+    def __init__(self, analyzer, concurrency: int, batch_size: int, owner: Optional[str] = None):
+        self.analyzer = analyzer
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.owner = owner or process_owner()
+        self.analyzed = set()  # Az ebben a folyamatban elemzett cikkek hash-ei
+        self.failed = 0
+        self._held: Set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._job_id = None
+        self._progress = None  # drain(): jobs.Job, a futás feladatainak állapota szerint frissítve
+
+    def stop(self):
+        """Leállítás: a futó köteg még befejeződik, újat nem vesz fel"""
+        self._stop.set()
+
+    def _report(self) -> Optional[Dict[str, int]]:
+        """A futás feladatainak száma állapotonként; a haladás (ha van) ebből frissül"""
+        counts = db_manager.get_analysis_task_counts(self._job_id)
+        if counts is not None and self._progress:
+            self._progress.update(analyzed=counts['done'], failed=counts['failed'])
+        return counts
+
+    def _heartbeat(self, done: threading.Event):
+        while not done.wait(ANALYSIS_TASK_HEARTBEAT_SECONDS):
+            with self._lock:
+                held = list(self._held)
+            if held and db_manager.heartbeat_analysis_tasks(held, self.owner) < len(held):
+                print(f"⚠️ {len(held)} feladatból néhány lease-e lejárt - más worker átvehette")
+
+    def process(self, tasks: List[Dict]) -> int:
+        """Felvett feladatok elemzése és lezárása; az elemzett cikkek száma"""
+        ids = [task['id'] for task in tasks]
+        with self._lock:
+            self._held.update(ids)
+        try:
+            articles = [task['payload'] for task in tasks]
+            analyses = {}
+            for batch in self.analyzer.plan_batches(articles):
+                try:
+                    analyses.update(self.analyzer.analyze_batch(batch))
+                except Exception as e:
+                    print(f"❌ Kormányzati elemzési hiba: {e}")
+
+            done, failed = [], []
+            for task, article in zip(tasks, articles):
+                analysis = analyses.get(task['article_hash'])
+                if analysis:
+                    self.analyzer.apply_analysis(article, analysis)
+                    done.append((task, article, analysis))
+                else:
+                    failed.append((task, article, f"Analysis failed (attempt {task['attempts']})"))
+
+            if not db_manager.finish_analysis_tasks(self.owner, done, failed):
+                # A lease lejártával újra felvehetők - az elemzést újrakérjük
+                return 0
+            with self._lock:
+                self.analyzed.update(task['article_hash'] for task, _, _ in done)
+                self.failed += len(failed)
+            # PUSH: a nyitott oldalak helyben frissítik a listát
+            for _, article, _ in done:
+                event_bus.publish('article', self.analyzer.format_article_summary(article))
+            print(f"✅ {len(done)}/{len(tasks)} elemzési feladat kész")
+            if self._progress:
+                self._report()
+            return len(done)
+        finally:
+            with self._lock:
+                self._held.difference_update(ids)
+
+    def _work(self, until_empty: bool):
+        """Egy szál: feladatok felvétele, amíg van (until_empty) vagy amíg le nem állítják"""
+        while not self._stop.is_set():
+            tasks = db_manager.claim_analysis_tasks(self.owner, self.batch_size)
+            if tasks:
+                self.process(tasks)
+            elif until_empty:
+                return
+            else:
+                self._stop.wait(ANALYSIS_QUEUE_POLL_SECONDS)
+
+    def _run_threads(self, until_empty: bool):
+        heartbeat_done = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(heartbeat_done,), daemon=True,
+                         name='analysis-heartbeat').start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='analysis') as executor:
+                futures = [executor.submit(self._work, until_empty) for _ in range(self.concurrency)]
+                wait(futures)
+                for future in futures:
+                    future.result()
+        finally:
+            heartbeat_done.set()
+
+    def run_forever(self):
+        """Worker folyamat: a sor folyamatos feldolgozása leállításig"""
+        self._run_threads(until_empty=False)
+
+    def drain(self, job_id: Optional[str] = None, progress=None) -> Optional[Dict[str, int]]:
+        """
+        A sor kiürítése, majd várakozás, amíg a `job_id` futás minden feladata
+        lezárul (a más workereknél futók is; egy lejárt lease-ű feladatot itt
+        veszünk fel újra). Visszatérés: a futás feladatainak száma állapotonként.
+        """
+        self._job_id, self._progress = job_id, progress
+        try:
+            while not self._stop.is_set():
+                self._run_threads(until_empty=True)
+                counts = self._report()
+                if counts is None or (not counts['pending'] and not counts['running']):
+                    return counts
+                # Más workereknél futó vagy későbbi újrapróbálásra váró feladatok
+                time.sleep(ANALYSIS_QUEUE_POLL_SECONDS)
+            return self._report()
+        finally:
+            self._job_id, self._progress = None, None
+
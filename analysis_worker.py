@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Kormányzati Külgazdasági Szemle - elemzési feladatsor worker
+Az analysis_tasks sorból vesz fel cikk elemzési feladatokat, és menti az
+eredményt. Tetszőleges számú példány futhat, akár több gépen is: a feladatokat
+lease védi (PostgreSQL-en FOR UPDATE SKIP LOCKED felvétellel), egy leállt
+worker feladatait a lease lejárta után egy másik veszi fel újra.
+
+Indítás: python analysis_worker.py [--once] [--concurrency N] [--batch-size N]
+         (Procfile: analysis)
+"""
+
+import argparse
+import signal
+import sys
+
+from database import init_database
+from ai_processor import GovernmentEconomicAnalyzer, ANALYSIS_MAX_CONCURRENCY, ANALYSIS_BATCH_SIZE
+from analysis_queue import AnalysisQueueWorker
+from database_manager import db_manager
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Elemzési feladatsor feldolgozása')
+    parser.add_argument('--once', action='store_true',
+                        help='a sor kiürítése után kilép (alapértelmezés: folyamatosan figyel)')
+    parser.add_argument('--concurrency', type=int, default=ANALYSIS_MAX_CONCURRENCY,
+                        help=f'párhuzamos AI kérések száma (alap: {ANALYSIS_MAX_CONCURRENCY})')
+    parser.add_argument('--batch-size', type=int, default=ANALYSIS_BATCH_SIZE,
+                        help=f'egyszerre felvett feladatok száma (alap: {ANALYSIS_BATCH_SIZE})')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if not init_database() or not db_manager.available:
+        print("❌ Az elemzési feladatsorhoz adatbázis kell (DATABASE_URL)")
+        sys.exit(1)
+
+    worker = AnalysisQueueWorker(GovernmentEconomicAnalyzer(), args.concurrency, args.batch_size)
+
+    def shutdown(signum, frame):
+        """SIGTERM / SIGINT: a futó kötegek befejeződnek, újat nem veszünk fel"""
+        print("\n🛑 Elemzési worker leállítása (a futó kötegek befejeződnek)...")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    print(f"\n⚙️ Elemzési worker indul ({worker.owner}, {args.concurrency} szál, köteg: {args.batch_size})")
+    if args.once:
+        worker.drain()
+        print(f"✅ Sor kiürítve: {len(worker.analyzed)} elemzés, {worker.failed} sikertelen próbálkozás")
+    else:
+        worker.run_forever()
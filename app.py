@@ -1,16 +1,22 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context
 from flask_cors import CORS
-import feedparser
 import requests
 from datetime import datetime, timedelta
 # from googletrans import Translator  # Kikommentálva - AI-val fordítunk
 import hashlib
 import os
 from dotenv import load_dotenv
-import schedule
 import threading
 import time
-from ai_processor import GovernmentEconomicAnalyzer
+from ai_processor import GovernmentEconomicAnalyzer, TRANSLATION_PROMPT_VERSION
+from feed_fetcher import fetch_all_feeds, feed_cache, SourcesSnapshot
+from source_scheduler import AdaptiveScheduler, MIN_POLL_INTERVAL
+from dedup import group_near_duplicates
+from llm_cache import llm_cache
+from http_cache import conditional_json
+from event_bus import event_bus
+from jobs import job_registry
+from event_relay import DatabaseEventRelay
 from database import init_database, is_database_available
 from database_manager import db_manager
 from flask import send_file
@@ -36,6 +42,20 @@ CORS(app)
 # Teszt mód a gyorsabb fejlesztéshez
 TEST_MODE = os.getenv('TEST_MODE', 'false').lower() == 'true'
 
+# Folyamat szerepe:
+#   all    - web + ütemező + elemzés egy folyamatban (alapértelmezés, python app.py)
+#   web    - csak HTTP kiszolgálás (gunicorn, tetszőleges számú worker)
+#   worker - ütemező + elemzés HTTP nélkül (python worker.py)
+APP_ROLE = os.getenv('APP_ROLE', 'all').lower()
+if APP_ROLE not in ('all', 'web', 'worker'):
+    print(f"⚠️ Ismeretlen APP_ROLE: {APP_ROLE} - 'all' módban indulunk")
+    APP_ROLE = 'all'
+# Web-only módban a frissítési kérést az adatbázisba írjuk; a worker ennyi
+# másodpercenként nézi meg, vár-e kérés
+PROCESSING_REQUEST_POLL_SECONDS = float(os.getenv('PROCESSING_REQUEST_POLL_SECONDS', '2'))
+# /api/events 503 válaszának Retry-After értéke (mp), ha az SSE kapcsolatok korlátja betelt
+SSE_RETRY_AFTER_SECONDS = 30
+
 # Globális változók a hírek tárolására
 newsletter_data = {
     'articles': [],
@@ -166,6 +186,14 @@ ECONOMIC_SOURCES = [
     }
 ]
 
+# /api/rss-sources pillanatképe - a háttérfeladat és a feldolgozási ciklus frissíti.
+# Web-only módban a forrásokat a worker kérdezi le; mi a feed cache-t olvassuk újra
+# (legfeljebb olyan gyakran, ahogy a worker egy forrást lekérdezhet)
+if APP_ROLE == 'web':
+    sources_snapshot = SourcesSnapshot(ECONOMIC_SOURCES, max_age=MIN_POLL_INTERVAL, fetch_feeds=False)
+else:
+    sources_snapshot = SourcesSnapshot(ECONOMIC_SOURCES)
+
 # translator = Translator()  # Kikommentálva - AI-val fordítunk
 
 def generate_article_id(title, source):
@@ -178,13 +206,16 @@ def translate_text(text, max_retries=3):
     if not text:
         return text
     
-    # Használjuk a Gemini API-t a fordításhoz
+    # Fordítás Gemini-vel (kiesésnél OpenAI-jal, lásd analysis_llm)
     try:
-        if ai_analyzer.gemini_model:
+        if ai_analyzer.analysis_llm.available:
             prompt = f"Translate to Hungarian (output ONLY the Hungarian translation, no explanations): {text}"
-            response = ai_analyzer.gemini_model.generate_content(prompt)
+            result = llm_cache.get_any(ai_analyzer.analysis_llm.models, TRANSLATION_PROMPT_VERSION, prompt)
+            if result is None:
+                completion = ai_analyzer.analysis_llm.generate(prompt, kind='translation')
+                result = completion.text.strip()
+                llm_cache.put(completion.model, TRANSLATION_PROMPT_VERSION, prompt, result)
             # Clean up response - remove any THOUGHT sections or extra text
-            result = response.text.strip()
             if "THOUGHT:" in result:
                 # Extract only the translation part
                 lines = result.split('\n')
@@ -193,47 +224,73 @@ def translate_text(text, max_retries=3):
                         return line.strip()
             return result
         else:
-            # Ha nincs Gemini API, adjuk vissza az angol szöveget
+            # Ha nincs AI szolgáltató, adjuk vissza az angol szöveget
             return text
     except Exception as e:
         print(f"Fordítási hiba: {e}")
         return text
 
-def fetch_and_process_news():
-    """Hírek lekérése és feldolgozása kormányzati elemzéssel"""
+def set_processing_status(status):
+    """Feldolgozási állapot beállítása és továbbítása a nyitott oldalaknak (SSE)"""
+    newsletter_data['processing_status'] = status
+    event_bus.publish('status', {
+        'status': status,
+        'last_update': newsletter_data.get('last_update'),
+        'update_count': newsletter_data.get('update_count', 0)
+    })
+
+def fetch_and_process_news(refresh_feeds=True, job=None):
+    """
+    Hírek lekérése és feldolgozása kormányzati elemzéssel.
+    refresh_feeds=False esetén nem kérdezzük le újra a forrásokat, hanem az
+    adaptív ütemező által karbantartott feed cache-ből dolgozunk.
+    `job` (jobs.Job) esetén a haladást is jelentjük.
+    """
     # Ellenorizzük, hogy nem fut-e már
     if newsletter_data.get('processing_status') == 'processing':
         print("⚠️ Feldolgozás már folyamatban...")
         return
     
-    newsletter_data['processing_status'] = 'processing'
+    set_processing_status('processing')
+    try:
+        _run_pipeline(refresh_feeds, job)
+    except Exception:
+        set_processing_status('failed')
+        raise
+
+def _run_pipeline(refresh_feeds, job):
+    """A feldolgozás lépései: lekérés, összevonás, AI elemzés, összefoglaló"""
     print(f"\n{'='*60}")
     print(f"🏛️ KORMÁNYZATI GAZDASÁGI HÍRLEVÉL FRISSÍTÉSE")
     print(f"Időpont: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"{'='*60}\n")
     
     all_articles = []
+    if job:
+        job.update(stage='fetching')
+    
+    if refresh_feeds:
+        # RSS források párhuzamos lekérése (globális határidővel)
+        print(f"📡 Lekérés: {len(ECONOMIC_SOURCES)} forrás párhuzamosan")
+        fetched_feeds = fetch_all_feeds(ECONOMIC_SOURCES)
+        sources_snapshot.update(fetched_feeds)
+    else:
+        print(f"📦 Cikkek a feed cache-ből ({len(ECONOMIC_SOURCES)} forrás)")
+        fetched_feeds = [(source, feed_cache.get(source['url'])) for source in ECONOMIC_SOURCES]
     
     # RSS források feldolgozása
-    for source in ECONOMIC_SOURCES:
+    for source, feed in fetched_feeds:
+        if feed is None:
+            continue
         try:
-            print(f"📡 Lekérés: {source['name']}")
-            feed = feedparser.parse(source['url'])
-            
-            for entry in feed.entries[:3]:  # Max 3 cikk forrásonként a minőség miatt
-                # Alapadatok kinyerése
+            for entry in feed['entries'][:3]:  # Max 3 cikk forrásonként a minőség miatt
+                # Alapadatok kinyerése (a feed cache már normalizált bejegyzéseket ad)
                 title = entry.get('title', 'Nincs cím')
-                description = entry.get('summary', entry.get('description', ''))
+                description = entry.get('description', '')
                 link = entry.get('link', '')
                 
                 # Publikálási idő
-                pub_date = None
-                if hasattr(entry, 'published_parsed'):
-                    pub_date = datetime(*entry.published_parsed[:6])
-                elif hasattr(entry, 'updated_parsed'):
-                    pub_date = datetime(*entry.updated_parsed[:6])
-                else:
-                    pub_date = datetime.now()
+                pub_date = datetime.fromisoformat(entry['pub_date']) if entry.get('pub_date') else datetime.now()
                 
                 # Csak az elmúlt 48 óra hírei (kormányzati elemzéshez bővebb időablak)
                 if datetime.now() - pub_date > timedelta(days=2):
@@ -264,10 +321,19 @@ def fetch_and_process_news():
     
     print(f"\n📊 Összesen {len(all_articles)} cikk összegyűjtve")
     
+    # Több forrásból érkező, közel azonos hírek összevonása - történetenként egy AI elemzés;
+    # az összevont példányok is tárolódnak, a kanonikus cikkhez kötve
+    all_articles, duplicates = group_near_duplicates(all_articles)
+    if duplicates:
+        db_manager.save_articles_bulk([(article, None) for article in duplicates])
+    
+    if job:
+        job.update(stage='analyzing', articles_fetched=len(all_articles))
+    
     # AI elemzés csak ha vannak cikkek
     if all_articles:
         print(f"\n🤖 Kormányzati AI elemzés indítása...")
-        processed_articles, executive_briefing = ai_analyzer.process_articles_for_government(all_articles)
+        processed_articles, executive_briefing = ai_analyzer.process_articles_for_government(all_articles, progress=job)
         
         if not is_database_available():
             # Fallback: memória mód
@@ -284,172 +350,278 @@ def fetch_and_process_news():
     
     newsletter_data['last_update'] = datetime.now().isoformat()
     newsletter_data['update_count'] += 1
-    newsletter_data['processing_status'] = 'completed'
+    set_processing_status('completed')
     
     print(f"\n✅ Frissítés kész! Feldolgozott cikkek: {len(newsletter_data['articles'])}")
     print(f"{'='*60}\n")
 
-def run_scheduler():
-    """Ütemező futtatása háttérszálon"""
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+def pipeline_target(refresh_feeds=True, reset=False):
+    """A feldolgozási feladat futtatója"""
+    def run(job):
+        if reset:
+            # Úresetünk mindent a duplikáció elkerülésére
+            newsletter_data['articles'] = []
+            newsletter_data['executive_briefing'] = ''
+        fetch_and_process_news(refresh_feeds=refresh_feeds, job=job)
+    return run
 
-# Ütemezett feladatok beállítása - KÉT KÜLÖN CIKLUS
-def fetch_rss_only():
-    """Csak RSS hírek lekérése elemzés nélkül (30 percenként)"""
-    print(f"\n📰 RSS hírek frissítése: {datetime.now().strftime('%H:%M:%S')}")
-    # Itt lehetne RSS cache frissítés, de most még nincs külön implementálva
+def requested_pipeline(kind):
+    """A web folyamatban kért feldolgozás (refresh / test) futtatója a workerben"""
+    global TEST_MODE
+    if kind == 'test':
+        TEST_MODE = True
+    return pipeline_target(reset=True)
 
-def fetch_and_analyze():
-    """Teljes elemzés új cikkekkel (2 óránként)"""
-    fetch_and_process_news()
+def start_pipeline_job(kind, refresh_feeds=True, reset=False):
+    """
+    Feldolgozás indítása háttérfeladatként. Visszatérés: (feladat, új-e);
+    ha már fut egy feldolgozás, azt kapjuk vissza - ha egy másik folyamatban
+    (adatbázis lease), akkor (None, False).
+    Web-only módban (APP_ROLE=web) itt semmi nem fut: a kérést az adatbázisba
+    írjuk, és a worker folyamat veszi fel (poll_processing_requests).
+    """
+    if APP_ROLE == 'web' and is_database_available():
+        return job_registry.request(kind)
+    return job_registry.submit(kind, pipeline_target(refresh_feeds=refresh_feeds, reset=reset))
 
-# RSS frissítés: 30 percenként
-schedule.every(30).minutes.do(fetch_rss_only)
+def poll_processing_requests():
+    """A web folyamatok által kért feldolgozások felvétele (APP_ROLE=all / worker)"""
+    while True:
+        time.sleep(PROCESSING_REQUEST_POLL_SECONDS)
+        try:
+            job = job_registry.claim_request(requested_pipeline)
+            if job:
+                print(f"📨 Kért feldolgozás indul ({job.kind} {job.id[:8]})")
+        except Exception as e:
+            print(f"❌ Feldolgozási kérés felvételi hiba: {e}")
+
+def fetch_and_analyze():
+    """Elemzés az ütemező által már lekért (cache-elt) cikkekkel"""
+    job, _ = start_pipeline_job('scheduled', refresh_feeds=False)
+    if job is None:
+        print("⚠️ Egy másik folyamat már feldolgoz - ütemezett elemzés kihagyva")
+        return
+    job.wait()
 
-# AI elemzés: 2 óránként  
-schedule.every(2).hours.do(fetch_and_analyze)
+# Adaptív, forrásonkénti ütemező: a lekérések a hírfolyamhoz igazodnak,
+# az elemzés csak új cikkek esetén fut (legfeljebb ANALYSIS_INTERVAL-onként)
+scheduler = AdaptiveScheduler(
+    ECONOMIC_SOURCES,
+    on_poll=sources_snapshot.update,
+    analyze=fetch_and_analyze
+)
 
-# Első futtatás háttérszálban 2 másodperc múlva
+# Források pillanatképe háttérszálban 2 másodperc múlva
 def delayed_first_run():
-    """Késleltetett első futtatás - csak ha nincs friss adat"""
+    """
+    Késleltetett indulás: a források pillanatképe a perzisztens feed cache-ből.
+    Az induló lekérést és az első elemzést az ütemező végzi (run_forever).
+    """
     time.sleep(2)
-    try:
-        test_mode_text = '(TESZT MÓD)' if TEST_MODE else ''
-    except NameError:
-        test_mode_text = ''
+    # Források pillanatképének előmelegítése a perzisztens feed cache-ből (hálózat nélkül)
+    sources_snapshot.update([])
+    test_mode_text = '(TESZT MÓD)' if TEST_MODE else ''
+    print(f"\n🚀 Első hírek betöltése indul... {test_mode_text}")
+
+def start_background_tasks():
+    """Első futtatás és az adaptív ütemező háttérszálakon (APP_ROLE=all / worker)"""
+    first_run_thread = threading.Thread(target=delayed_first_run, daemon=True, name='first-run')
+    first_run_thread.start()
     
-    # Ellenőrizzük van-e már friss adat az adatbázisban
     if is_database_available():
-        try:
-            articles = db_manager.get_latest_articles(5)
-            if articles:
-                print(f"\n💾 {len(articles)} cikk található az adatbázisban - első feldolgozás kihagyása")
-                return
-        except Exception as e:
-            print(f"\n⚠️ Adatbázis ellenőrzési hiba: {e}")
+        threading.Thread(target=poll_processing_requests, daemon=True, name='processing-requests').start()
     
-    print(f"\n🚀 Első hírek betöltése indul... {test_mode_text}")
-    fetch_and_process_news()
+    scheduler_thread = threading.Thread(target=scheduler.run_forever, daemon=True, name='scheduler')
+    scheduler_thread.start()
+    return scheduler_thread
 
-# Első futtatás háttérszálban
-first_run_thread = threading.Thread(target=delayed_first_run, daemon=True)
-first_run_thread.start()
+# Web-only módban a worker folyamat eseményeit az adatbázisból továbbítjuk az SSE klienseknek
+event_relay = DatabaseEventRelay(on_status=set_processing_status)
 
-# Ütemező indítása háttérszálon
-scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-scheduler_thread.start()
+if APP_ROLE == 'all':
+    start_background_tasks()
+elif APP_ROLE == 'web':
+    event_relay.start()
 
 @app.route('/')
 def index():
     """Főoldal"""
     return render_template('index.html', data=newsletter_data)
 
+def parse_article_filters(args):
+    """Lista / keresés szűrők a query stringből (ValueError hibás dátumnál)"""
+    filters = {name: args.get(name, '').strip() or None for name in ('category', 'source', 'urgency')}
+    for name in ('date_from', 'date_to'):
+        value = args.get(name, '').strip()
+        if not value:
+            filters[name] = None
+            continue
+        parsed = datetime.fromisoformat(value)
+        # Csak dátum esetén a date_to az egész napot jelenti
+        if name == 'date_to' and len(value) == 10:
+            parsed += timedelta(days=1)
+        filters[name] = parsed
+    return filters
+
+def parse_page_size(args, default, maximum):
+    """per_page / limit paraméter a megengedett tartományban"""
+    return min(maximum, max(1, int(args.get('per_page', args.get('limit', default)))))
+
+def json_response(body: bytes):
+    """Előre szerializált (cache-elt) JSON válasz - ETag / 304 és tömörítés"""
+    return conditional_json(body)
+
 @app.route('/api/articles')
 def get_articles():
-    """API végpont a cikkek lekéréséhez"""
+    """API végpont a cikkek lekéréséhez (kurzoros lapozás + szűrők)"""
     if is_database_available():
-        # ADATBÁZISBÓL TOP 30-AT BETÖLTÜNK (fontosság szerint)
-        articles = db_manager.get_latest_articles(30)
-        briefing = db_manager.get_latest_executive_briefing()
+        try:
+            filters = parse_article_filters(request.args)
+            per_page = parse_page_size(request.args, 30, 100)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Érvénytelen szűrő vagy lapozási paraméter'})
+        cursor = request.args.get('cursor') or None
+        processing_status = newsletter_data.get('processing_status', 'idle')
         
-        # FRISSÍTJÜK A NEWSLETTER_DATA-T IS
-        newsletter_data['articles'] = articles
-        newsletter_data['executive_briefing'] = briefing['content'] if briefing else "Nincs vezetői összefoglaló"
-        newsletter_data['last_update'] = briefing['created_at'] if briefing else None
+        def build():
+            page = db_manager.get_articles_page(per_page, cursor=cursor, filters=filters)
+            briefing = db_manager.get_latest_executive_briefing()
+            
+            # Paraméter nélkül ez a főoldal tartalma - FRISSÍTJÜK A NEWSLETTER_DATA-T IS
+            # (csak ha az adat változott, cache találatnál nem)
+            if not request.args:
+                newsletter_data['articles'] = page['articles']
+                newsletter_data['executive_briefing'] = briefing['content'] if briefing else "Nincs vezetői összefoglaló"
+                newsletter_data['last_update'] = briefing['created_at'] if briefing else None
+            
+            return {
+                'articles': page['articles'],
+                'next_cursor': page['next_cursor'],
+                'executive_briefing': briefing['content'] if briefing else "Nincs vezetői összefoglaló",
+                'last_update': briefing['created_at'] if briefing else None,
+                'processing_status': processing_status
+            }
         
-        return jsonify({
-            'articles': articles,
-            'executive_briefing': briefing['content'] if briefing else "Nincs vezetői összefoglaló",
-            'last_update': briefing['created_at'] if briefing else None,
-            'processing_status': newsletter_data.get('processing_status', 'idle')
-        })
+        key = ('articles', per_page, cursor, tuple(sorted(filters.items())), processing_status)
+        try:
+            return json_response(db_manager.cached_json(key, build))
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Érvénytelen kurzor'})
+    else:
+        # Fallback: memória mód
+        return json_response(app.json.dumps(newsletter_data).encode('utf-8'))
+
+@app.route('/api/articles/<article_id>')
+def get_article_detail(article_id):
+    """Egy cikk teljes AI elemzéssel - a lista csak összefoglalót ad, ezt igény szerint töltjük"""
+    if is_database_available():
+        def build():
+            article = db_manager.get_article(article_id)
+            return {'success': True, 'article': article} if article else None
+        
+        body = db_manager.cached_json(('article', article_id), build)
+        if body != b'null':
+            return json_response(body)
     else:
         # Fallback: memória mód
-        return jsonify(newsletter_data)
+        article = next((a for a in newsletter_data['articles'] if a.get('id') == article_id), None)
+        if article:
+            return jsonify({'success': True, 'article': article})
+    
+    return jsonify({'success': False, 'message': 'Cikk nem található'}), 404
+
+@app.route('/api/sectoral-overview')
+def get_sectoral_overview():
+    """Szektorális áttekintés a top cikkekből (csak a szektor mezők, elemzés JSON nélkül)"""
+    if is_database_available():
+        return json_response(db_manager.cached_json(
+            ('sectoral-overview',), lambda: {'articles': db_manager.get_sectoral_overview(30)}
+        ))
+    articles = [{
+        'title': a.get('title'),
+        'affected_sectors': ((a.get('full_analysis') or {}).get('sectoral_analysis') or {}).get('affected_sectors') or [],
+        'employment_impact': ((a.get('full_analysis') or {}).get('sectoral_analysis') or {}).get('employment_impact')
+    } for a in newsletter_data['articles']]
+    return jsonify({'articles': articles})
+
+@app.route('/api/events')
+def stream_events():
+    """
+    Server-Sent Events: új elemzett cikk ('article'), állapotváltás ('status'),
+    kész vezetői összefoglaló ('briefing'). Újracsatlakozáskor a Last-Event-ID
+    utáni eseményeket visszajátsszuk.
+    """
+    # A böngésző automatikus újracsatlakozása fejlécben, a kézi (503 utáni) query paraméterben küldi
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id', '')
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else None
+    stream = event_bus.open_stream(last_event_id)
+    if stream is None:
+        # Minden SSE hely foglalt - a szálak a normál API kéréseknek maradnak
+        return jsonify({
+            'success': False,
+            'message': 'Túl sok élő kapcsolat, később próbáld újra'
+        }), 503, {'Retry-After': str(SSE_RETRY_AFTER_SECONDS)}
+    response = Response(
+        stream_with_context(stream),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # A hely akkor is felszabadul, ha a kapcsolat az első üzenet előtt bomlik
+    response.call_on_close(stream.close)
+    return response
+
+def job_accepted(job, created, message):
+    """
+    202 + feladat azonosító; ha már fut egy feldolgozás (ebben vagy egy másik
+    folyamatban), 409 annak azonosítójával
+    """
+    if not created:
+        running = job.to_dict() if job else job_registry.running()
+        job_id = running['id'] if running else None
+        return jsonify({
+            'success': False,
+            'message': 'Feldolgozás már folyamatban...',
+            'job_id': job_id,
+            'status_url': f"/api/jobs/{job_id}" if job_id else None
+        }), 409
+    status_url = f"/api/jobs/{job.id}"
+    return jsonify({
+        'success': True,
+        'message': message,
+        'job_id': job.id,
+        'status_url': status_url
+    }), 202, {'Location': status_url}
 
 @app.route('/api/refresh', methods=['POST'])
 def refresh_articles():
-    """Manuális frissítés"""
-    if newsletter_data.get('processing_status') == 'processing':
-        return jsonify({'success': False, 'message': 'Feldolgozás már folyamatban...'})
-    
-    # Úresetünk mindent a duplikáció elkerülésére
-    newsletter_data['articles'] = []
-    newsletter_data['executive_briefing'] = ''
-    
-    fetch_and_process_news()
-    return jsonify({'success': True, 'message': 'Hírek frissítve'})
+    """Manuális frissítés - háttérfeladatként, a kérés azonnal visszatér"""
+    job, created = start_pipeline_job('refresh', reset=True)
+    return job_accepted(job, created, 'Frissítés elindítva')
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """
+    Háttérfeladat állapota és haladása (lekért, elemzett, cache-ből, hibás cikkek) -
+    a másik folyamatban (worker) futó feladatoké a lease sorból
+    """
+    job = job_registry.lookup(job_id)
+    if not job:
+        return jsonify({'success': False, 'message': 'Feladat nem található'}), 404
+    return jsonify({'success': True, 'job': job})
 
 @app.route('/api/rss-sources')
 def get_rss_sources():
-    """RSS források és cikkeik VALÓS IDEJŰ lekérése"""
-    sources_with_articles = []
-    
-    for source in ECONOMIC_SOURCES:
-        try:
-            # Valós időben lekérjük az RSS feed-et
-            feed = feedparser.parse(source['url'])
-            recent_articles = []
-            
-            for entry in feed.entries[:3]:  # Max 3 legfrissebb cikk
-                title = entry.get('title', 'Nincs cím')
-                link = entry.get('link', '')
-                description = entry.get('summary', entry.get('description', ''))
-                
-                # Publikálási idő
-                pub_date = None
-                if hasattr(entry, 'published_parsed'):
-                    pub_date = datetime(*entry.published_parsed[:6])
-                elif hasattr(entry, 'updated_parsed'):
-                    pub_date = datetime(*entry.updated_parsed[:6])
-                else:
-                    pub_date = datetime.now()
-                
-                recent_articles.append({
-                    'title': title,
-                    'link': link,
-                    'pub_date': pub_date.isoformat(),
-                    'description': description[:150] + '...' if description else ''
-                })
-            
-            source_info = {
-                'name': source['name'],
-                'url': source['url'],
-                'category': source['category'],
-                'articles': recent_articles
-            }
-            sources_with_articles.append(source_info)
-            
-        except Exception as e:
-            print(f"❌ RSS lekérési hiba {source['name']}: {e}")
-            # Fallback üres cikkekkel
-            source_info = {
-                'name': source['name'],
-                'url': source['url'], 
-                'category': source['category'],
-                'articles': []
-            }
-            sources_with_articles.append(source_info)
-    
-    return jsonify({'sources': sources_with_articles})
+    """RSS források és cikkeik - háttérben frissített pillanatképből"""
+    return json_response(app.json.dumps(sources_snapshot.get()).encode('utf-8'))
 
 @app.route('/api/test-refresh', methods=['POST'])
 def test_refresh():
-    """Gyors teszt frissítés"""
+    """Gyors teszt frissítés - háttérfeladatként"""
     global TEST_MODE
     TEST_MODE = True
     
-    if newsletter_data.get('processing_status') == 'processing':
-        return jsonify({'success': False, 'message': 'Feldolgozás már folyamatban...'})
-    
-    # Úresetünk mindent
-    newsletter_data['articles'] = []
-    newsletter_data['executive_briefing'] = ''
-    
-    fetch_and_process_news()
-    return jsonify({'success': True, 'message': 'Teszt frissítés elindítva (3 forrás, 3 cikk)'})
+    job, created = start_pipeline_job('test', reset=True)
+    return job_accepted(job, created, 'Teszt frissítés elindítva (3 forrás, 3 cikk)')
 
 @app.route('/api/cleanup', methods=['POST'])
 def cleanup_database():
@@ -472,43 +644,81 @@ def search_articles():
     if not query or len(query) < 2:
         return jsonify({'success': False, 'message': 'Minimum 2 karakter szükséges'})
     
-    # Keresés az összes cikkben (nem csak a top 30-ban!)
-    all_articles = db_manager.get_latest_articles(1000)
-    results = []
+    # Indexelt teljes szöveges keresés az archívumban
+    # sort=relevance: relevancia szerint, oldalszámmal; sort=importance: fontosság szerint, kurzorral
+    sort = request.args.get('sort', 'relevance')
+    if sort not in ('relevance', 'importance'):
+        return jsonify({'success': False, 'message': 'Érvénytelen rendezés (relevance / importance)'})
+    try:
+        filters = parse_article_filters(request.args)
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = parse_page_size(request.args, 20, 50)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Érvénytelen szűrő vagy lapozási paraméter'})
+    cursor = request.args.get('cursor') or None
     
-    query_lower = query.lower()
-    for article in all_articles:
-        # Keresés címben, összefoglalóban, forrásban
-        title = (article.get('title', '') or '').lower()
-        summary = (article.get('executive_summary', '') or '').lower()
-        source = (article.get('source', '') or '').lower()
-        
-        if (query_lower in title or 
-            query_lower in summary or 
-            query_lower in source):
-            results.append(article)
+    def build():
+        found = db_manager.search_articles(query, limit=per_page, offset=(page - 1) * per_page,
+                                           filters=filters, cursor=cursor, sort=sort)
+        response = {
+            'success': True,
+            'query': query,
+            'sort': sort,
+            'results': found['results'],
+            'total': found['total'],
+            'per_page': per_page
+        }
+        if sort == 'importance':
+            response['next_cursor'] = found['next_cursor']
+        else:
+            response['page'] = page
+        return response
     
-    return jsonify({
-        'success': True,
-        'query': query,
-        'results': results[:50],  # Max 50 találat
-        'total': len(results)
-    })
+    key = ('search', query, sort, page, per_page, cursor, tuple(sorted(filters.items())))
+    try:
+        return json_response(db_manager.cached_json(key, build))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Érvénytelen kurzor'})
 
 @app.route('/api/db-status')
 def database_status():
-    """Adatbázis állapot"""
+    """Adatbázis állapot és statisztikák (aggregált lekérdezésekből)"""
     if is_database_available():
-        article_count = len(db_manager.get_latest_articles(1000))
+        stats = db_manager.get_stats()
+        if stats is None:
+            return jsonify({'database_available': False, 'message': 'Statisztika lekérési hiba'})
         briefing = db_manager.get_latest_executive_briefing()
         return jsonify({
             'database_available': True,
-            'article_count': article_count,
-            'last_briefing': briefing['created_at'] if briefing else None
+            **stats,
+            'last_briefing': briefing['created_at'] if briefing else None,
+            'llm_cache': llm_cache.stats(),
+            'llm_providers': ai_analyzer.provider_stats(),
+            'analysis_queue': db_manager.get_analysis_task_counts(),
+            'read_cache': db_manager.read_cache_stats()
         })
     else:
         return jsonify({'database_available': False})
 
+@app.route('/api/health')
+def health_check():
+    """
+    Load balancer / readiness próba - egyetlen SELECT 1, semmi más.
+    503, ha az adatbázis be van állítva, de nem érhető el.
+    """
+    health = {
+        'status': 'ok',
+        'role': APP_ROLE,
+        'database': None,
+        'processing_status': newsletter_data.get('processing_status', 'idle')
+    }
+    if is_database_available():
+        health['database'] = db_manager.ping()
+        if not health['database']:
+            health['status'] = 'unavailable'
+            return jsonify(health), 503
+    return jsonify(health)
+
 @app.route('/api/export-pdf')
 def export_pdf():
     """PDF export - Kormányzati jelentés"""
@@ -516,8 +726,8 @@ def export_pdf():
         return jsonify({'success': False, 'message': 'Adatbázis nem elérhető'})
     
     try:
-        # Adatok lekérése
-        articles = db_manager.get_latest_articles(30)
+        # Adatok lekérése (a PDF a teljes elemzéseket tartalmazza)
+        articles = db_manager.get_latest_articles(30, full=True)
         briefing = db_manager.get_latest_executive_briefing()
         
         # HTML template generálása
@@ -644,6 +854,7 @@ def export_pdf():
 
 if __name__ == '__main__':
     print(f"\n🔧 Teszt mód: {'BE' if TEST_MODE else 'KI'}")
+    print(f"🧩 Szerep: {APP_ROLE}")
     print(f"💾 Adatbázis: {'PostgreSQL' if is_database_available() else 'Memória mód'}")
     print("\n🔄 API Endpoints:")
     print("  POST /api/refresh - Teljes frissítés")
@@ -654,6 +865,7 @@ if __name__ == '__main__':
     print("  GET /api/db-status - Adatbázis állapot")
     print("\n🌍 Environment variables:")
     print("  TEST_MODE=true - Gyors teszt mód")
+    print("  APP_ROLE=all|web|worker - Folyamat szerepe (web: csak HTTP, worker.py: ütemező)")
     print("  DATABASE_URL=postgresql://... - PostgreSQL kapcsolat\n")
     
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+response_parser mikrobenchmark
+
+Összeméri az új, egy menetes parsert a korábbi (zárójel-számlálás + regex
+tisztítás + json.loads) megoldással a response_corpus.json válaszain és egy
+nagy, szintetikus válaszon. A korpusz elvárt eredményeit a
+tests/test_response_parser.py ellenőrzi.
+
+Futtatás a projekt gyökeréből: python benchmarks/response_parser_bench.py
+"""
+
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_parser import parse_analysis
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'response_corpus.json')
+
+
+def legacy_parse(response_text):
+    """A response_parser előtti ai_processor logika (összehasonlításhoz)"""
+    if "THOUGHT:" in response_text:
+        response_text = re.sub(r'THOUGHT:.*?(?=\{)', '', response_text, flags=re.DOTALL)
+    json_start = response_text.find('{')
+    if json_start == -1:
+        return None
+    brace_count = 0
+    json_end = json_start
+    for i, char in enumerate(response_text[json_start:], json_start):
+        if char == '{':
+            brace_count += 1
+        elif char == '}':
+            brace_count -= 1
+            if brace_count == 0:
+                json_end = i + 1
+                break
+    json_text = response_text[json_start:json_end]
+    json_text = re.sub(r',(\s*[}\]])', r'\1', json_text)
+    json_text = re.sub(r'[\n\r\t]', ' ', json_text)
+    try:
+        return json.loads(json_text)
+    except ValueError:
+        return None
+
+
+def bench(label, func, text, number):
+    seconds = min(timeit.repeat(lambda: func(text), number=number, repeat=5)) / number
+    print(f"  {label:<22} {seconds * 1e6:10.1f} µs")
+    return seconds
+
+
+def run_benchmark(corpus):
+    clean = next(case['response'] for case in corpus if case['name'] == 'code_fence')
+    # Javítandó válasz (a régi parser is kezeli): a scanner útja
+    malformed = next(case['response'] for case in corpus if case['name'] == 'trailing_commas')
+    analysis = json.loads(next(case['response'] for case in corpus if case['name'] == 'clean'))
+    # Nagy válasz: hosszú gondolatmenet + sok soros, hosszú string mezők
+    analysis['executive_summary'] = ' '.join([analysis['executive_summary']] * 200)
+    analysis['monitoring_points'] = [f"Figyelendő mutató {i}: {{részletek}}" for i in range(300)]
+    large = 'THOUGHT: ' + 'elemzés lépései, ' * 2000 + '\n```json\n' + json.dumps(analysis, ensure_ascii=False, indent=4) + '\n```'
+
+    for label, text, number in (('tipikus válasz', clean, 2000), ('javítandó válasz', malformed, 2000),
+                                (f'nagy válasz ({len(large) // 1024} KB)', large, 20)):
+        print(f"\n⏱️ {label}")
+        legacy = bench('régi (regex + számlálás)', legacy_parse, text, number)
+        new = bench('response_parser', parse_analysis, text, number)
+        print(f"  arány: {legacy / new:.2f}x")
+
+
+if __name__ == '__main__':
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        corpus = json.load(f)
+    usable = [case for case in corpus if case['mode'] == 'single' and case['expect'] is not None]
+    legacy_ok = sum(1 for case in usable if legacy_parse(case['response']) is not None)
+    print(f"A régi parser {legacy_ok}/{len(usable)} használható egyedi választ értelmezett")
+    run_benchmark(corpus)
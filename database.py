@@ -1,7 +1,7 @@
 import os
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, JSON, Boolean
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, JSON, Boolean, Index, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.orm import sessionmaker, scoped_session, deferred
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -16,23 +16,29 @@ class Article(Base):
     article_hash = Column(String(32), unique=True, nullable=False)
     title = Column(Text, nullable=False)
     original_title = Column(Text, nullable=False)
-    description = Column(Text)
-    original_description = Column(Text)
+    # Nagy mezők: listákban nem töltjük be (undefer_group('detail') a részletes nézethez)
+    description = deferred(Column(Text), group='detail')
+    original_description = deferred(Column(Text), group='detail')
     source = Column(String(100), nullable=False)
     category = Column(String(100))
     link = Column(Text, nullable=False)
     pub_date = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Utolsó módosítás (migration 0009) - az újraelemzés is látszik a változásfigyelésben
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # AI elemzés mezők
     importance_score = Column(Integer, default=5)
     urgency = Column(String(20), default='monitoring')
     executive_summary = Column(Text)
-    ai_analysis = Column(JSON)  # Teljes AI elemzés JSON-ben
+    ai_analysis = deferred(Column(JSON), group='detail')  # Teljes AI elemzés JSON-ben
     hungarian_title = Column(Text)  # AI által generált magyar cím
+    # Közel azonos példány (migration 0008): a kanonikus cikk article_hash-e; a
+    # listák csak a kanonikus cikkeket mutatják, az elemzés is azokra fut
+    duplicate_of = Column(String(32))
     
-    def to_dict(self):
-        """Convert to dictionary for JSON serialization"""
+    def to_summary_dict(self):
+        """List view projection - only non-deferred columns, no AI analysis JSON"""
         return {
             'id': self.article_hash,
             'title': self.hungarian_title or self.title,
@@ -43,11 +49,26 @@ class Article(Base):
             'link': self.link,
             'importance_score': self.importance_score,
             'urgency': self.urgency,
-            'executive_summary': self.executive_summary,
+            'executive_summary': self.executive_summary
+        }
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization (needs the 'detail' group loaded)"""
+        data = self.to_summary_dict()
+        data.update({
             'full_analysis': self.ai_analysis,
             'description': self.description,
-            'original_description': self.original_description
-        }
+            'original_description': self.original_description,
+            'duplicate_of': self.duplicate_of
+        })
+        return data
+
+# Hot query indexes (migration 0003): list views order by score/date/id,
+# cleanup_old_articles deletes by created_at
+Index('ix_articles_importance_pub_date', Article.importance_score.desc(), Article.pub_date.desc(), Article.id.desc())
+Index('ix_articles_created_at', Article.created_at)
+Index('ix_articles_duplicate_of', Article.duplicate_of)
+Index('ix_articles_updated_at', Article.updated_at)
 
 class ExecutiveBriefing(Base):
     __tablename__ = 'executive_briefings'
@@ -56,16 +77,79 @@ class ExecutiveBriefing(Base):
     content = Column(Text, nullable=False)
     article_count = Column(Integer)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # migration 0009
+    # Input set the briefing was generated from (migration 0006): sha256 of the
+    # top articles' hash:analysis-version items, plus the items themselves
+    input_fingerprint = Column(String(64))
+    input_items = Column(JSON)
+
+Index('ix_executive_briefings_created_at', ExecutiveBriefing.created_at.desc())
 
 class ProcessingStatus(Base):
     __tablename__ = 'processing_status'
     
     id = Column(Integer, primary_key=True)
-    status = Column(String(20), nullable=False)  # 'processing', 'completed', 'failed'
+    status = Column(String(20), nullable=False)  # 'queued', 'processing', 'completed', 'failed'
     started_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime)
     articles_processed = Column(Integer, default=0)
     error_message = Column(Text)
+    
+    # Lease: a 'processing' row is the cross-process lock for one pipeline run
+    # (migration 0005). It is only valid while its owner keeps heartbeat_at fresh.
+    job_id = Column(String(32))
+    kind = Column(String(20))
+    owner = Column(String(100))  # hostname:pid
+    heartbeat_at = Column(DateTime)
+    progress = Column(JSON)  # stage + counters, readable by the other processes
+
+Index('ix_processing_status_status_started_at', ProcessingStatus.status, ProcessingStatus.started_at.desc())
+Index('ix_processing_status_job_id', ProcessingStatus.job_id)
+
+class AnalysisTask(Base):
+    __tablename__ = 'analysis_tasks'
+    
+    id = Column(Integer, primary_key=True)
+    article_hash = Column(String(32), unique=True, nullable=False)
+    payload = Column(JSON, nullable=False)  # A cikk a lekéréskor (related_sources-szal együtt)
+    status = Column(String(20), nullable=False, default='pending')  # 'pending', 'running', 'done', 'failed'
+    job_id = Column(String(32))  # A feladatot sorba állító futás (processing_status.job_id)
+    attempts = Column(Integer, nullable=False, default=0)
+    
+    # Lease: a 'running' feladat csak lease_expires_at-ig a tulajdonosáé (migration 0007);
+    # utána bármelyik worker újra felveheti (összeomlott worker feladata)
+    owner = Column(String(100))  # hostname:pid
+    lease_expires_at = Column(DateTime)
+    available_at = Column(DateTime, default=datetime.utcnow)  # Újrapróbálás leghamarabb ekkor
+    error_message = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+Index('ix_analysis_tasks_status_available_at', AnalysisTask.status, AnalysisTask.available_at)
+Index('ix_analysis_tasks_job_id', AnalysisTask.job_id)
+
+class FeedCache(Base):
+    __tablename__ = 'feed_cache'
+    
+    id = Column(Integer, primary_key=True)
+    source_url = Column(String(500), unique=True, nullable=False)
+    etag = Column(Text)
+    last_modified = Column(Text)
+    entries = Column(JSON)  # Utolsó sikeresen feldolgozott bejegyzések
+    fetched_at = Column(DateTime)  # Utolsó 200-as (teljes) letöltés
+    checked_at = Column(DateTime)  # Utolsó kérés (304 is)
+
+class LLMCacheEntry(Base):
+    __tablename__ = 'llm_cache'
+    
+    id = Column(Integer, primary_key=True)
+    cache_key = Column(String(64), unique=True, nullable=False)  # sha256(modell, prompt verzió, prompt)
+    model = Column(String(100), nullable=False)
+    template_version = Column(String(50))
+    response = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow)
+    hit_count = Column(Integer, default=0)
 
 # Database setup
 def get_database_url():
@@ -102,12 +186,51 @@ def get_session():
         return SessionLocal()
     return None
 
+# Full-text search
+# PostgreSQL: expression GIN index (migration 0002) - the query must use exactly
+# this expression.
+# Hungarian config for the AI-generated fields, English for the original feed text.
+PG_SEARCH_VECTOR = (
+    "setweight(to_tsvector('hungarian'::regconfig, coalesce(hungarian_title, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(original_title, '')), 'A') || "
+    "setweight(to_tsvector('hungarian'::regconfig, coalesce(executive_summary, '')), 'B') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(source, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(original_description, '')), 'C')"
+)
+
+# Alembic migrations (alembic.ini + migrations/) own the schema: tables, the
+# full-text search objects and the composite indexes
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'alembic.ini')
+
+# pg_advisory_lock key - only one process runs the migrations at a time
+MIGRATION_LOCK_ID = 7263401
+
+def run_migrations():
+    """Upgrade the database schema to the latest Alembic revision"""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.attributes['configure_logger'] = False
+    with engine.connect() as connection:
+        if connection.dialect.name == 'postgresql':
+            connection.execute(text("SELECT pg_advisory_lock(:id)"), {'id': MIGRATION_LOCK_ID})
+            connection.commit()
+        try:
+            config.attributes['connection'] = connection
+            command.upgrade(config, 'head')
+            connection.commit()
+        finally:
+            if connection.dialect.name == 'postgresql':
+                connection.execute(text("SELECT pg_advisory_unlock(:id)"), {'id': MIGRATION_LOCK_ID})
+                connection.commit()
+
 def init_database():
-    """Initialize database tables"""
+    """Initialize database schema (Alembic migrations)"""
     if engine:
         try:
-            Base.metadata.create_all(bind=engine)
-            print("✅ Database táblák létrehozva")
+            run_migrations()
+            print("✅ Database séma naprakész (alembic head)")
             return True
         except Exception as e:
             print(f"❌ Database inicializálási hiba: {e}")
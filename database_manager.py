@@ -1,74 +1,341 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from database import Article, ExecutiveBriefing, ProcessingStatus, get_session, is_database_available
+from typing import Any, Callable, List, Dict, Optional, Tuple
+from database import Article, ExecutiveBriefing, ProcessingStatus, AnalysisTask, FeedCache, LLMCacheEntry, PG_SEARCH_VECTOR, get_session, is_database_available
+from sqlalchemy import text, and_, or_, func, tuple_, table, column
+from sqlalchemy.orm import undefer_group
+import base64
 import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+# Columns refreshed when an already stored article gets a new analysis
+ANALYSIS_COLUMNS = ('ai_analysis', 'importance_score', 'urgency', 'executive_summary', 'hungarian_title')
+# ... together with updated_at, the change marker other processes compare on
+UPSERT_COLUMNS = ANALYSIS_COLUMNS + ('updated_at',)
+
+# PostgreSQL: OR of the Hungarian, English and language-neutral parses of the user query
+PG_SEARCH_QUERY = (
+    "websearch_to_tsquery('hungarian'::regconfig, :q) || "
+    "websearch_to_tsquery('english'::regconfig, :q) || "
+    "websearch_to_tsquery('simple'::regconfig, :q)"
+)
+HEADLINE_OPTIONS = 'StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15'
+
+# SQLite FTS5 table (migration 0002) - joined for MATCH / bm25()
+articles_fts = table('articles_fts', column('rowid'))
+SQLITE_BM25 = 'bm25(articles_fts, 10.0, 10.0, 5.0, 5.0, 2.0)'
+
+# Read cache for the dashboard endpoints. Entries are dropped when this process
+# writes (data_version bump) or, in web-only processes, when the event relay
+# sees new rows; the TTL bounds staleness from any other writer.
+READ_CACHE_TTL = float(os.getenv('READ_CACHE_TTL', '60'))
+READ_CACHE_MAX_ENTRIES = int(os.getenv('READ_CACHE_MAX_ENTRIES', '256'))
+
+# Processing lease (processing_status row): a run whose heartbeat is older than
+# this is considered dead, and the next process may take over
+PROCESSING_LEASE_TTL = timedelta(seconds=int(os.getenv('PROCESSING_LEASE_TTL', '90')))
+# pg_advisory_xact_lock key serializing lease acquisition
+PROCESSING_LOCK_ID = 7263402
+# A refresh requested by a web-only process ('queued' processing_status row) is
+# dropped if no worker picks it up within this time
+PROCESSING_REQUEST_TTL = timedelta(seconds=int(os.getenv('PROCESSING_REQUEST_TTL', '3600')))
+
+# Analysis task queue (analysis_tasks): a claimed task belongs to its worker for
+# this long after the last heartbeat; then any worker may claim it again
+ANALYSIS_TASK_LEASE_TTL = timedelta(seconds=int(os.getenv('ANALYSIS_TASK_LEASE_TTL', '300')))
+# Attempts per task (a lapsed lease counts as one), and the first retry delay,
+# doubled after every further failure
+ANALYSIS_TASK_MAX_ATTEMPTS = int(os.getenv('ANALYSIS_TASK_MAX_ATTEMPTS', '3'))
+ANALYSIS_TASK_RETRY_DELAY = timedelta(seconds=int(os.getenv('ANALYSIS_TASK_RETRY_DELAY', '30')))
+ANALYSIS_TASK_STATUSES = ('pending', 'running', 'done', 'failed')
+
+# Keyset pagination order - matches the ix_articles_importance_pub_date index
+KEYSET_ORDER = (Article.importance_score.desc(), Article.pub_date.desc(), Article.id.desc())
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(importance_score: int, pub_date: Optional[datetime], article_id: int) -> str:
+    """Opaque cursor for the row after which the next page starts"""
+    payload = json.dumps([importance_score, pub_date.isoformat() if pub_date else None, article_id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[int, datetime, int]:
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        importance_score, pub_date, article_id = json.loads(base64.urlsafe_b64decode(padded))
+        return int(importance_score), datetime.fromisoformat(pub_date), int(article_id)
+    except Exception as e:
+        raise ValueError(f'Invalid cursor: {cursor!r}') from e
 
 class DatabaseManager:
     """Database operations manager"""
     
     def __init__(self):
         self.available = is_database_available()
+        self.data_version = 0
+        self._read_cache = OrderedDict()  # key -> (data_version, stored_at, JSON bytes)
+        self._read_cache_lock = threading.Lock()
+        self.read_cache_hits = 0
+        self.read_cache_misses = 0
+    
+    def _bump_data_version(self):
+        """Invalidate every cached read after a write to articles / briefings"""
+        with self._read_cache_lock:
+            self.data_version += 1
+            self._read_cache.clear()
+    
+    def invalidate_read_cache(self):
+        """Drop cached reads after a write made by another process"""
+        self._bump_data_version()
+    
+    def cached_json(self, key: Tuple, build: Callable[[], Any]) -> bytes:
+        """
+        Read-through cache of pre-serialized JSON. `build` runs (and queries the
+        database) only if there is no entry for `key` at the current data_version.
+        """
+        now = time.monotonic()
+        with self._read_cache_lock:
+            version = self.data_version
+            cached = self._read_cache.get(key)
+            if cached and cached[0] == version and now - cached[1] < READ_CACHE_TTL:
+                self._read_cache.move_to_end(key)
+                self.read_cache_hits += 1
+                return cached[2]
+            self.read_cache_misses += 1
+        
+        body = json.dumps(build(), ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+        with self._read_cache_lock:
+            # A write during build() already bumped the version - don't cache stale data
+            if version == self.data_version:
+                self._read_cache[key] = (version, now, body)
+                self._read_cache.move_to_end(key)
+                while len(self._read_cache) > READ_CACHE_MAX_ENTRIES:
+                    self._read_cache.popitem(last=False)
+        return body
+    
+    def read_cache_stats(self) -> Dict:
+        with self._read_cache_lock:
+            lookups = self.read_cache_hits + self.read_cache_misses
+            return {
+                'data_version': self.data_version,
+                'entries': len(self._read_cache),
+                'hits': self.read_cache_hits,
+                'misses': self.read_cache_misses,
+                'hit_rate': round(self.read_cache_hits / lookups, 3) if lookups else None
+            }
         
     def save_article(self, article_data: Dict, analysis: Optional[Dict] = None) -> bool:
         """Save article to database"""
+        return self.save_articles_bulk([(article_data, analysis)]) == 1
+    
+    @staticmethod
+    def _article_row(article_data: Dict, analysis: Optional[Dict]) -> Dict:
+        """Build an articles table row from pipeline article data and its analysis"""
+        now = datetime.utcnow()
+        row = {
+            'article_hash': article_data['id'],
+            'title': article_data.get('title', ''),
+            'original_title': article_data.get('original_title', ''),
+            'description': article_data.get('description', ''),
+            'original_description': article_data.get('original_description', ''),
+            'source': article_data.get('source', ''),
+            'category': article_data.get('category', ''),
+            'link': article_data.get('link', ''),
+            'pub_date': datetime.fromisoformat(article_data['pub_date'].replace('Z', '+00:00')) if article_data.get('pub_date') else datetime.utcnow(),
+            'created_at': now,
+            'updated_at': now,
+            'duplicate_of': article_data.get('duplicate_of')
+        }
+        # Analysis columns are left out entirely without an analysis, so they stay
+        # SQL NULL / column defaults (a JSON column would store None as 'null')
+        if analysis:
+            row.update({
+                'ai_analysis': analysis,
+                'importance_score': analysis.get('importance_score', 5),
+                'urgency': analysis.get('urgency', 'monitoring'),
+                'executive_summary': analysis.get('executive_summary', ''),
+                'hungarian_title': analysis.get('hungarian_title', '')
+            })
+        return row
+    
+    def save_articles_bulk(self, items: List[Tuple[Dict, Optional[Dict]]]) -> int:
+        """
+        Upsert many (article, analysis) pairs in one transaction.
+        New articles are inserted; existing ones (same article_hash) only get their
+        analysis columns updated, and only when an analysis is given.
+        """
+        if not self.available or not items:
+            return 0
+            
+        session = get_session()
+        if not session:
+            return 0
+            
+        try:
+            saved = self._upsert_articles(session, items)
+            session.commit()
+            self._bump_data_version()
+            return saved
+            
+        except Exception as e:
+            print(f"❌ Article bulk save error: {e}")
+            session.rollback()
+            return 0
+        finally:
+            session.close()
+    
+    def _upsert_articles(self, session, items: List[Tuple[Dict, Optional[Dict]]]) -> int:
+        """save_articles_bulk statements, in the caller's transaction"""
+        # Last occurrence wins if the same hash appears twice in one batch
+        rows_by_hash = {}
+        for article_data, analysis in items:
+            row = self._article_row(article_data, analysis)
+            rows_by_hash[row['article_hash']] = row
+        with_analysis = [row for row in rows_by_hash.values() if 'ai_analysis' in row]
+        without_analysis = [row for row in rows_by_hash.values() if 'ai_analysis' not in row]
+        
+        dialect = session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            insert = None
+        
+        if insert is None:
+            # Generic fallback: SELECT + INSERT/UPDATE per row, still in one transaction
+            for row in rows_by_hash.values():
+                existing = session.query(Article).filter_by(article_hash=row['article_hash']).first()
+                if not existing:
+                    session.add(Article(**row))
+                elif 'ai_analysis' in row:
+                    for column in UPSERT_COLUMNS:
+                        setattr(existing, column, row[column])
+        else:
+            if with_analysis:
+                stmt = insert(Article).values(with_analysis)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['article_hash'],
+                    # ON CONFLICT DO UPDATE skips Column.onupdate: updated_at is in the set list
+                    set_={column: stmt.excluded[column] for column in UPSERT_COLUMNS}
+                )
+                session.execute(stmt)
+            if without_analysis:
+                stmt = insert(Article).values(without_analysis)
+                session.execute(stmt.on_conflict_do_nothing(index_elements=['article_hash']))
+        return len(rows_by_hash)
+    
+    def get_latest_articles(self, limit: int = 20, full: bool = False) -> List[Dict]:
+        """Get latest articles ordered by importance and date (summary projection unless full=True)"""
         if not self.available:
-            return False
+            return []
             
         session = get_session()
         if not session:
-            return False
+            return []
             
         try:
-            # Check if article already exists
-            existing = session.query(Article).filter_by(
-                article_hash=article_data['id']
-            ).first()
+            query = session.query(Article).filter(Article.duplicate_of.is_(None))
+            if full:
+                query = query.options(undefer_group('detail'))
+            articles = query.order_by(*KEYSET_ORDER).limit(limit).all()
             
-            if existing:
-                # Update existing article with new analysis
-                if analysis:
-                    existing.ai_analysis = analysis
-                    existing.importance_score = analysis.get('importance_score', 5)
-                    existing.urgency = analysis.get('urgency', 'monitoring')
-                    existing.executive_summary = analysis.get('executive_summary', '')
-                    existing.hungarian_title = analysis.get('hungarian_title', '')
-                session.commit()
-                return True
-            
-            # Create new article
-            article = Article(
-                article_hash=article_data['id'],
-                title=article_data.get('title', ''),
-                original_title=article_data.get('original_title', ''),
-                description=article_data.get('description', ''),
-                original_description=article_data.get('original_description', ''),
-                source=article_data.get('source', ''),
-                category=article_data.get('category', ''),
-                link=article_data.get('link', ''),
-                pub_date=datetime.fromisoformat(article_data['pub_date'].replace('Z', '+00:00')) if article_data.get('pub_date') else datetime.utcnow()
-            )
+            if full:
+                return [article.to_dict() for article in articles]
+            return [article.to_summary_dict() for article in articles]
+            
+        except Exception as e:
+            print(f"❌ Get articles error: {e}")
+            return []
+        finally:
+            session.close()
+    
+    @staticmethod
+    def _filter_clauses(filters: Optional[Dict]) -> List:
+        """Canonical articles only, category / source / urgency equality and [date_from, date_to) pub_date range"""
+        filters = filters or {}
+        clauses = [Article.duplicate_of.is_(None)]
+        for name in ('category', 'source', 'urgency'):
+            if filters.get(name):
+                clauses.append(getattr(Article, name) == filters[name])
+        if filters.get('date_from'):
+            clauses.append(Article.pub_date >= filters['date_from'])
+        if filters.get('date_to'):
+            clauses.append(Article.pub_date < filters['date_to'])
+        return clauses
+    
+    @staticmethod
+    def _keyset_page(query, limit: int, cursor: Optional[str]) -> Tuple[List, Optional[str]]:
+        """
+        Next page of an Article query in index order. The cursor is compared as a row
+        value, so the database seeks straight to it - deep pages cost the same as page one.
+        """
+        if cursor:
+            importance_score, pub_date, article_id = decode_cursor(cursor)
+            query = query.filter(tuple_(Article.importance_score, Article.pub_date, Article.id) <
+                                 tuple_(importance_score, pub_date, article_id))
+        rows = query.order_by(*KEYSET_ORDER).limit(limit + 1).all()
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, encode_cursor(last.importance_score, last.pub_date, last.id)
+    
+    def get_articles_page(self, limit: int = 30, cursor: Optional[str] = None,
+                          filters: Optional[Dict] = None) -> Dict:
+        """Keyset-paginated articles ordered by importance and date, with optional filters"""
+        empty = {'articles': [], 'next_cursor': None}
+        if not self.available:
+            return empty
             
-            # Add AI analysis if available
-            if analysis:
-                article.ai_analysis = analysis
-                article.importance_score = analysis.get('importance_score', 5)
-                article.urgency = analysis.get('urgency', 'monitoring')
-                article.executive_summary = analysis.get('executive_summary', '')
-                article.hungarian_title = analysis.get('hungarian_title', '')
+        session = get_session()
+        if not session:
+            return empty
             
-            session.add(article)
-            session.commit()
-            return True
+        try:
+            query = session.query(Article).filter(*self._filter_clauses(filters))
+            articles, next_cursor = self._keyset_page(query, min(limit, MAX_PAGE_SIZE), cursor)
+            return {'articles': [article.to_summary_dict() for article in articles], 'next_cursor': next_cursor}
             
+        except ValueError:
+            raise
         except Exception as e:
-            print(f"❌ Article save error: {e}")
-            session.rollback()
-            return False
+            print(f"❌ Get articles page error: {e}")
+            return empty
+        finally:
+            session.close()
+    
+    def get_article(self, article_hash: str) -> Optional[Dict]:
+        """Get one article with its full AI analysis (detail view)"""
+        if not self.available:
+            return None
+            
+        session = get_session()
+        if not session:
+            return None
+            
+        try:
+            article = session.query(Article)\
+                .options(undefer_group('detail'))\
+                .filter(Article.article_hash == article_hash)\
+                .first()
+            return article.to_dict() if article else None
+            
+        except Exception as e:
+            print(f"❌ Get article error: {e}")
+            return None
         finally:
             session.close()
     
-    def get_latest_articles(self, limit: int = 20) -> List[Dict]:
-        """Get latest articles ordered by importance and date"""
+    def get_sectoral_overview(self, limit: int = 30) -> List[Dict]:
+        """
+        Sector fields of the top articles. The JSON paths are extracted by the
+        database, so the rest of the analysis blob never leaves it.
+        """
         if not self.available:
             return []
             
@@ -77,21 +344,170 @@ class DatabaseManager:
             return []
             
         try:
-            articles = session.query(Article)\
-                .order_by(Article.importance_score.desc(), Article.pub_date.desc())\
+            sectoral = Article.ai_analysis['sectoral_analysis']
+            rows = session.query(
+                    Article.hungarian_title, Article.title,
+                    sectoral['affected_sectors'].label('affected_sectors'),
+                    sectoral['employment_impact'].label('employment_impact'))\
+                .filter(Article.duplicate_of.is_(None))\
+                .order_by(*KEYSET_ORDER)\
                 .limit(limit)\
                 .all()
-            
-            return [article.to_dict() for article in articles]
+            return [{
+                'title': row.hungarian_title or row.title,
+                'affected_sectors': row.affected_sectors or [],
+                'employment_impact': row.employment_impact
+            } for row in rows]
             
         except Exception as e:
-            print(f"❌ Get articles error: {e}")
+            print(f"❌ Get sectoral overview error: {e}")
             return []
         finally:
             session.close()
     
-    def save_executive_briefing(self, content: str, article_count: int) -> bool:
-        """Save executive briefing"""
+    def get_analyses_by_hashes(self, article_hashes: List[str]) -> Dict[str, Dict]:
+        """Get existing AI analyses for the given article hashes (indexed lookup, analysis column only)"""
+        if not self.available or not article_hashes:
+            return {}
+            
+        session = get_session()
+        if not session:
+            return {}
+            
+        try:
+            analyses = {}
+            unique_hashes = list(set(article_hashes))
+            # Chunked IN (...) to stay below SQLite's bound parameter limit
+            for start in range(0, len(unique_hashes), 500):
+                rows = session.query(Article.article_hash, Article.ai_analysis)\
+                    .filter(Article.article_hash.in_(unique_hashes[start:start + 500]))\
+                    .filter(Article.ai_analysis.isnot(None))\
+                    .all()
+                analyses.update({row.article_hash: row.ai_analysis for row in rows if row.ai_analysis})
+            return analyses
+            
+        except Exception as e:
+            print(f"❌ Get analyses error: {e}")
+            return {}
+        finally:
+            session.close()
+    
+    def search_articles(self, query: str, limit: int = 20, offset: int = 0,
+                        filters: Optional[Dict] = None, cursor: Optional[str] = None,
+                        sort: str = 'relevance') -> Dict:
+        """
+        Full-text search with match highlighting (PostgreSQL tsvector / SQLite FTS5).
+        sort='relevance' ranks by match quality and pages with offset; sort='importance'
+        uses the same keyset order and cursors as get_articles_page.
+        """
+        empty = {'results': [], 'total': 0, 'next_cursor': None}
+        if not self.available:
+            return empty
+            
+        session = get_session()
+        if not session:
+            return empty
+            
+        try:
+            dialect = session.get_bind().dialect.name
+            search = self._search_query(session, dialect, query)
+            if search is None:
+                return empty
+            search, rank = search
+            search = search.filter(*self._filter_clauses(filters))
+            total = search.with_entities(Article.id).order_by(None).count()
+            
+            next_cursor = None
+            if sort == 'importance':
+                articles, next_cursor = self._keyset_page(search, min(limit, MAX_PAGE_SIZE), cursor)
+            else:
+                order = [rank] if rank is not None else []
+                articles = search.order_by(*order, *KEYSET_ORDER).limit(limit).offset(offset).all()
+            
+            highlights = self._search_highlights(session, dialect, query, [article.id for article in articles])
+            results = []
+            for article in articles:
+                result = article.to_summary_dict()
+                hit = highlights.get(article.id, {})
+                result['rank'] = hit.get('rank')
+                result['highlight'] = {'title': hit.get('title'), 'summary': hit.get('summary')}
+                results.append(result)
+            return {'results': results, 'total': total, 'next_cursor': next_cursor}
+            
+        except ValueError:
+            raise
+        except Exception as e:
+            print(f"❌ Search error: {e}")
+            return empty
+        finally:
+            session.close()
+    
+    @staticmethod
+    def _sqlite_match(query: str) -> Optional[str]:
+        # Every word must match (as a prefix); quoting keeps FTS5 operators out of user input
+        terms = re.findall(r'\w+', query.lower())
+        return ' '.join(f'"{term}"*' for term in terms) if terms else None
+    
+    def _search_query(self, session, dialect: str, query: str):
+        """Article query restricted to matches, plus a relevance ORDER BY clause (best first)"""
+        if dialect == 'postgresql':
+            search = session.query(Article)\
+                .filter(text(f"({PG_SEARCH_VECTOR}) @@ ({PG_SEARCH_QUERY})"))\
+                .params(q=query)
+            return search, text(f"ts_rank_cd({PG_SEARCH_VECTOR}, {PG_SEARCH_QUERY}) DESC")
+        if dialect == 'sqlite':
+            match = self._sqlite_match(query)
+            if match is None:
+                return None
+            search = session.query(Article)\
+                .join(articles_fts, articles_fts.c.rowid == Article.id)\
+                .filter(text("articles_fts MATCH :m"))\
+                .params(m=match)
+            # bm25: lower is better
+            return search, text(f"{SQLITE_BM25} ASC")
+        pattern = f'%{query}%'
+        search = session.query(Article).filter(or_(
+            Article.hungarian_title.ilike(pattern), Article.title.ilike(pattern),
+            Article.executive_summary.ilike(pattern), Article.source.ilike(pattern)
+        ))
+        return search, None
+    
+    def _search_highlights(self, session, dialect: str, query: str, ids: List[int]) -> Dict[int, Dict]:
+        """Rank and highlighted title/summary for one page of search results"""
+        if not ids:
+            return {}
+        id_list = ', '.join(str(int(article_id)) for article_id in ids)
+        if dialect == 'postgresql':
+            rows = session.execute(text(f"""
+                SELECT id,
+                       ts_rank_cd({PG_SEARCH_VECTOR}, sq.q) AS rank,
+                       ts_headline('hungarian', coalesce(hungarian_title, title), sq.q, :opts || ', HighlightAll=true') AS title_hl,
+                       ts_headline('hungarian', coalesce(executive_summary, ''), sq.q, :opts) AS summary_hl
+                FROM articles, (SELECT {PG_SEARCH_QUERY} AS q) AS sq
+                WHERE id IN ({id_list})
+            """), {'q': query, 'opts': HEADLINE_OPTIONS}).all()
+            return {row.id: {'rank': float(row.rank), 'title': row.title_hl, 'summary': row.summary_hl}
+                    for row in rows}
+        if dialect == 'sqlite':
+            rows = session.execute(text(f"""
+                SELECT rowid AS id,
+                       {SQLITE_BM25} AS rank,
+                       highlight(articles_fts, 0, '<mark>', '</mark>') AS hungarian_title_hl,
+                       highlight(articles_fts, 1, '<mark>', '</mark>') AS original_title_hl,
+                       snippet(articles_fts, 2, '<mark>', '</mark>', '…', 32) AS summary_hl
+                FROM articles_fts
+                WHERE articles_fts MATCH :m AND rowid IN ({id_list})
+            """), {'m': self._sqlite_match(query)}).all()
+            # bm25: lower is better - flip it so rank is "higher is better" on every backend
+            return {row.id: {'rank': -float(row.rank), 'title': row.hungarian_title_hl or row.original_title_hl,
+                             'summary': row.summary_hl}
+                    for row in rows}
+        return {}
+    
+    def save_executive_briefing(self, content: str, article_count: int,
+                                input_fingerprint: Optional[str] = None,
+                                input_items: Optional[List[str]] = None) -> bool:
+        """Save executive briefing (with the fingerprint of its input articles)"""
         if not self.available:
             return False
             
@@ -102,10 +518,13 @@ class DatabaseManager:
         try:
             briefing = ExecutiveBriefing(
                 content=content,
-                article_count=article_count
+                article_count=article_count,
+                input_fingerprint=input_fingerprint,
+                input_items=input_items
             )
             session.add(briefing)
             session.commit()
+            self._bump_data_version()
             return True
             
         except Exception as e:
@@ -143,33 +562,215 @@ class DatabaseManager:
         finally:
             session.close()
     
-    def start_processing(self) -> bool:
-        """Mark processing as started"""
+    def get_latest_briefing_inputs(self) -> Optional[Dict]:
+        """Input fingerprint and items of the latest briefing (None if unknown)"""
         if not self.available:
-            return False
+            return None
             
         session = get_session()
         if not session:
-            return False
+            return None
+            
+        try:
+            briefing = session.query(ExecutiveBriefing)\
+                .order_by(ExecutiveBriefing.created_at.desc())\
+                .first()
+            
+            if briefing and briefing.input_fingerprint:
+                return {
+                    'content': briefing.content,
+                    'input_fingerprint': briefing.input_fingerprint,
+                    'input_items': briefing.input_items or []
+                }
+            return None
+            
+        except Exception as e:
+            print(f"❌ Get briefing inputs error: {e}")
+            return None
+        finally:
+            session.close()
+    
+    @staticmethod
+    def _lock_processing(session, now: datetime, ttl: timedelta):
+        """
+        Serialize lease / request changes until commit and close dead leases and
+        unclaimed refresh requests as failed
+        """
+        if session.get_bind().dialect.name == 'postgresql':
+            # Serializes concurrent acquirers until commit
+            session.execute(text("SELECT pg_advisory_xact_lock(:id)"), {'id': PROCESSING_LOCK_ID})
+        # On SQLite this first write takes the database write lock, which
+        # serializes concurrent acquirers the same way
+        session.query(ProcessingStatus)\
+            .filter(ProcessingStatus.status == 'processing',
+                    func.coalesce(ProcessingStatus.heartbeat_at, ProcessingStatus.started_at) < now - ttl)\
+            .update({
+                'status': 'failed',
+                'completed_at': now,
+                'error_message': 'Lease expired (owner stopped sending heartbeats)'
+            }, synchronize_session=False)
+        session.query(ProcessingStatus)\
+            .filter(ProcessingStatus.status == 'queued',
+                    ProcessingStatus.started_at < now - PROCESSING_REQUEST_TTL)\
+            .update({
+                'status': 'failed',
+                'completed_at': now,
+                'error_message': 'Refresh request expired (no worker picked it up)'
+            }, synchronize_session=False)
+    
+    def acquire_processing_lease(self, job_id: str, kind: str, owner: str,
+                                 ttl: timedelta = PROCESSING_LEASE_TTL) -> Optional[int]:
+        """
+        Take the cross-process processing lease by inserting a 'processing' row,
+        unless another process holds a live one. Leases whose heartbeat is older
+        than `ttl` are closed as failed first. Returns the row id, or None.
+        """
+        if not self.available:
+            return None
+            
+        session = get_session()
+        if not session:
+            return None
             
         try:
+            now = datetime.utcnow()
+            self._lock_processing(session, now, ttl)
+            
+            held = session.query(ProcessingStatus.id).filter_by(status='processing').first()
+            if held:
+                session.commit()
+                return None
+            
             status = ProcessingStatus(
                 status='processing',
-                started_at=datetime.utcnow()
+                started_at=now,
+                heartbeat_at=now,
+                job_id=job_id,
+                kind=kind,
+                owner=owner,
+                progress={}
             )
             session.add(status)
             session.commit()
+            return status.id
+            
+        except Exception as e:
+            print(f"❌ Acquire processing lease error: {e}")
+            session.rollback()
+            return None
+        finally:
+            session.close()
+    
+    def request_processing(self, job_id: str, kind: str, ttl: timedelta = PROCESSING_LEASE_TTL) -> bool:
+        """
+        Record a refresh request for the worker process (web-only role): a 'queued'
+        row that claim_processing_request turns into the lease. False if a run is
+        already live or a request is already waiting.
+        """
+        if not self.available:
+            return False
+            
+        session = get_session()
+        if not session:
+            return False
+            
+        try:
+            now = datetime.utcnow()
+            self._lock_processing(session, now, ttl)
+            
+            busy = session.query(ProcessingStatus.id)\
+                .filter(ProcessingStatus.status.in_(('processing', 'queued')))\
+                .first()
+            if busy:
+                session.commit()
+                return False
+            
+            session.add(ProcessingStatus(
+                status='queued',
+                started_at=now,
+                job_id=job_id,
+                kind=kind,
+                progress={}
+            ))
+            session.commit()
             return True
             
         except Exception as e:
-            print(f"❌ Start processing error: {e}")
+            print(f"❌ Request processing error: {e}")
+            session.rollback()
+            return False
+        finally:
+            session.close()
+    
+    def claim_processing_request(self, owner: str, ttl: timedelta = PROCESSING_LEASE_TTL) -> Optional[Dict]:
+        """
+        Turn the oldest waiting refresh request into the processing lease, unless
+        a live run holds it. Returns {'id', 'job_id', 'kind'} or None.
+        """
+        if not self.available:
+            return None
+            
+        session = get_session()
+        if not session:
+            return None
+            
+        try:
+            now = datetime.utcnow()
+            self._lock_processing(session, now, ttl)
+            
+            held = session.query(ProcessingStatus.id).filter_by(status='processing').first()
+            request = None if held else session.query(ProcessingStatus)\
+                .filter_by(status='queued')\
+                .order_by(ProcessingStatus.started_at)\
+                .first()
+            if request is None:
+                session.commit()
+                return None
+            
+            request.status = 'processing'
+            request.owner = owner
+            request.started_at = now
+            request.heartbeat_at = now
+            claimed = {'id': request.id, 'job_id': request.job_id, 'kind': request.kind}
+            session.commit()
+            return claimed
+            
+        except Exception as e:
+            print(f"❌ Claim processing request error: {e}")
+            session.rollback()
+            return None
+        finally:
+            session.close()
+    
+    def heartbeat_processing(self, status_id: int, progress: Optional[Dict] = None) -> bool:
+        """Renew a held lease (and publish progress); False if it expired meanwhile"""
+        if not self.available:
+            return False
+            
+        session = get_session()
+        if not session:
+            return False
+            
+        try:
+            values = {'heartbeat_at': datetime.utcnow()}
+            if progress is not None:
+                values['progress'] = progress
+            renewed = session.query(ProcessingStatus)\
+                .filter_by(id=status_id, status='processing')\
+                .update(values, synchronize_session=False)
+            session.commit()
+            return renewed == 1
+            
+        except Exception as e:
+            print(f"❌ Processing heartbeat error: {e}")
             session.rollback()
             return False
         finally:
             session.close()
     
-    def complete_processing(self, articles_processed: int) -> bool:
-        """Mark processing as completed"""
+    def finish_processing(self, status_id: int, status: str, articles_processed: int = 0,
+                          error_message: Optional[str] = None, progress: Optional[Dict] = None) -> bool:
+        """Release the lease: mark the run 'completed' or 'failed'"""
         if not self.available:
             return False
             
@@ -178,27 +779,613 @@ class DatabaseManager:
             return False
             
         try:
-            # Get latest processing status
+            values = {
+                'status': status,
+                'completed_at': datetime.utcnow(),
+                'articles_processed': articles_processed,
+                'error_message': error_message
+            }
+            if progress is not None:
+                values['progress'] = progress
+            session.query(ProcessingStatus).filter_by(id=status_id).update(values, synchronize_session=False)
+            session.commit()
+            return True
+            
+        except Exception as e:
+            print(f"❌ Finish processing error: {e}")
+            session.rollback()
+            return False
+        finally:
+            session.close()
+    
+    @staticmethod
+    def _processing_job_dict(status: ProcessingStatus, include_draft: bool = False) -> Dict:
+        """processing_status row in the shape of jobs.Job.to_dict()"""
+        progress = dict(status.progress or {})
+        stage = progress.pop('stage', None)
+        draft = progress.pop('briefing_draft', '')
+        job = {
+            'id': status.job_id,
+            'kind': status.kind,
+            'status': 'running' if status.status == 'processing' else status.status,
+            'stage': stage,
+            'progress': progress,
+            'error': status.error_message,
+            'created_at': status.started_at.isoformat() if status.started_at else None,
+            'started_at': status.started_at.isoformat() if status.started_at else None,
+            'finished_at': status.completed_at.isoformat() if status.completed_at else None,
+            'owner': status.owner
+        }
+        if include_draft:
+            job['briefing_draft'] = draft
+        return job
+    
+    def get_processing_job(self, job_id: Optional[str] = None, include_draft: bool = False) -> Optional[Dict]:
+        """
+        A run by job id (any process), or the latest run when job_id is None.
+        include_draft adds the partial briefing text of a streaming run.
+        """
+        if not self.available:
+            return None
+            
+        session = get_session()
+        if not session:
+            return None
+            
+        try:
+            query = session.query(ProcessingStatus)
+            if job_id is not None:
+                query = query.filter_by(job_id=job_id)
+            status = query.order_by(ProcessingStatus.started_at.desc()).first()
+            return self._processing_job_dict(status, include_draft) if status and status.job_id else None
+            
+        except Exception as e:
+            print(f"❌ Get processing job error: {e}")
+            return None
+        finally:
+            session.close()
+    
+    def get_active_processing(self, ttl: timedelta = PROCESSING_LEASE_TTL) -> Optional[Dict]:
+        """The run currently holding a live lease, or a refresh request waiting for the worker"""
+        if not self.available:
+            return None
+            
+        session = get_session()
+        if not session:
+            return None
+            
+        try:
+            now = datetime.utcnow()
             status = session.query(ProcessingStatus)\
-                .filter_by(status='processing')\
+                .filter(or_(
+                    and_(ProcessingStatus.status == 'processing', ProcessingStatus.heartbeat_at >= now - ttl),
+                    and_(ProcessingStatus.status == 'queued', ProcessingStatus.started_at >= now - PROCESSING_REQUEST_TTL)
+                ))\
+                .order_by(ProcessingStatus.started_at.desc())\
+                .first()
+            return self._processing_job_dict(status) if status else None
+            
+        except Exception as e:
+            print(f"❌ Get active processing error: {e}")
+            return None
+        finally:
+            session.close()
+    
+    def get_change_markers(self) -> Optional[Dict]:
+        """
+        Latest article / briefing modification times - cheap (index-only) change
+        detection that also sees rows updated in place (re-analysis)
+        """
+        if not self.available:
+            return None
+            
+        session = get_session()
+        if not session:
+            return None
+            
+        try:
+            return {
+                'article_updated_at': session.query(func.max(Article.updated_at)).scalar(),
+                'briefing_updated_at': session.query(func.max(ExecutiveBriefing.updated_at)).scalar()
+            }
+            
+        except Exception as e:
+            print(f"❌ Get change markers error: {e}")
+            return None
+        finally:
+            session.close()
+    
+    def get_analyzed_articles_since(self, since: datetime, limit: int = 100) -> List[Dict]:
+        """Analyzed canonical articles stored or updated after `since` (list view projection, oldest first)"""
+        if not self.available:
+            return []
+            
+        session = get_session()
+        if not session:
+            return []
+            
+        try:
+            articles = session.query(Article)\
+                .filter(Article.updated_at > since, Article.executive_summary.isnot(None),
+                        Article.duplicate_of.is_(None))\
+                .order_by(Article.updated_at)\
+                .limit(limit)\
+                .all()
+            return [article.to_summary_dict() for article in articles]
+            
+        except Exception as e:
+            print(f"❌ Get new articles error: {e}")
+            return []
+        finally:
+            session.close()
+    
+    def enqueue_analysis_tasks(self, articles: List[Dict], job_id: Optional[str] = None) -> int:
+        """
+        Queue one analysis task per article for the run `job_id`. New hashes are
+        inserted as 'pending'; closed tasks ('done' / 'failed') are reopened with a
+        fresh attempt budget; queued and running tasks are adopted by this run
+        (running ones stay with their worker). Returns the number of tasks.
+        """
+        if not self.available or not articles:
+            return 0
+            
+        session = get_session()
+        if not session:
+            return 0
+            
+        try:
+            now = datetime.utcnow()
+            by_hash = {article['id']: article for article in articles}
+            existing = {
+                task.article_hash: task
+                for task in session.query(AnalysisTask).filter(AnalysisTask.article_hash.in_(list(by_hash)))
+            }
+            for article_hash, article in by_hash.items():
+                task = existing.get(article_hash)
+                if task is None:
+                    session.add(AnalysisTask(
+                        article_hash=article_hash,
+                        payload=article,
+                        status='pending',
+                        job_id=job_id,
+                        attempts=0,
+                        available_at=now,
+                        created_at=now,
+                        updated_at=now
+                    ))
+                    continue
+                task.job_id = job_id
+                task.updated_at = now
+                if task.status in ('done', 'failed'):
+                    task.status = 'pending'
+                    task.payload = article
+                    task.attempts = 0
+                    task.available_at = now
+                    task.owner = None
+                    task.lease_expires_at = None
+                    task.error_message = None
+            session.commit()
+            return len(by_hash)
+            
+        except Exception as e:
+            print(f"❌ Enqueue analysis tasks error: {e}")
+            session.rollback()
+            return 0
+        finally:
+            session.close()
+    
+    def claim_analysis_tasks(self, owner: str, limit: int,
+                             ttl: timedelta = ANALYSIS_TASK_LEASE_TTL) -> List[Dict]:
+        """
+        Claim up to `limit` due tasks for `owner`: pending ones whose retry time
+        has come, and running ones whose lease lapsed (crashed worker). On
+        PostgreSQL, rows locked by concurrent claimers are skipped (FOR UPDATE
+        SKIP LOCKED), so workers never wait for or double-claim each other's tasks.
+        """
+        if not self.available or limit <= 0:
+            return []
+            
+        session = get_session()
+        if not session:
+            return []
+            
+        try:
+            now = datetime.utcnow()
+            # Lapsed tasks without attempts left are closed. On SQLite this first
+            # write also takes the database write lock, serializing claimers.
+            session.query(AnalysisTask)\
+                .filter(AnalysisTask.status == 'running',
+                        AnalysisTask.lease_expires_at < now,
+                        AnalysisTask.attempts >= ANALYSIS_TASK_MAX_ATTEMPTS)\
+                .update({
+                    'status': 'failed',
+                    'owner': None,
+                    'updated_at': now,
+                    'error_message': 'Lease expired (worker stopped sending heartbeats)'
+                }, synchronize_session=False)
+            
+            query = session.query(AnalysisTask)\
+                .filter(or_(
+                    and_(AnalysisTask.status == 'pending', AnalysisTask.available_at <= now),
+                    and_(AnalysisTask.status == 'running', AnalysisTask.lease_expires_at < now)
+                ))\
+                .order_by(AnalysisTask.id)\
+                .limit(limit)
+            if session.get_bind().dialect.name == 'postgresql':
+                query = query.with_for_update(skip_locked=True)
+            
+            claimed = []
+            for task in query.all():
+                task.status = 'running'
+                task.owner = owner
+                task.attempts += 1
+                task.lease_expires_at = now + ttl
+                task.updated_at = now
+                claimed.append({
+                    'id': task.id,
+                    'article_hash': task.article_hash,
+                    'payload': task.payload,
+                    'attempts': task.attempts,
+                    'job_id': task.job_id
+                })
+            session.commit()
+            return claimed
+            
+        except Exception as e:
+            print(f"❌ Claim analysis tasks error: {e}")
+            session.rollback()
+            return []
+        finally:
+            session.close()
+    
+    def heartbeat_analysis_tasks(self, task_ids: List[int], owner: str,
+                                 ttl: timedelta = ANALYSIS_TASK_LEASE_TTL) -> int:
+        """Extend the leases `owner` still holds; returns how many were renewed"""
+        if not self.available or not task_ids:
+            return 0
+            
+        session = get_session()
+        if not session:
+            return 0
+            
+        try:
+            renewed = session.query(AnalysisTask)\
+                .filter(AnalysisTask.id.in_(task_ids),
+                        AnalysisTask.owner == owner,
+                        AnalysisTask.status == 'running')\
+                .update({'lease_expires_at': datetime.utcnow() + ttl}, synchronize_session=False)
+            session.commit()
+            return renewed
+            
+        except Exception as e:
+            print(f"❌ Analysis task heartbeat error: {e}")
+            session.rollback()
+            return 0
+        finally:
+            session.close()
+    
+    def finish_analysis_tasks(self, owner: str, done: List[Tuple[Dict, Dict, Dict]],
+                              failed: List[Tuple[Dict, Dict, str]]) -> bool:
+        """
+        Store the analysed articles and close their tasks in one transaction.
+        `done` holds (task, article, analysis), `failed` holds (task, article, error).
+        Failed tasks go back to 'pending' with an exponential retry delay; after the
+        last attempt they are closed as 'failed' and the article is stored without
+        analysis (like a failed in-process analysis).
+        """
+        if not self.available or not (done or failed):
+            return False
+            
+        session = get_session()
+        if not session:
+            return False
+            
+        try:
+            now = datetime.utcnow()
+            final = [(task, article, error) for task, article, error in failed
+                     if task['attempts'] >= ANALYSIS_TASK_MAX_ATTEMPTS]
+            rows = [(article, analysis) for _, article, analysis in done] + \
+                   [(article, None) for _, article, _ in final]
+            if rows:
+                self._upsert_articles(session, rows)
+            
+            if done:
+                session.query(AnalysisTask)\
+                    .filter(AnalysisTask.id.in_([task['id'] for task, _, _ in done]))\
+                    .update({
+                        'status': 'done',
+                        'owner': None,
+                        'lease_expires_at': None,
+                        'error_message': None,
+                        'updated_at': now
+                    }, synchronize_session=False)
+            for task, _, error in failed:
+                values = {'owner': None, 'lease_expires_at': None, 'error_message': error, 'updated_at': now}
+                if task['attempts'] >= ANALYSIS_TASK_MAX_ATTEMPTS:
+                    values['status'] = 'failed'
+                else:
+                    values['status'] = 'pending'
+                    values['available_at'] = now + ANALYSIS_TASK_RETRY_DELAY * (2 ** (task['attempts'] - 1))
+                # A task whose lease lapsed may already belong to another worker
+                session.query(AnalysisTask)\
+                    .filter_by(id=task['id'], owner=owner, status='running')\
+                    .update(values, synchronize_session=False)
+            
+            session.commit()
+            if rows:
+                self._bump_data_version()
+            return True
+            
+        except Exception as e:
+            print(f"❌ Finish analysis tasks error: {e}")
+            session.rollback()
+            return False
+        finally:
+            session.close()
+    
+    def get_analysis_task_counts(self, job_id: Optional[str] = None) -> Optional[Dict[str, int]]:
+        """Task counts by status (of one run, or the whole queue); None on error"""
+        if not self.available:
+            return None
+            
+        session = get_session()
+        if not session:
+            return None
+            
+        try:
+            query = session.query(AnalysisTask.status, func.count(AnalysisTask.id))
+            if job_id is not None:
+                query = query.filter(AnalysisTask.job_id == job_id)
+            counts = dict.fromkeys(ANALYSIS_TASK_STATUSES, 0)
+            counts.update(query.group_by(AnalysisTask.status).all())
+            return counts
+            
+        except Exception as e:
+            print(f"❌ Analysis task count error: {e}")
+            return None
+        finally:
+            session.close()
+    
+    def ping(self) -> bool:
+        """Cheapest possible round trip (SELECT 1) for health checks"""
+        if not self.available:
+            return False
+            
+        session = get_session()
+        if not session:
+            return False
+            
+        try:
+            session.execute(text("SELECT 1"))
+            return True
+            
+        except Exception as e:
+            print(f"❌ Database ping error: {e}")
+            return False
+        finally:
+            session.close()
+    
+    def get_stats(self) -> Optional[Dict]:
+        """Aggregate statistics: counts by source / category, last processing run, database size"""
+        if not self.available:
+            return None
+            
+        session = get_session()
+        if not session:
+            return None
+            
+        try:
+            article_count, analyzed_count, oldest, newest = session.query(
+                func.count(Article.id),
+                func.count(Article.executive_summary),
+                func.min(Article.pub_date),
+                func.max(Article.pub_date)
+            ).one()
+            by_source = dict(session.query(Article.source, func.count(Article.id))
+                             .group_by(Article.source).all())
+            by_category = dict(session.query(Article.category, func.count(Article.id))
+                               .group_by(Article.category).all())
+            briefing_count = session.query(func.count(ExecutiveBriefing.id)).scalar()
+            
+            last_run = session.query(ProcessingStatus)\
                 .order_by(ProcessingStatus.started_at.desc())\
                 .first()
+            last_processing = None
+            if last_run:
+                duration = None
+                if last_run.started_at and last_run.completed_at:
+                    duration = round((last_run.completed_at - last_run.started_at).total_seconds(), 1)
+                last_processing = {
+                    'status': last_run.status,
+                    'started_at': last_run.started_at.isoformat() if last_run.started_at else None,
+                    'completed_at': last_run.completed_at.isoformat() if last_run.completed_at else None,
+                    'duration_seconds': duration,
+                    'articles_processed': last_run.articles_processed,
+                    'error_message': last_run.error_message
+                }
+            
+            return {
+                'article_count': article_count,
+                'analyzed_count': analyzed_count,
+                'oldest_article': oldest.isoformat() if oldest else None,
+                'newest_article': newest.isoformat() if newest else None,
+                'by_source': by_source,
+                'by_category': {category or 'N/A': count for category, count in by_category.items()},
+                'briefing_count': briefing_count,
+                'last_processing': last_processing,
+                'database_size_bytes': self._database_size(session)
+            }
+            
+        except Exception as e:
+            print(f"❌ Get stats error: {e}")
+            return None
+        finally:
+            session.close()
+    
+    @staticmethod
+    def _database_size(session) -> Optional[int]:
+        dialect = session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            return session.execute(text("SELECT pg_database_size(current_database())")).scalar()
+        if dialect == 'sqlite':
+            page_count = session.execute(text("PRAGMA page_count")).scalar()
+            page_size = session.execute(text("PRAGMA page_size")).scalar()
+            return page_count * page_size
+        return None
+    
+    def get_feed_cache(self, source_url: str) -> Optional[Dict]:
+        """Get cached feed state (validators + parsed entries) for a source"""
+        if not self.available:
+            return None
+            
+        session = get_session()
+        if not session:
+            return None
+            
+        try:
+            cached = session.query(FeedCache).filter_by(source_url=source_url).first()
+            if cached:
+                return {
+                    'etag': cached.etag,
+                    'last_modified': cached.last_modified,
+                    'entries': cached.entries or [],
+                    'fetched_at': cached.fetched_at.isoformat() if cached.fetched_at else None,
+                    'checked_at': cached.checked_at.isoformat() if cached.checked_at else None
+                }
+            return None
+            
+        except Exception as e:
+            print(f"❌ Get feed cache error: {e}")
+            return None
+        finally:
+            session.close()
+    
+    def save_feed_cache(self, source_url: str, etag: Optional[str], last_modified: Optional[str],
+                        entries: List[Dict], fetched_at: datetime, checked_at: datetime) -> bool:
+        """Save cached feed state for a source"""
+        if not self.available:
+            return False
+            
+        session = get_session()
+        if not session:
+            return False
+            
+        try:
+            cached = session.query(FeedCache).filter_by(source_url=source_url).first()
+            if not cached:
+                cached = FeedCache(source_url=source_url)
+                session.add(cached)
+            cached.etag = etag
+            cached.last_modified = last_modified
+            cached.entries = entries
+            cached.fetched_at = fetched_at
+            cached.checked_at = checked_at
+            session.commit()
+            return True
+            
+        except Exception as e:
+            print(f"❌ Feed cache save error: {e}")
+            session.rollback()
+            return False
+        finally:
+            session.close()
+    
+    def get_llm_cache(self, cache_key: str, max_age: timedelta) -> Optional[str]:
+        """Get a cached LLM response (None if missing or expired)"""
+        if not self.available:
+            return None
             
-            if status:
-                status.status = 'completed'
-                status.completed_at = datetime.utcnow()
-                status.articles_processed = articles_processed
+        session = get_session()
+        if not session:
+            return None
+            
+        try:
+            entry = session.query(LLMCacheEntry).filter_by(cache_key=cache_key).first()
+            if not entry:
+                return None
+            
+            now = datetime.utcnow()
+            if entry.created_at and now - entry.created_at > max_age:
+                session.delete(entry)
                 session.commit()
+                return None
+            
+            entry.last_accessed_at = now
+            entry.hit_count = (entry.hit_count or 0) + 1
+            session.commit()
+            return entry.response
+            
+        except Exception as e:
+            print(f"❌ Get LLM cache error: {e}")
+            session.rollback()
+            return None
+        finally:
+            session.close()
+    
+    def save_llm_cache(self, cache_key: str, model: str, template_version: str, response: str) -> bool:
+        """Save an LLM response to the cache"""
+        if not self.available:
+            return False
+            
+        session = get_session()
+        if not session:
+            return False
             
+        try:
+            now = datetime.utcnow()
+            entry = session.query(LLMCacheEntry).filter_by(cache_key=cache_key).first()
+            if not entry:
+                entry = LLMCacheEntry(cache_key=cache_key, hit_count=0)
+                session.add(entry)
+            entry.model = model
+            entry.template_version = template_version
+            entry.response = response
+            entry.created_at = now
+            entry.last_accessed_at = now
+            session.commit()
             return True
             
         except Exception as e:
-            print(f"❌ Complete processing error: {e}")
+            print(f"❌ LLM cache save error: {e}")
             session.rollback()
             return False
         finally:
             session.close()
     
+    def evict_llm_cache(self, max_entries: int, max_age: timedelta) -> int:
+        """Drop expired LLM cache entries, then the least recently used ones above max_entries"""
+        if not self.available:
+            return 0
+            
+        session = get_session()
+        if not session:
+            return 0
+            
+        try:
+            cutoff_date = datetime.utcnow() - max_age
+            deleted = session.query(LLMCacheEntry)\
+                .filter(LLMCacheEntry.created_at < cutoff_date)\
+                .delete(synchronize_session=False)
+            
+            overflow = session.query(LLMCacheEntry).count() - max_entries
+            if overflow > 0:
+                oldest_ids = [row.id for row in session.query(LLMCacheEntry.id)
+                              .order_by(LLMCacheEntry.last_accessed_at.asc())
+                              .limit(overflow)]
+                deleted += session.query(LLMCacheEntry)\
+                    .filter(LLMCacheEntry.id.in_(oldest_ids))\
+                    .delete(synchronize_session=False)
+            
+            session.commit()
+            return deleted
+            
+        except Exception as e:
+            print(f"❌ LLM cache eviction error: {e}")
+            session.rollback()
+            return 0
+        finally:
+            session.close()
+    
     def cleanup_old_articles(self, days: int = 30) -> int:
         """Clean up old articles"""
         if not self.available:
@@ -213,7 +1400,13 @@ class DatabaseManager:
             deleted = session.query(Article)\
                 .filter(Article.created_at < cutoff_date)\
                 .delete()
+            # Closed queue tasks are only kept for the same period
+            session.query(AnalysisTask)\
+                .filter(AnalysisTask.status.in_(('done', 'failed')), AnalysisTask.updated_at < cutoff_date)\
+                .delete(synchronize_session=False)
             session.commit()
+            if deleted:
+                self._bump_data_version()
             
             print(f"✅ Törölve {deleted} régi cikk ({days} napnál régebbi)")
             return deleted
@@ -0,0 +1,161 @@
+import os
+import re
+import hashlib
+from typing import List, Dict, Optional, Set, Tuple
+
+# SimHash előszűrés max. Hamming-távolsága (64 bites ujjlenyomatnál). Szigorú:
+# egy téves összevonás egy önálló hírt rejt el az elemzés elől
+SIMHASH_MAX_DISTANCE = int(os.getenv('SIMHASH_MAX_DISTANCE', '3'))
+# Megerősítés: ennyi Jaccard-hasonlóság kell a címszavakon / a teljes szövegen
+TITLE_JACCARD_THRESHOLD = float(os.getenv('TITLE_JACCARD_THRESHOLD', '0.8'))
+TEXT_JACCARD_THRESHOLD = float(os.getenv('TEXT_JACCARD_THRESHOLD', '0.8'))
+
+STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'at', 'by', 'with',
+    'from', 'as', 'is', 'are', 'was', 'were', 'be', 'its', 'it', 'that', 'this',
+    'after', 'over', 'into', 'amid', 'says', 'said', 'new'
+}
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_TOKEN_RE = re.compile(r'[a-z0-9]+(?:[.,][0-9]+)?')
+_WORD_RE = re.compile(r'[A-Za-z0-9]+(?:[.,][0-9]+)?')
+
+
+def tokenize(text: str) -> List[str]:
+    """Kisbetűs szavak HTML, írásjelek és töltelékszavak nélkül"""
+    text = _TAG_RE.sub(' ', text or '').lower()
+    return [t for t in _TOKEN_RE.findall(text) if t not in STOPWORDS and len(t) > 1]
+
+
+def key_tokens(title: str) -> Set[str]:
+    """A cím nevei és számai (nagybetűs szavak, számot tartalmazó tokenek), kisbetűsen"""
+    title = _TAG_RE.sub(' ', title or '')
+    keys = set()
+    for word in _WORD_RE.findall(title):
+        token = word.lower()
+        if token in STOPWORDS or len(token) < 2:
+            continue
+        if word[0].isupper() or any(char.isdigit() for char in word):
+            keys.add(token)
+    return keys
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash(weighted_features: Dict[str, int]) -> int:
+    """64 bites SimHash súlyozott jellemzőkből"""
+    vector = [0] * 64
+    for feature, weight in weighted_features.items():
+        h = _feature_hash(feature)
+        for bit in range(64):
+            vector[bit] += weight if (h >> bit) & 1 else -weight
+    return sum(1 << bit for bit in range(64) if vector[bit] > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class StoryFingerprint:
+    """Egy cikk ujjlenyomata: SimHash + token halmazok a megerősítéshez"""
+
+    def __init__(self, title: str, description: str):
+        title_tokens = tokenize(title)
+        text_tokens = title_tokens + tokenize(description)
+        self.title_tokens = set(title_tokens)
+        self.text_tokens = set(text_tokens)
+        self.key_tokens = key_tokens(title)
+
+        # A cím szavai és szópárjai nagyobb súllyal számítanak, mint a leírásé
+        features = {}
+        for token in text_tokens:
+            features[token] = features.get(token, 0) + 1
+        for token in title_tokens:
+            features[token] = features.get(token, 0) + 2
+        for first, second in zip(title_tokens, title_tokens[1:]):
+            features[f'{first} {second}'] = features.get(f'{first} {second}', 0) + 2
+        self.hash = simhash(features)
+
+    def conflicts(self, other: 'StoryFingerprint') -> bool:
+        """
+        Eltérő szereplő vagy szám ("Fed" / "ECB", "25" / "50 basis points"): mindkét
+        cím tartalmaz olyan nevet / számot, ami a másik cikkben sehol sem szerepel.
+        Ha csak az egyik részletesebb, az nem ütközés.
+        """
+        return bool(self.key_tokens - other.text_tokens) and bool(other.key_tokens - self.text_tokens)
+
+    def matches(self, other: 'StoryFingerprint') -> bool:
+        if hamming_distance(self.hash, other.hash) > SIMHASH_MAX_DISTANCE:
+            return False
+        if self.conflicts(other):
+            return False
+        return (jaccard(self.title_tokens, other.title_tokens) >= TITLE_JACCARD_THRESHOLD or
+                jaccard(self.text_tokens, other.text_tokens) >= TEXT_JACCARD_THRESHOLD)
+
+
+class NearDuplicateIndex:
+    """
+    Közel azonos hírek indexe. Egy ciklus néhány tucat cikkénél a lineáris
+    keresés SimHash előszűréssel bőven elég gyors.
+    """
+
+    def __init__(self):
+        self._stories: List[Tuple[StoryFingerprint, Dict]] = []
+
+    def find(self, fingerprint: StoryFingerprint) -> Optional[Dict]:
+        for candidate, article in self._stories:
+            if candidate.matches(fingerprint):
+                return article
+        return None
+
+    def add(self, fingerprint: StoryFingerprint, article: Dict):
+        self._stories.append((fingerprint, article))
+
+
+def group_near_duplicates(articles: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Ugyanannak a hírnek a különböző forrásokból érkező példányait egyetlen
+    kanonikus cikk alá vonja össze. A kanonikus példány az elsőként érkezett
+    (a források prioritási sorrendje szerint), így az AI elemzés történetenként
+    csak egyszer fut. A többi példány a 'related_sources' listába kerül, és
+    'duplicate_of' jelöléssel (a kanonikus cikk azonosítója) külön is visszaadjuk,
+    hogy saját sorként, a kanonikus cikkhez kötve tárolódjon.
+    Visszatérés: (kanonikus cikkek, összevont példányok)
+    """
+    index = NearDuplicateIndex()
+    canonical_articles = []
+    duplicates = []
+
+    for article in articles:
+        fingerprint = StoryFingerprint(
+            article.get('original_title', article.get('title', '')),
+            article.get('original_description', article.get('description', ''))
+        )
+        canonical = index.find(fingerprint)
+        if canonical is None:
+            index.add(fingerprint, article)
+            canonical_articles.append(article)
+            continue
+
+        if canonical['source'] == article['source'] and canonical['link'] == article['link']:
+            continue
+        canonical.setdefault('related_sources', []).append({
+            'id': article['id'],
+            'source': article['source'],
+            'title': article.get('original_title', article.get('title')),
+            'link': article.get('link', '')
+        })
+        article['duplicate_of'] = canonical['id']
+        duplicates.append(article)
+
+    if duplicates:
+        print(f"🔁 {len(duplicates)} közel azonos cikk összevonva ({len(canonical_articles)} egyedi történet)")
+    return canonical_articles, duplicates
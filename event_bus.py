@@ -0,0 +1,151 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, Optional
+
+# Egy SSE kapcsolat legfeljebb ennyi ideig él, utána a böngésző (Last-Event-ID-val)
+# újracsatlakozik - így a proxyk sem vágják el, és a szálak sem ragadnak be
+SSE_MAX_STREAM_SECONDS = float(os.getenv('SSE_MAX_STREAM_SECONDS', '300'))
+SSE_HEARTBEAT_SECONDS = 15
+SSE_RETRY_MS = 3000
+
+# Ennyi legutóbbi eseményt tartunk meg az újracsatlakozó klienseknek
+EVENT_HISTORY_SIZE = 200
+# Lassú kliens sora legfeljebb ekkora lehet, utána lecsatlakoztatjuk
+SUBSCRIBER_QUEUE_SIZE = 500
+# Egy nyitott SSE kapcsolat végig foglal egy gunicorn (gthread) szálat: folyamatonként
+# legfeljebb ennyi lehet, hogy a többi szál a normál API kéréseknek maradjon
+SSE_MAX_CONNECTIONS = int(os.getenv('SSE_MAX_CONNECTIONS', '16'))
+
+
+class EventBus:
+    """
+    Folyamaton belüli publish/subscribe a Server-Sent Events végponthoz.
+    A feldolgozás eseményeit (új elemzett cikk, állapotváltás, kész vezetői
+    összefoglaló) minden nyitott fülnek továbbítja, így a kliensek nem pollolnak.
+    """
+
+    def __init__(self, history_size: int = EVENT_HISTORY_SIZE):
+        self._subscribers = set()
+        self._history = deque(maxlen=history_size)
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, data: Dict) -> int:
+        """Esemény küldése minden feliratkozónak; visszaadja az esemény azonosítóját"""
+        with self._lock:
+            self._last_id += 1
+            event = (self._last_id, event_type, json.dumps(data, ensure_ascii=False, default=str))
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Nem olvasó kliens - lezárjuk, a böngésző újracsatlakozik
+                self._unsubscribe(subscriber)
+                self._close(subscriber)
+        return event[0]
+
+    @staticmethod
+    def _close(subscriber: queue.Queue):
+        """Lezáró jel egy teli sorba, blokkolás nélkül (a kimaradt eseményeket a kliens újracsatlakozáskor visszakapja)"""
+        while True:
+            try:
+                while True:
+                    subscriber.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                subscriber.put_nowait(None)
+                return
+            except queue.Full:
+                # Közben egy másik publish még betett egy eseményt
+                continue
+
+    def _subscribe(self, last_event_id: Optional[int], max_connections: Optional[int] = None) -> Optional[queue.Queue]:
+        """Feliratkozás; None, ha már max_connections feliratkozó van"""
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            if max_connections is not None and len(self._subscribers) >= max_connections:
+                return None
+            if last_event_id is not None:
+                # Újracsatlakozás: a kimaradt események visszajátszása
+                for event in self._history:
+                    if event[0] > last_event_id:
+                        subscriber.put_nowait(event)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def _unsubscribe(self, subscriber: queue.Queue):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def open_stream(self, last_event_id: Optional[int] = None, max_seconds: float = SSE_MAX_STREAM_SECONDS,
+                    max_connections: Optional[int] = None) -> Optional['EventStream']:
+        """
+        Új SSE kapcsolat: a feliratkozás azonnal megtörténik (így a korlát a
+        válasz elindítása előtt ellenőrizhető). None, ha a kapcsolatok száma
+        elérte a max_connections-t (alapértelmezés: SSE_MAX_CONNECTIONS) - a hívó
+        503-mal utasítja el.
+        """
+        if max_connections is None:
+            max_connections = SSE_MAX_CONNECTIONS
+        subscriber = self._subscribe(last_event_id, max_connections)
+        if subscriber is None:
+            return None
+        return EventStream(self, subscriber, max_seconds)
+
+    def _stream(self, subscriber: queue.Queue, max_seconds: float) -> Iterator[str]:
+        """SSE formátumú üzenetek generátora egy klienshez (heartbeat kommentekkel)"""
+        deadline = time.monotonic() + max_seconds
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    event = subscriber.get(timeout=min(SSE_HEARTBEAT_SECONDS, remaining))
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                if event is None:
+                    return
+                event_id, event_type, data = event
+                yield f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
+        finally:
+            self._unsubscribe(subscriber)
+
+
+class EventStream:
+    """
+    Egy SSE kapcsolat üzenetei. A close() akkor is felszabadítja a helyet, ha
+    a generátor el sem indult (a válasz kiküldése előtt bontott kapcsolat).
+    """
+
+    def __init__(self, bus: EventBus, subscriber: queue.Queue, max_seconds: float):
+        self._bus = bus
+        self._subscriber = subscriber
+        self._messages = bus._stream(subscriber, max_seconds)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        return next(self._messages)
+
+    def close(self):
+        self._messages.close()
+        self._bus._unsubscribe(self._subscriber)
+
+
+event_bus = EventBus()
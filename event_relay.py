@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+from typing import Callable
+
+from database_manager import db_manager
+from event_bus import event_bus
+from jobs import job_registry, process_owner
+
+# Ennyi másodpercenként nézi meg a relay, történt-e változás az adatbázisban
+EVENT_RELAY_INTERVAL = float(os.getenv('EVENT_RELAY_INTERVAL', '3'))
+# Egy körben legfeljebb ennyi új cikket küldünk tovább
+EVENT_RELAY_MAX_ARTICLES = 100
+
+# Feladat állapot -> newsletter_data processing_status
+JOB_STATUS_TO_PROCESSING = {'queued': 'processing', 'running': 'processing', 'completed': 'completed', 'failed': 'failed'}
+
+
+class DatabaseEventRelay:
+    """
+    Web-only módban (APP_ROLE=web) a feldolgozás egy másik folyamatban (worker)
+    fut, így annak eseményei nem jutnak el ennek a folyamatnak az SSE
+    klienseihez. A relay néhány másodpercenként két olcsó, indexelt lekérdezéssel
+    (utoljára módosított cikk / összefoglaló) és a legutóbbi lease sorral figyeli az
+    adatbázist, és a változásokat a helyi event bus-on teszi közzé - folyamatonként
+    egy lekérdezés-sorozat, a nyitott fülek számától függetlenül.
+    """
+
+    def __init__(self, on_status: Callable[[str], None], interval: float = EVENT_RELAY_INTERVAL):
+        self.on_status = on_status
+        self.interval = interval
+        self._job_state = None
+        self._markers = None
+        # Streamelt vezetői összefoglaló: melyik feladaté, mennyit küldtünk ki, hányadik részlet
+        self._draft = (None, 0, 0)
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and db_manager.available:
+            self._thread = threading.Thread(target=self._run, daemon=True, name='event-relay')
+            self._thread.start()
+
+    def _run(self):
+        # Kiinduló állapot: ami már megvan, azt nem küldjük el újra
+        self._markers = db_manager.get_change_markers()
+        job = db_manager.get_processing_job(include_draft=True)
+        if job:
+            self._job_state = (job['id'], job['status'], job['stage'], job['progress'])
+            # Félkész stream közepéről nem küldünk (a kliens a 0. részlettől tud építkezni)
+            self._draft = (job['id'], len(job['briefing_draft']), 1)
+            if job['status'] == 'running':
+                self.on_status('processing')
+
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"❌ Esemény relay hiba: {e}")
+
+    def poll(self):
+        """Egy kör: feladat haladás, streamelt összefoglaló, új elemzett cikkek, új vezetői összefoglaló"""
+        # A saját folyamatban futó feladat eseményei már kimentek a helyi bus-on
+        local = job_registry.active() is not None
+
+        job = db_manager.get_processing_job(include_draft=True)
+        if job:
+            draft = job.pop('briefing_draft')
+            foreign = not local and job['owner'] != process_owner()
+            state = (job['id'], job['status'], job['stage'], job['progress'])
+            if state != self._job_state:
+                previous = self._job_state
+                self._job_state = state
+                if foreign:
+                    event_bus.publish('job', job)
+                    if previous is None or previous[:2] != state[:2]:
+                        self.on_status(JOB_STATUS_TO_PROCESSING.get(job['status'], job['status']))
+            if foreign:
+                self._relay_briefing_draft(job['id'], draft)
+
+        markers = db_manager.get_change_markers()
+        if markers is None or markers == self._markers:
+            return
+        previous, self._markers = self._markers or {}, markers
+        # Más folyamat írt: a helyi olvasási cache elavult
+        db_manager.invalidate_read_cache()
+        if local:
+            return
+
+        # updated_at: új és helyben újraelemzett cikkek is
+        since = previous.get('article_updated_at')
+        if since is not None and markers['article_updated_at'] != since:
+            for article in db_manager.get_analyzed_articles_since(since, EVENT_RELAY_MAX_ARTICLES):
+                event_bus.publish('article', article)
+
+        if markers['briefing_updated_at'] != previous.get('briefing_updated_at'):
+            briefing = db_manager.get_latest_executive_briefing()
+            if briefing:
+                event_bus.publish('briefing', briefing)
+
+    def _relay_briefing_draft(self, job_id: str, draft: str):
+        """A lease sorba kiírt félkész összefoglaló új része 'briefing_chunk' eseményként"""
+        draft_job, sent, seq = self._draft
+        if job_id != draft_job:
+            draft_job, sent, seq = job_id, 0, 0
+        if len(draft) > sent:
+            event_bus.publish('briefing_chunk', {'job_id': job_id, 'seq': seq, 'delta': draft[sent:]})
+            sent, seq = len(draft), seq + 1
+        self._draft = (draft_job, sent, seq)
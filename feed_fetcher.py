@@ -0,0 +1,279 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import List, Dict, Tuple, Optional
+
+import feedparser
+import requests
+
+from database_manager import db_manager
+
+# Párhuzamos lekérés beállításai (környezeti változóval felülírhatók)
+FEED_MAX_WORKERS = int(os.getenv('FEED_MAX_WORKERS', '8'))
+FEED_CONNECT_TIMEOUT = float(os.getenv('FEED_CONNECT_TIMEOUT', '5'))
+FEED_READ_TIMEOUT = float(os.getenv('FEED_READ_TIMEOUT', '15'))
+FEED_DEADLINE = float(os.getenv('FEED_DEADLINE', '30'))
+
+# /api/rss-sources pillanatkép maximális kora, utána háttérben frissítjük
+RSS_SNAPSHOT_MAX_AGE = float(os.getenv('RSS_SNAPSHOT_MAX_AGE', '2700'))
+
+# Forrásonként ennyi bejegyzést tartunk meg a cache-ben
+FEED_CACHE_MAX_ENTRIES = 20
+
+USER_AGENT = 'Mozilla/5.0 (compatible; KormanyzatiSzemle/1.0; +https://feedparser.readthedocs.io)'
+
+
+def normalize_entry(entry) -> Dict:
+    """feedparser bejegyzés átalakítása JSON-ba menthető dict-té"""
+    parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+    return {
+        'title': entry.get('title', 'Nincs cím'),
+        'link': entry.get('link', ''),
+        'description': entry.get('summary', entry.get('description', '')),
+        'pub_date': datetime(*parsed[:6]).isoformat() if parsed else None
+    }
+
+
+class FeedCache:
+    """
+    Forrásonkénti feed cache (ETag / Last-Modified + utolsó feldolgozott bejegyzések).
+    Memóriában tartja az állapotot, és az adatbázisba is kiírja, hogy újraindítás
+    után is feltételes kérésekkel induljunk.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, source_url: str) -> Optional[Dict]:
+        """Cache-elt állapot lekérése (memória, majd adatbázis)"""
+        with self._lock:
+            cached = self._entries.get(source_url)
+        if cached is None:
+            cached = db_manager.get_feed_cache(source_url)
+            if cached is not None:
+                with self._lock:
+                    cached = self._entries.setdefault(source_url, cached)
+        return cached
+
+    def reload(self, source_url: str) -> Optional[Dict]:
+        """Állapot újraolvasása az adatbázisból (egy másik folyamat írta, pl. a worker)"""
+        cached = db_manager.get_feed_cache(source_url)
+        if cached is not None:
+            with self._lock:
+                self._entries[source_url] = cached
+        return cached or self.get(source_url)
+
+    def store(self, source_url: str, etag: Optional[str], last_modified: Optional[str],
+              entries: List[Dict]) -> Dict:
+        """Teljes (200-as) letöltés eredményének mentése"""
+        now = datetime.utcnow()
+        cached = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'entries': entries,
+            'fetched_at': now.isoformat(),
+            'checked_at': now.isoformat()
+        }
+        with self._lock:
+            self._entries[source_url] = cached
+        db_manager.save_feed_cache(source_url, etag, last_modified, entries, now, now)
+        return cached
+
+    def touch(self, source_url: str) -> Optional[Dict]:
+        """304 válasz: csak az ellenőrzés idejét frissítjük"""
+        with self._lock:
+            cached = self._entries.get(source_url)
+            if cached is not None:
+                cached['checked_at'] = datetime.utcnow().isoformat()
+            return cached
+
+
+feed_cache = FeedCache()
+
+
+def fetch_feed(source: Dict,
+               connect_timeout: float = FEED_CONNECT_TIMEOUT,
+               read_timeout: float = FEED_READ_TIMEOUT) -> Dict:
+    """
+    Egy RSS forrás feltételes letöltése időkorláttal.
+    304 esetén a cache-elt bejegyzéseket adja vissza újrafeldolgozás nélkül.
+    """
+    cached = feed_cache.get(source['url'])
+
+    headers = {'User-Agent': USER_AGENT}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    response = requests.get(
+        source['url'],
+        headers=headers,
+        timeout=(connect_timeout, read_timeout)
+    )
+
+    if response.status_code == 304 and cached:
+        return dict(feed_cache.touch(source['url']) or cached, not_modified=True)
+
+    response.raise_for_status()
+    feed = feedparser.parse(response.content)
+    entries = [normalize_entry(entry) for entry in feed.entries[:FEED_CACHE_MAX_ENTRIES]]
+    stored = feed_cache.store(
+        source['url'],
+        response.headers.get('ETag'),
+        response.headers.get('Last-Modified'),
+        entries
+    )
+    return dict(stored, not_modified=False)
+
+
+def fetch_all_feeds(sources: List[Dict],
+                    max_workers: int = FEED_MAX_WORKERS,
+                    deadline: float = FEED_DEADLINE) -> List[Tuple[Dict, Optional[Dict]]]:
+    """
+    Összes forrás párhuzamos lekérése korlátozott számú szálon.
+    A ciklus ideje a leglassabb forráshoz igazodik, de legfeljebb `deadline`
+    másodperc - ami addig nem érkezik meg, az kimarad ebből a körből.
+    Visszatérés: (forrás, feed) párok a források eredeti sorrendjében, ahol a feed
+    egy dict ('entries', 'etag', 'last_modified', 'fetched_at', 'not_modified'),
+    sikertelen lekérésnél None.
+    """
+    if not sources:
+        return []
+
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sources))),
+                                  thread_name_prefix='feed')
+    futures = [executor.submit(fetch_feed, source) for source in sources]
+    try:
+        wait(futures, timeout=deadline)
+    finally:
+        # Nem várunk a beragadt kérésekre - a socket timeout úgyis lezárja őket
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for source, future in zip(sources, futures):
+        feed = None
+        if not future.done():
+            print(f"⏱️ Időtúllépés {source['name']} lekérésekor (globális határidő: {deadline:.0f}s)")
+        elif future.cancelled():
+            print(f"⏱️ {source['name']} lekérése elmaradt (globális határidő)")
+        elif future.exception() is not None:
+            print(f"❌ Hiba {source['name']} lekérésekor: {future.exception()}")
+        else:
+            feed = future.result()
+        results.append((source, feed))
+
+    ok_count = sum(1 for _, feed in results if feed is not None)
+    unchanged = sum(1 for _, feed in results if feed and feed.get('not_modified'))
+    print(f"📡 {ok_count}/{len(sources)} forrás lekérve {time.monotonic() - started:.1f}s alatt ({unchanged} változatlan, 304)")
+    return results
+
+
+class SourcesSnapshot:
+    """
+    Források és legfrissebb cikkeik memóriában tartott pillanatképe.
+    A kérések sosem várnak hálózatra, ha van pillanatkép; a frissítést a
+    háttérfeladat végzi, az egyidejű frissítési kérések pedig egyetlen
+    lekérésbe olvadnak össze.
+
+    fetch_feeds=False esetén (web-only folyamat) nem kérdezi le a forrásokat,
+    hanem a worker által karbantartott feed cache-t olvassa újra az adatbázisból.
+    """
+
+    def __init__(self, sources: List[Dict], max_age: float = RSS_SNAPSHOT_MAX_AGE,
+                 fetch_feeds: bool = True):
+        self.sources = sources
+        self.max_age = max_age
+        self.fetch_feeds = fetch_feeds
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._in_flight = None  # threading.Event a futó frissítéshez
+
+    def update(self, results: List[Tuple[Dict, Optional[Dict]]]) -> Dict:
+        """
+        Pillanatkép összeállítása egy fetch_all_feeds eredményből.
+        Részleges eredmény is lehet (adaptív ütemező): a többi forrásnál,
+        ahogy sikertelen lekérésnél is, az utolsó ismert bejegyzéseket mutatjuk.
+        """
+        fetched = {source['url']: feed for source, feed in results if feed is not None}
+        sources_view = []
+        for source in self.sources:
+            feed = fetched.get(source['url']) or feed_cache.get(source['url'])
+
+            recent_articles = []
+            for entry in (feed or {}).get('entries', [])[:3]:  # Max 3 legfrissebb cikk
+                description = entry.get('description', '')
+                recent_articles.append({
+                    'title': entry.get('title', 'Nincs cím'),
+                    'link': entry.get('link', ''),
+                    'pub_date': entry.get('pub_date') or datetime.now().isoformat(),
+                    'description': description[:150] + '...' if description else ''
+                })
+
+            sources_view.append({
+                'name': source['name'],
+                'url': source['url'],
+                'category': source['category'],
+                'articles': recent_articles
+            })
+
+        self._snapshot = {'sources': sources_view, 'generated_at': datetime.utcnow()}
+        return self._snapshot
+
+    def refresh(self) -> Optional[Dict]:
+        """Pillanatkép frissítése - egyszerre csak egy lekérés fut, a többiek megvárják"""
+        with self._lock:
+            event = self._in_flight
+            leader = event is None
+            if leader:
+                event = self._in_flight = threading.Event()
+
+        if not leader:
+            event.wait(timeout=FEED_DEADLINE + FEED_READ_TIMEOUT)
+            return self._snapshot
+
+        try:
+            if self.fetch_feeds:
+                self.update(fetch_all_feeds(self.sources))
+            else:
+                self.update([(source, feed_cache.reload(source['url'])) for source in self.sources])
+        except Exception as e:
+            print(f"❌ RSS pillanatkép frissítési hiba: {e}")
+        finally:
+            with self._lock:
+                self._in_flight = None
+            event.set()
+        return self._snapshot
+
+    def refresh_async(self):
+        """Frissítés háttérszálon, ha épp nem fut már egy"""
+        if self._in_flight is None:
+            threading.Thread(target=self.refresh, daemon=True).start()
+
+    def get(self) -> Dict:
+        """
+        Pillanatkép API válaszként, frissességi adatokkal. A tartalom csak új
+        pillanatképnél változik (nincs benne másodpercre pontos kor), így a
+        kliensek ETag alapján 304-et kaphatnak.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            # Még nincs adat: az első kérés(ek) megvárják az egyetlen közös lekérést
+            snapshot = self.refresh() or {'sources': [], 'generated_at': None}
+
+        generated_at = snapshot['generated_at']
+        age = (datetime.utcnow() - generated_at).total_seconds() if generated_at else None
+        stale = age is None or age > self.max_age
+        if stale:
+            self.refresh_async()
+
+        return {
+            'sources': snapshot['sources'],
+            'generated_at': generated_at.isoformat() if generated_at else None,
+            'stale': stale
+        }
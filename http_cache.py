@@ -0,0 +1,81 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Ennél kisebb válaszokat nem tömörítünk (a fejlécek többe kerülnének)
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Tömörített változatok cache-e (ETag + kódolás szerint), hogy a népszerű
+# válaszokat ne tömörítsük minden kérésnél újra
+COMPRESSED_CACHE_MAX_ENTRIES = 64
+
+_compressed = OrderedDict()
+_compressed_lock = threading.Lock()
+
+
+def content_etag(body: bytes) -> str:
+    """Erős ETag a válasz tartalmából"""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def negotiate_encoding() -> Optional[str]:
+    """Accept-Encoding alapján: 'br' (ha telepítve van), 'gzip' vagy None"""
+    offered = ['br', 'gzip'] if brotli else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def _compress(body: bytes, etag: str, encoding: str) -> bytes:
+    key = (etag, encoding)
+    with _compressed_lock:
+        cached = _compressed.get(key)
+        if cached is not None:
+            _compressed.move_to_end(key)
+            return cached
+
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+    with _compressed_lock:
+        _compressed[key] = compressed
+        while len(_compressed) > COMPRESSED_CACHE_MAX_ENTRIES:
+            _compressed.popitem(last=False)
+    return compressed
+
+
+def conditional_json(body: bytes) -> Response:
+    """
+    JSON válasz erős ETag-gel, If-None-Match esetén 304-gyel, és a kliens által
+    elfogadott tömörítéssel. A tömörített változatok ETag-je kódolás-utótagot
+    kap ("<hash>-gzip"), de bármelyik változat ETag-je 304-et ad, ha a tartalom
+    nem változott.
+    """
+    etag = content_etag(body)
+    encoding = negotiate_encoding() if len(body) >= COMPRESS_MIN_SIZE else None
+    representation_etag = f'{etag}-{encoding}' if encoding else etag
+
+    if any(request.if_none_match.contains(tag) for tag in (etag, f'{etag}-gzip', f'{etag}-br')):
+        response = Response(status=304)
+    else:
+        response = Response(_compress(body, etag, encoding) if encoding else body,
+                            mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(representation_etag)
+    # A kliens tárolhatja, de minden használat előtt ellenőriznie kell (olcsó 304)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
@@ -0,0 +1,244 @@
+import os
+import socket
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from database_manager import db_manager
+from event_bus import event_bus
+
+# Ennyi lezárult feladatot tartunk meg lekérdezhetőnek
+JOB_HISTORY_SIZE = 50
+# A futó feladat ennyi másodpercenként újítja meg az adatbázis lease-t
+# (és írja ki a haladását a többi folyamatnak)
+LEASE_HEARTBEAT_SECONDS = float(os.getenv('LEASE_HEARTBEAT_SECONDS', '5'))
+
+
+def process_owner() -> str:
+    """A lease tulajdonosa: hostname:pid (gunicorn fork után is a saját pid)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Job:
+    """Egy háttérben futó feldolgozás állapota és haladása"""
+
+    def __init__(self, kind: str, job_id: Optional[str] = None):
+        self.id = job_id or uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'  # 'queued', 'running', 'completed', 'failed'
+        self.stage = None
+        self.progress = {
+            'articles_fetched': 0,
+            'to_analyze': 0,
+            'analyzed': 0,
+            'cached': 0,
+            'failed': 0
+        }
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.lease_id = None  # processing_status sor azonosítója
+        self.briefing_draft = ''  # streamelt vezetői összefoglaló eddigi része
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def update(self, stage: Optional[str] = None, **counters):
+        """Haladás beállítása (abszolút értékek), és továbbítása SSE-n"""
+        with self._lock:
+            if stage:
+                self.stage = stage
+            self.progress.update(counters)
+        self._publish()
+
+    def increment(self, **counters):
+        """Haladás növelése (pl. analyzed=3)"""
+        with self._lock:
+            for name, value in counters.items():
+                self.progress[name] = self.progress.get(name, 0) + value
+        self._publish()
+
+    def set_briefing_draft(self, text: str):
+        """Streamelt összefoglaló eddigi szövege - a heartbeat a lease sorba is kiírja"""
+        with self._lock:
+            self.briefing_draft = text
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def _publish(self):
+        event_bus.publish('job', self.to_dict())
+
+    def progress_snapshot(self, include_draft: bool = False) -> Dict:
+        """Szakasz + számlálók a lease sorba (a többi folyamat ebből látja a haladást)"""
+        with self._lock:
+            snapshot = {'stage': self.stage, **self.progress}
+            if include_draft and self.briefing_draft:
+                snapshot['briefing_draft'] = self.briefing_draft
+            return snapshot
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'stage': self.stage,
+                'progress': dict(self.progress),
+                'error': self.error,
+                'created_at': self.created_at.isoformat(),
+                'started_at': self.started_at.isoformat() if self.started_at else None,
+                'finished_at': self.finished_at.isoformat() if self.finished_at else None
+            }
+
+
+class JobRegistry:
+    """
+    Háttérfeladatok nyilvántartása. Egyszerre egy feldolgozás fut; egy újabb
+    indítási kérés a már futó feladatot kapja vissza. A HTTP kérés azonnal
+    visszatér, a webes szálak szabadok maradnak az olvasásokhoz.
+
+    Folyamatok között (gunicorn workerek, külön worker folyamat) az adatbázis
+    lease (processing_status sor + heartbeat) biztosítja a kölcsönös kizárást.
+    """
+
+    def __init__(self, history_size: int = JOB_HISTORY_SIZE):
+        self.history_size = history_size
+        self._jobs = OrderedDict()
+        self._active = None
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, target: Callable[[Job], None]) -> Tuple[Optional[Job], bool]:
+        """
+        Feladat indítása háttérszálon. Visszatérés: (feladat, új-e) - ha már fut
+        egy feldolgozás ebben a folyamatban, azt adja vissza False-szal; ha egy
+        másik folyamat tartja a lease-t, (None, False).
+        """
+        with self._lock:
+            if self._active is not None:
+                return self._active, False
+            job = Job(kind)
+            if db_manager.available:
+                job.lease_id = db_manager.acquire_processing_lease(job.id, kind, process_owner())
+                if job.lease_id is None:
+                    return None, False
+            self._start(job, target)
+        return job, True
+
+    def request(self, kind: str) -> Tuple[Optional[Job], bool]:
+        """
+        Web-only folyamat: a feldolgozást nem itt futtatjuk, csak kérést rögzítünk
+        (queued processing_status sor), amit a worker folyamat vesz fel
+        (claim_request). Visszatérés: (a kért feladat, True), vagy (None, False),
+        ha már fut vagy vár egy feldolgozás.
+        """
+        job = Job(kind)
+        if not db_manager.request_processing(job.id, kind):
+            return None, False
+        return job, True
+
+    def claim_request(self, target_for: Callable[[str], Callable[[Job], None]]) -> Optional[Job]:
+        """
+        Worker folyamat: a legrégebbi várakozó kérés felvétele és futtatása a lease
+        alatt. `target_for(kind)` adja a futtatandó függvényt.
+        """
+        with self._lock:
+            if self._active is not None:
+                return None
+            claimed = db_manager.claim_processing_request(process_owner())
+            if claimed is None:
+                return None
+            job = Job(claimed['kind'], job_id=claimed['job_id'])
+            job.lease_id = claimed['id']
+            self._start(job, target_for(job.kind))
+        return job
+
+    def _start(self, job: Job, target: Callable[[Job], None]):
+        """Aktív feladat beállítása és indítása háttérszálon (self._lock alatt hívjuk)"""
+        self._active = job
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.history_size:
+            self._jobs.popitem(last=False)
+        threading.Thread(target=self._run, args=(job, target), daemon=True,
+                         name=f'job-{job.id[:8]}').start()
+
+    def _run(self, job: Job, target: Callable[[Job], None]):
+        with job._lock:
+            job.status = 'running'
+            job.started_at = datetime.utcnow()
+        job._publish()
+        if job.lease_id is not None:
+            threading.Thread(target=self._heartbeat, args=(job,), daemon=True,
+                             name=f'lease-{job.id[:8]}').start()
+        try:
+            target(job)
+            with job._lock:
+                job.status = 'completed'
+                job.stage = 'done'
+        except Exception as e:
+            print(f"❌ Feladat hiba ({job.kind} {job.id[:8]}): {e}")
+            with job._lock:
+                job.status = 'failed'
+                job.error = str(e)
+        finally:
+            with job._lock:
+                job.finished_at = datetime.utcnow()
+            self._release(job)
+            with self._lock:
+                if self._active is job:
+                    self._active = None
+            job._done.set()
+            job._publish()
+
+    def _heartbeat(self, job: Job):
+        """Lease megújítása, amíg a feladat fut"""
+        while not job._done.wait(LEASE_HEARTBEAT_SECONDS):
+            if not db_manager.heartbeat_processing(job.lease_id, job.progress_snapshot(include_draft=True)):
+                print(f"⚠️ A feladat lease-e lejárt ({job.kind} {job.id[:8]})")
+
+    def _release(self, job: Job, error: Optional[str] = None):
+        """Lease lezárása az adatbázisban (completed / failed)"""
+        if job.lease_id is None:
+            return
+        progress = job.progress_snapshot()
+        processed = progress['cached'] + progress['analyzed'] + progress['failed']
+        db_manager.finish_processing(
+            job.lease_id,
+            'completed' if job.status == 'completed' else 'failed',
+            articles_processed=processed,
+            error_message=error or job.error,
+            progress=progress
+        )
+
+    def abandon_active(self, reason: str):
+        """Leállításkor: a futó feladat lease-ének azonnali feladása (nem kell kivárni a TTL-t)"""
+        job = self.active()
+        if job is not None:
+            self._release(job, error=reason)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active(self) -> Optional[Job]:
+        with self._lock:
+            return self._active
+
+    def lookup(self, job_id: str) -> Optional[Dict]:
+        """Feladat állapota - ebből a folyamatból, vagy a lease sorból (másik folyamat)"""
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return db_manager.get_processing_job(job_id)
+
+    def running(self) -> Optional[Dict]:
+        """A bármelyik folyamatban éppen futó feldolgozás"""
+        job = self.active()
+        if job is not None:
+            return job.to_dict()
+        return db_manager.get_active_processing()
+
+
+job_registry = JobRegistry()
@@ -0,0 +1,119 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Sequence
+
+from database_manager import db_manager
+
+LLM_CACHE_TTL = timedelta(days=int(os.getenv('LLM_CACHE_TTL_DAYS', '30')))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000'))
+
+# Ennyi mentésenként futtatunk takarítást (lejárt + legrégebben használt bejegyzések)
+EVICTION_EVERY = 100
+
+
+def make_cache_key(model: str, template_version: str, prompt: str) -> str:
+    """Tartalom alapú kulcs: sha256(modell, prompt sablon verzió, kész prompt)"""
+    content = f"{model}\x00{template_version}\x00{prompt}".encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+class LLMCache:
+    """
+    Perzisztens LLM válasz cache. Adatbázisban tárol (llm_cache tábla),
+    adatbázis nélkül memóriában, LRU kilakoltatással. Csak érvényes
+    (feldolgozható) válaszokat mentünk, így egy hibás válasz nem ragad be.
+    """
+
+    def __init__(self, ttl: timedelta = LLM_CACHE_TTL, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._saves = 0
+        self._memory = OrderedDict()  # kulcs -> (válasz, létrehozás ideje)
+        self._lock = threading.Lock()
+
+    def get(self, model: str, template_version: str, prompt: str) -> Optional[str]:
+        return self.get_any([model], template_version, prompt)
+
+    def get_any(self, models: Sequence[str], template_version: str, prompt: str) -> Optional[str]:
+        """
+        Az első találat a modellek sorrendjében. A válasz annak a modellnek a kulcsa
+        alatt van, amelyik adta - átállás után a tartalék szolgáltatóé is visszaolvasható.
+        """
+        response = None
+        for model in models:
+            key = make_cache_key(model, template_version, prompt)
+            if db_manager.available:
+                response = db_manager.get_llm_cache(key, self.ttl)
+            else:
+                response = self._memory_get(key)
+            if response is not None:
+                break
+
+        with self._lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return response
+
+    def put(self, model: str, template_version: str, prompt: str, response: str):
+        if not response:
+            return
+        key = make_cache_key(model, template_version, prompt)
+        if db_manager.available:
+            db_manager.save_llm_cache(key, model, template_version, response)
+        else:
+            with self._lock:
+                self._memory[key] = (response, datetime.utcnow())
+                self._memory.move_to_end(key)
+
+        with self._lock:
+            self._saves += 1
+            evict = self._saves % EVICTION_EVERY == 0
+        if evict or not db_manager.available:
+            self.evict()
+
+    def evict(self) -> int:
+        """Lejárt és a méretkorlát feletti (legrégebben használt) bejegyzések törlése"""
+        if db_manager.available:
+            deleted = db_manager.evict_llm_cache(self.max_entries, self.ttl)
+        else:
+            deleted = 0
+            with self._lock:
+                while len(self._memory) > self.max_entries:
+                    self._memory.popitem(last=False)
+                    deleted += 1
+        with self._lock:
+            self.evictions += deleted
+        return deleted
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is None:
+                return None
+            response, created_at = cached
+            if datetime.utcnow() - created_at > self.ttl:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return response
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'evictions': self.evictions
+            }
+
+
+llm_cache = LLMCache()
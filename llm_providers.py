@@ -0,0 +1,553 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from rate_limiter import TokenBucket
+
+# Újrapróbálás szolgáltatón belül: ennyi ismétlés, exponenciálisan növekvő
+# (LLM_BACKOFF_BASE * 2^n, legfeljebb LLM_BACKOFF_MAX másodperc, véletlen szórással) várakozással
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', '1'))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', '20'))
+# Egy hívás időkorlátja (másodperc)
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '120'))
+
+# Megszakító: ennyi egymást követő hiba után a szolgáltatót LLM_CIRCUIT_RESET_SECONDS-ig
+# kihagyjuk, utána egyetlen próbahívás dönti el, hogy visszakerül-e
+LLM_CIRCUIT_FAILURES = int(os.getenv('LLM_CIRCUIT_FAILURES', '5'))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv('LLM_CIRCUIT_RESET_SECONDS', '60'))
+
+# Átállás a másik szolgáltatóra, ha az elsődleges hibázik / nem használható választ ad
+LLM_FAILOVER = os.getenv('LLM_FAILOVER', 'true').lower() == 'true'
+# Fedezeti (hedged) kérés: ha az elsődleges nem válaszol a saját p95 késleltetésén belül,
+# a másodlagos is indul, és az első használható válasz nyer (kétszeres költség a lassú kéréseknél)
+LLM_HEDGE = os.getenv('LLM_HEDGE', 'false').lower() == 'true'
+# Amíg nincs elég mérés a p95-höz, ennyi másodperc után indul a fedezeti kérés
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv('LLM_HEDGE_DEFAULT_DELAY', '30'))
+LLM_HEDGE_MIN_SAMPLES = 20
+LLM_HEDGE_THREADS = int(os.getenv('LLM_HEDGE_THREADS', '8'))
+# Késleltetés mérés: az utolsó ennyi sikeres hívás (szolgáltatónként és kérés fajtánként)
+LATENCY_WINDOW = 200
+
+# Ezekre a HTTP státuszokra érdemes újrapróbálni (a többi 4xx a kérés / kulcs hibája)
+RETRYABLE_STATUS = frozenset({408, 409, 429})
+# A megszakítóba csak ezek (és az 5xx, illetve a státusz nélküli hálózati hibák) számítanak
+BREAKER_STATUS = frozenset({408, 429})
+
+
+class ProviderError(Exception):
+    """Egyik szolgáltató sem adott használható választ"""
+
+
+class CircuitOpenError(ProviderError):
+    """A szolgáltató megszakítója nyitva - hívás nélkül elutasítva"""
+
+
+class ResponseError(ProviderError):
+    """A szolgáltató válaszolt, de a válasz nem használható (pl. tiltott / üres tartalom)"""
+
+
+@dataclass
+class Completion:
+    """Egy szolgáltatói válasz"""
+    text: str
+    provider: str
+    model: str
+    truncated: bool = False   # a kimeneti token limit miatt szakadt meg
+    latency: float = 0.0
+    hedged: bool = False      # fedezeti kérésből nyert
+
+
+class CircuitBreaker:
+    """
+    Szálbiztos megszakító: closed (normál) -> open (LLM_CIRCUIT_FAILURES egymást
+    követő hiba után, hívás nélkül elutasít) -> half_open (a reset idő leteltével
+    egy próbahívás mehet; siker esetén closed, hiba esetén újra open).
+    """
+
+    def __init__(self, failure_threshold: int = LLM_CIRCUIT_FAILURES, reset_timeout: float = LLM_CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def ready(self) -> bool:
+        """Mehet-e hívás (állapotváltás nélkül - a sorrend kiválasztásához)"""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open':
+                return time.monotonic() - self.opened_at >= self.reset_timeout
+            return not self._trial_running
+
+    def allow(self) -> bool:
+        """Hívás engedélyezése; half_open állapotban egyszerre csak egy próbahívás"""
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+            if self.state == 'half_open':
+                if self._trial_running:
+                    return False
+                self._trial_running = True
+            return self.state != 'open'
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.trips += 1
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """A hívás nem a szolgáltató hibája miatt ért véget (pl. nem használható válasz)"""
+        with self._lock:
+            self._trial_running = False
+
+
+class LatencyTracker:
+    """Csúszóablakos késleltetés mérés percentilis becsléshez"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float, min_samples: int = LLM_HEDGE_MIN_SAMPLES) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+def status_code(error: Exception) -> Optional[int]:
+    """HTTP státusz a szolgáltatói kivételből (openai: status_code, google api_core: code)"""
+    for attribute in ('status_code', 'code'):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Átmeneti hiba-e (hálózat, időtúllépés, 429, 5xx) - a rossz kulcsot / kérést nem ismételjük"""
+    if isinstance(error, ProviderError):
+        return False
+    code = status_code(error)
+    if code is None:
+        return 'invalid_api_key' not in str(error) and 'API key not valid' not in str(error)
+    return code in RETRYABLE_STATUS or code >= 500
+
+
+def is_outage(error: Exception) -> bool:
+    """
+    A szolgáltató hibája-e (hálózat, időtúllépés, 429, 5xx) - csak ez számít a megszakítóba.
+    A 4xx kérés- / hitelesítési hibák egy rossz kérésre utalnak, nem a szolgáltatóra.
+    """
+    if isinstance(error, ProviderError):
+        return False
+    code = status_code(error)
+    if code is None:
+        return is_retryable(error)
+    return code in BREAKER_STATUS or code >= 500
+
+
+class LLMProvider:
+    """
+    Egy LLM szolgáltató: újrapróbálás exponenciális visszalépéssel, megszakító és
+    késleltetés mérés kérés fajtánként. Az alosztályok a _generate / _stream hívást adják.
+    """
+
+    name = 'provider'
+
+    def __init__(self, model: str, rate_limiter: Optional[TokenBucket] = None,
+                 max_retries: int = LLM_MAX_RETRIES, breaker: Optional[CircuitBreaker] = None):
+        self.model = model
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self._latency = {}
+        self._lock = threading.Lock()
+
+    def _generate(self, prompt: str, system: Optional[str], max_tokens: Optional[int],
+                  temperature: Optional[float]) -> Completion:
+        raise NotImplementedError
+
+    def _stream(self, prompt: str, system: Optional[str], max_tokens: Optional[int],
+                temperature: Optional[float]) -> Iterator[str]:
+        raise NotImplementedError
+
+    def latency(self, kind: str) -> LatencyTracker:
+        with self._lock:
+            return self._latency.setdefault(kind, LatencyTracker())
+
+    def hedge_delay(self, kind: str) -> float:
+        """Ennyi várakozás után indul a fedezeti kérés: a saját p95 késleltetés"""
+        p95 = self.latency(kind).percentile(0.95)
+        return LLM_HEDGE_DEFAULT_DELAY if p95 is None else p95
+
+    def _backoff(self, attempt: int):
+        delay = min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt))
+        time.sleep(delay * random.uniform(0.5, 1.0))
+
+    def _retry(self, error: Exception, attempt: int) -> bool:
+        """Hiba könyvelése; True, ha érdemes újra próbálni"""
+        with self._lock:
+            self.failures += 1
+        if not is_outage(error):
+            # A szolgáltató működik, csak ez a kérés / válasz nem használható
+            self.breaker.release()
+            return False
+        self.breaker.record_failure()
+        if attempt >= self.max_retries or not is_retryable(error):
+            return False
+        with self._lock:
+            self.retries += 1
+        print(f"🔁 {self.name} hiba ({error}) - újrapróbálás ({attempt + 1}/{self.max_retries})")
+        self._backoff(attempt)
+        return True
+
+    def _begin(self):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f'{self.name} circuit open')
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        with self._lock:
+            self.calls += 1
+
+    def generate(self, prompt: str, system: Optional[str] = None, max_tokens: Optional[int] = None,
+                 temperature: Optional[float] = None, kind: str = 'default') -> Completion:
+        attempt = 0
+        while True:
+            self._begin()
+            started = time.monotonic()
+            try:
+                completion = self._generate(prompt, system, max_tokens, temperature)
+            except Exception as e:
+                if self._retry(e, attempt):
+                    attempt += 1
+                    continue
+                raise
+            completion.latency = time.monotonic() - started
+            self.breaker.record_success()
+            self.latency(kind).record(completion.latency)
+            return completion
+
+    def stream(self, prompt: str, system: Optional[str] = None, max_tokens: Optional[int] = None,
+               temperature: Optional[float] = None, kind: str = 'stream') -> Iterator[str]:
+        """Streamelt generálás; csak az első részlet előtti hibánál próbál újra"""
+        attempt = 0
+        while True:
+            self._begin()
+            started = time.monotonic()
+            emitted = False
+            settled = False  # a megszakító már könyvelte a hívás kimenetelét
+            try:
+                for delta in self._stream(prompt, system, max_tokens, temperature):
+                    emitted = True
+                    yield delta
+                self.breaker.record_success()
+                settled = True
+                self.latency(kind).record(time.monotonic() - started)
+                return
+            except Exception as e:
+                settled = True
+                if emitted:
+                    # A kiküldött részletek miatt nem ismételjük, de a hibát könyveljük
+                    self._retry(e, self.max_retries)
+                    raise
+                if self._retry(e, attempt):
+                    attempt += 1
+                    continue
+                raise
+            finally:
+                if not settled:
+                    # A fogyasztó idő előtt lezárta a streamet (pl. SSE kliens bontott):
+                    # egy félbehagyott half_open próbahívás nem zárhatja ki a szolgáltatót
+                    self.breaker.release()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            latency = {kind: tracker.percentile(0.95, min_samples=1) for kind, tracker in self._latency.items()}
+            return {
+                'model': self.model,
+                'circuit': self.breaker.state,
+                'circuit_trips': self.breaker.trips,
+                'calls': self.calls,
+                'failures': self.failures,
+                'retries': self.retries,
+                'p95_seconds': {kind: round(value, 2) for kind, value in latency.items() if value is not None}
+            }
+
+
+class GeminiProvider(LLMProvider):
+    name = 'gemini'
+
+    def __init__(self, gemini_model, model: str, **kwargs):
+        super().__init__(model, **kwargs)
+        self.client = gemini_model
+
+    @staticmethod
+    def _prompt(prompt: str, system: Optional[str]) -> str:
+        return f"{system}\n\n{prompt}" if system else prompt
+
+    @staticmethod
+    def _config(temperature: Optional[float]) -> Optional[Dict]:
+        # A Gemini 2.5 a gondolkodási tokeneket is a kimeneti keretbe számolja,
+        # ezért max_tokens-t itt nem alkalmazunk
+        return {'temperature': temperature} if temperature is not None else None
+
+    def _generate(self, prompt, system, max_tokens, temperature) -> Completion:
+        response = self.client.generate_content(
+            self._prompt(prompt, system),
+            generation_config=self._config(temperature),
+            request_options={'timeout': LLM_TIMEOUT}
+        )
+        try:
+            text = response.text
+        except ValueError as e:
+            # Nincs szöveges rész (pl. biztonsági szűrő)
+            raise ResponseError(f'gemini: {e}') from e
+        return Completion(text=text, provider=self.name, model=self.model, truncated=self._is_truncated(response))
+
+    def _stream(self, prompt, system, max_tokens, temperature) -> Iterator[str]:
+        response = self.client.generate_content(
+            self._prompt(prompt, system),
+            generation_config=self._config(temperature),
+            request_options={'timeout': LLM_TIMEOUT},
+            stream=True
+        )
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                continue
+            if text:
+                yield text
+
+    @staticmethod
+    def _is_truncated(response) -> bool:
+        """A válasz a kimeneti token limit miatt szakadt-e meg"""
+        try:
+            finish_reason = response.candidates[0].finish_reason
+            return getattr(finish_reason, 'name', str(finish_reason)) == 'MAX_TOKENS'
+        except Exception:
+            return False
+
+
+class OpenAIProvider(LLMProvider):
+    name = 'openai'
+
+    def __init__(self, openai_client, model: str, **kwargs):
+        super().__init__(model, **kwargs)
+        # Az SDK saját újrapróbálását kikapcsoljuk, a visszalépést itt kezeljük
+        self.client = openai_client.with_options(timeout=LLM_TIMEOUT, max_retries=0)
+
+    @staticmethod
+    def _messages(prompt: str, system: Optional[str]) -> List[Dict]:
+        messages = [{"role": "system", "content": system}] if system else []
+        return messages + [{"role": "user", "content": prompt}]
+
+    def _options(self, prompt, system, max_tokens, temperature) -> Dict[str, Any]:
+        options = {'model': self.model, 'messages': self._messages(prompt, system)}
+        if max_tokens:
+            options['max_tokens'] = max_tokens
+        if temperature is not None:
+            options['temperature'] = temperature
+        return options
+
+    def _generate(self, prompt, system, max_tokens, temperature) -> Completion:
+        response = self.client.chat.completions.create(**self._options(prompt, system, max_tokens, temperature))
+        choice = response.choices[0]
+        if not choice.message.content:
+            raise ResponseError(f'openai: empty response ({choice.finish_reason})')
+        return Completion(text=choice.message.content, provider=self.name, model=self.model,
+                          truncated=choice.finish_reason == 'length')
+
+    def _stream(self, prompt, system, max_tokens, temperature) -> Iterator[str]:
+        stream = self.client.chat.completions.create(
+            stream=True, **self._options(prompt, system, max_tokens, temperature))
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+# A fedezeti kérések szálai (a vesztes kérés a háttérben fut le, az eredményét eldobjuk)
+_hedge_executor = ThreadPoolExecutor(max_workers=LLM_HEDGE_THREADS, thread_name_prefix='llm-hedge')
+
+
+class ProviderRouter:
+    """
+    Szolgáltatók preferencia sorrendben. A nyitott megszakítójú szolgáltatót
+    kihagyja; hibánál / nem használható válasznál a következőre áll át
+    (LLM_FAILOVER), LLM_HEDGE esetén az első kettőt fedezeti kéréssel versenyezteti.
+    """
+
+    def __init__(self, providers: List[Optional[LLMProvider]], failover: bool = LLM_FAILOVER, hedge: bool = LLM_HEDGE):
+        self.providers = [provider for provider in providers if provider is not None]
+        self.failover = failover
+        self.hedge = hedge
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return bool(self.providers)
+
+    @property
+    def models(self) -> List[str]:
+        """A szolgáltatók modelljei preferencia sorrendben (a cache ezek kulcsai alatt keres)"""
+        return [provider.model for provider in self.providers]
+
+    def _candidates(self) -> List[LLMProvider]:
+        candidates = [provider for provider in self.providers if provider.breaker.ready()]
+        return candidates if self.failover else candidates[:1]
+
+    @staticmethod
+    def _describe(provider: LLMProvider, error: Exception) -> str:
+        return f"{provider.name}: {error}"
+
+    def generate(self, prompt: str, system: Optional[str] = None, max_tokens: Optional[int] = None,
+                 temperature: Optional[float] = None, kind: str = 'default',
+                 validate: Optional[Callable[[Completion], bool]] = None) -> Completion:
+        """Az első használható (validate) válasz; ProviderError, ha egyik sem sikerült"""
+        candidates = self._candidates()
+        if not candidates:
+            raise CircuitOpenError('No LLM provider available (all circuits open)')
+
+        def call(provider: LLMProvider) -> Completion:
+            completion = provider.generate(prompt, system=system, max_tokens=max_tokens,
+                                           temperature=temperature, kind=kind)
+            if validate is not None and not validate(completion):
+                raise ResponseError('invalid response')
+            return completion
+
+        errors = []
+        if self.hedge and len(candidates) > 1:
+            completion = self._hedged(candidates[0], candidates[1], call, kind, errors)
+            if completion is not None:
+                return completion
+            candidates = candidates[2:]
+
+        for index, provider in enumerate(candidates):
+            if index or errors:
+                with self._lock:
+                    self.failovers += 1
+                print(f"↪️ Átállás: {provider.name} ({'; '.join(errors)})")
+            try:
+                return call(provider)
+            except Exception as e:
+                errors.append(self._describe(provider, e))
+        raise ProviderError('; '.join(errors))
+
+    def _hedged(self, primary: LLMProvider, secondary: LLMProvider, call, kind: str, errors: List[str]) -> Optional[Completion]:
+        """Elsődleges kérés; ha a p95-ön belül nincs használható válasz, a másodlagos is indul"""
+        futures = {_hedge_executor.submit(call, primary): primary}
+        deadline = time.monotonic() + primary.hedge_delay(kind)
+        hedged = False      # a másodlagos elindult
+        raced = False       # ... úgy, hogy az elsődleges még futott (valódi fedezeti kérés)
+        pending = set(futures)
+        while pending:
+            timeout = None if hedged else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = futures[future]
+                try:
+                    completion = future.result()
+                except Exception as e:
+                    errors.append(self._describe(provider, e))
+                    continue
+                if provider is secondary and raced:
+                    completion.hedged = True
+                    with self._lock:
+                        self.hedge_wins += 1
+                return completion
+            if not hedged and (not pending or time.monotonic() >= deadline):
+                # Az elsődleges lassú (p95 felett) vagy hibázott: a másodlagos is indul
+                hedged = True
+                raced = bool(pending)
+                with self._lock:
+                    if raced:
+                        self.hedges += 1
+                    else:
+                        self.failovers += 1
+                if raced:
+                    print(f"⏱️ Fedezeti kérés: {secondary.name} ({primary.name} > {primary.hedge_delay(kind):.1f}s)")
+                else:
+                    print(f"↪️ Átállás: {secondary.name} ({'; '.join(errors)})")
+                future = _hedge_executor.submit(call, secondary)
+                futures[future] = secondary
+                pending.add(future)
+        return None
+
+    def stream(self, prompt: str, system: Optional[str] = None, max_tokens: Optional[int] = None,
+               temperature: Optional[float] = None, kind: str = 'stream',
+               on_start: Optional[Callable[[LLMProvider], None]] = None) -> Iterator[str]:
+        """
+        Streamelt generálás átállással. Fedezeti kérés itt nincs: a már kiküldött
+        részleteket nem lehet visszavonni, ezért csak az első részlet előtt állunk át.
+        `on_start` az első részlettel kapja meg a válaszoló szolgáltatót.
+        """
+        errors = []
+        for provider in self._candidates():
+            if errors:
+                with self._lock:
+                    self.failovers += 1
+                print(f"↪️ Átállás: {provider.name} ({'; '.join(errors)})")
+            emitted = False
+            stream = provider.stream(prompt, system=system, max_tokens=max_tokens,
+                                     temperature=temperature, kind=kind)
+            try:
+                for delta in stream:
+                    if not emitted and on_start:
+                        on_start(provider)
+                    emitted = True
+                    yield delta
+                return
+            except Exception as e:
+                if emitted:
+                    raise
+                errors.append(self._describe(provider, e))
+            finally:
+                # Idő előtti lezárásnál a szolgáltató streamje is azonnal lezárul
+                stream.close()
+        raise ProviderError('; '.join(errors) or 'No LLM provider available (all circuits open)')
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'order': [provider.name for provider in self.providers],
+                'hedge': self.hedge,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins,
+                'failovers': self.failovers
+            }
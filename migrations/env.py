@@ -0,0 +1,71 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from database import Base, get_database_url
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get('configure_logger', True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Full-text search objects are raw DDL (0002), not part of the models."""
+    if type_ == 'table' and name.startswith('articles_fts'):
+        return False
+    if type_ == 'index' and name == 'ix_articles_search':
+        return False
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Run migrations in 'offline' mode (SQL script output)."""
+    context.configure(
+        url=get_database_url(),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations in 'online' mode.
+
+    database.run_migrations() passes in its own (advisory-locked) connection;
+    the alembic CLI falls back to a fresh engine from DATABASE_URL.
+    """
+    connection = config.attributes.get('connection')
+    if connection is not None:
+        _run(connection)
+        return
+
+    connectable = create_engine(get_database_url(), poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        _run(connection)
+
+
+def _run(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        render_as_batch=connection.dialect.name == 'sqlite',
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
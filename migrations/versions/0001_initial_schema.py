@@ -0,0 +1,100 @@
+"""initial schema
+
+Baseline of the tables that init_database() used to create with
+Base.metadata.create_all(). Tables that already exist (databases created
+before migrations were introduced) are left untouched, so this revision is
+safe to run against production.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-16 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'articles' not in existing:
+        op.create_table(
+            'articles',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('article_hash', sa.String(32), nullable=False, unique=True),
+            sa.Column('title', sa.Text(), nullable=False),
+            sa.Column('original_title', sa.Text(), nullable=False),
+            sa.Column('description', sa.Text()),
+            sa.Column('original_description', sa.Text()),
+            sa.Column('source', sa.String(100), nullable=False),
+            sa.Column('category', sa.String(100)),
+            sa.Column('link', sa.Text(), nullable=False),
+            sa.Column('pub_date', sa.DateTime()),
+            sa.Column('created_at', sa.DateTime()),
+            sa.Column('importance_score', sa.Integer()),
+            sa.Column('urgency', sa.String(20)),
+            sa.Column('executive_summary', sa.Text()),
+            sa.Column('ai_analysis', sa.JSON()),
+            sa.Column('hungarian_title', sa.Text()),
+        )
+
+    if 'executive_briefings' not in existing:
+        op.create_table(
+            'executive_briefings',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('content', sa.Text(), nullable=False),
+            sa.Column('article_count', sa.Integer()),
+            sa.Column('created_at', sa.DateTime()),
+        )
+
+    if 'processing_status' not in existing:
+        op.create_table(
+            'processing_status',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('status', sa.String(20), nullable=False),
+            sa.Column('started_at', sa.DateTime()),
+            sa.Column('completed_at', sa.DateTime()),
+            sa.Column('articles_processed', sa.Integer()),
+            sa.Column('error_message', sa.Text()),
+        )
+
+    if 'feed_cache' not in existing:
+        op.create_table(
+            'feed_cache',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('source_url', sa.String(500), nullable=False, unique=True),
+            sa.Column('etag', sa.Text()),
+            sa.Column('last_modified', sa.Text()),
+            sa.Column('entries', sa.JSON()),
+            sa.Column('fetched_at', sa.DateTime()),
+            sa.Column('checked_at', sa.DateTime()),
+        )
+
+    if 'llm_cache' not in existing:
+        op.create_table(
+            'llm_cache',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('cache_key', sa.String(64), nullable=False, unique=True),
+            sa.Column('model', sa.String(100), nullable=False),
+            sa.Column('template_version', sa.String(50)),
+            sa.Column('response', sa.Text(), nullable=False),
+            sa.Column('created_at', sa.DateTime()),
+            sa.Column('last_accessed_at', sa.DateTime()),
+            sa.Column('hit_count', sa.Integer()),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('llm_cache', 'feed_cache', 'processing_status', 'executive_briefings', 'articles'):
+        op.drop_table(table)
@@ -0,0 +1,89 @@
+"""full-text search index
+
+PostgreSQL: GIN expression index over a weighted Hungarian/English tsvector,
+built CONCURRENTLY so writes are not blocked on a live database.
+SQLite: FTS5 external-content table kept in sync by triggers.
+
+The PostgreSQL expression must stay identical to database.PG_SEARCH_VECTOR,
+otherwise the planner cannot use the index for /api/search.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 09:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PG_SEARCH_VECTOR = (
+    "setweight(to_tsvector('hungarian'::regconfig, coalesce(hungarian_title, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(original_title, '')), 'A') || "
+    "setweight(to_tsvector('hungarian'::regconfig, coalesce(executive_summary, '')), 'B') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(source, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(original_description, '')), 'C')"
+)
+
+SQLITE_FTS_COLUMNS = ('hungarian_title', 'original_title', 'executive_summary', 'source', 'original_description')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_articles_search "
+                f"ON articles USING GIN (({PG_SEARCH_VECTOR}))"
+            )
+
+    elif dialect == 'sqlite':
+        columns = ', '.join(SQLITE_FTS_COLUMNS)
+        new_values = ', '.join(f'new.{c}' for c in SQLITE_FTS_COLUMNS)
+        old_values = ', '.join(f'old.{c}' for c in SQLITE_FTS_COLUMNS)
+        exists = op.get_bind().exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'"
+        ).first()
+
+        op.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5({columns}, "
+            f"content='articles', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS articles_fts_ai AFTER INSERT ON articles BEGIN "
+            f"INSERT INTO articles_fts(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS articles_fts_ad AFTER DELETE ON articles BEGIN "
+            f"INSERT INTO articles_fts(articles_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS articles_fts_au AFTER UPDATE ON articles BEGIN "
+            f"INSERT INTO articles_fts(articles_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO articles_fts(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        )
+        if not exists:
+            # Index articles stored before the FTS table existed
+            op.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_articles_search")
+
+    elif dialect == 'sqlite':
+        for trigger in ('articles_fts_ai', 'articles_fts_ad', 'articles_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS articles_fts")
@@ -0,0 +1,56 @@
+"""composite indexes for the hot queries
+
+- articles (importance_score DESC, pub_date DESC, id DESC): every list view
+  (/api/articles, PDF export, briefing reload) orders by this
+- articles (created_at): cleanup_old_articles range delete
+- executive_briefings (created_at DESC): latest briefing lookup
+- processing_status (status, started_at DESC): latest running cycle lookup
+
+On PostgreSQL the indexes are built CONCURRENTLY, so they can be added to a
+live production database without blocking writes.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 09:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_articles_importance_pub_date', 'articles', 'importance_score DESC, pub_date DESC, id DESC'),
+    ('ix_articles_created_at', 'articles', 'created_at'),
+    ('ix_executive_briefings_created_at', 'executive_briefings', 'created_at DESC'),
+    ('ix_processing_status_status_started_at', 'processing_status', 'status, started_at DESC'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})")
+    else:
+        for name, table, columns in INDEXES:
+            op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    concurrently = 'CONCURRENTLY ' if op.get_bind().dialect.name == 'postgresql' else ''
+    if concurrently:
+        with op.get_context().autocommit_block():
+            for name, _, _ in INDEXES:
+                op.execute(f"DROP INDEX {concurrently}IF EXISTS {name}")
+    else:
+        for name, _, _ in INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,33 @@
+"""backfill article keyset columns
+
+Keyset pagination compares (importance_score, pub_date, id) as a row value,
+so none of them may be NULL - a NULL would drop the article from every page
+after the first. New rows always get both values; this fills old ones.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("UPDATE articles SET importance_score = 5 WHERE importance_score IS NULL")
+    op.execute("UPDATE articles SET pub_date = coalesce(created_at, CURRENT_TIMESTAMP) WHERE pub_date IS NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Data-only backfill, nothing to undo
+    pass
@@ -0,0 +1,54 @@
+"""processing lease columns
+
+A 'processing' row in processing_status becomes the cross-process lock of a
+pipeline run: the owner (hostname:pid) refreshes heartbeat_at while it works,
+and another process may only take over once the heartbeat is older than the
+lease TTL. progress carries the job stage and counters, so /api/jobs/<id>
+and the SSE relay of web-only processes can follow a run in the worker.
+
+Runs left in 'processing' by an older version have no heartbeat; they are
+closed here as failed so they never block the first lease.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('processing_status') as batch:
+        batch.add_column(sa.Column('job_id', sa.String(length=32), nullable=True))
+        batch.add_column(sa.Column('kind', sa.String(length=20), nullable=True))
+        batch.add_column(sa.Column('owner', sa.String(length=100), nullable=True))
+        batch.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+        batch.add_column(sa.Column('progress', sa.JSON(), nullable=True))
+    op.create_index('ix_processing_status_job_id', 'processing_status', ['job_id'])
+    op.execute(
+        "UPDATE processing_status SET status = 'failed', "
+        "error_message = 'Abandoned before processing leases were introduced' "
+        "WHERE status = 'processing'"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_processing_status_job_id', table_name='processing_status')
+    with op.batch_alter_table('processing_status') as batch:
+        batch.drop_column('progress')
+        batch.drop_column('heartbeat_at')
+        batch.drop_column('owner')
+        batch.drop_column('kind')
+        batch.drop_column('job_id')
@@ -0,0 +1,36 @@
+"""executive briefing input fingerprint
+
+Each briefing records the input set it was generated from: the top articles'
+hash:analysis-version items and their sha256. A pipeline run whose input set
+matches the latest briefing skips the GPT call and keeps that briefing.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('executive_briefings') as batch:
+        batch.add_column(sa.Column('input_fingerprint', sa.String(length=64), nullable=True))
+        batch.add_column(sa.Column('input_items', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('executive_briefings') as batch:
+        batch.drop_column('input_items')
+        batch.drop_column('input_fingerprint')
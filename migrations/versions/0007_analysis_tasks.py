@@ -0,0 +1,54 @@
+"""analysis task queue
+
+One row per article to analyse, enqueued by the pipeline run (job_id) and
+claimed by any number of worker processes. A claim sets status 'running',
+owner and lease_expires_at; the owner extends the lease while it works, and
+once it lapses the task can be claimed again, so a crashed worker's tasks are
+retried. Failed attempts go back to 'pending' with a later available_at until
+the attempt limit is reached. Claiming uses SELECT ... FOR UPDATE SKIP LOCKED
+on PostgreSQL, served by the (status, available_at) index.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16 13:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'analysis_tasks',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('article_hash', sa.String(32), nullable=False, unique=True),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('job_id', sa.String(32)),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('owner', sa.String(100)),
+        sa.Column('lease_expires_at', sa.DateTime()),
+        sa.Column('available_at', sa.DateTime()),
+        sa.Column('error_message', sa.Text()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime()),
+    )
+    op.create_index('ix_analysis_tasks_status_available_at', 'analysis_tasks', ['status', 'available_at'])
+    op.create_index('ix_analysis_tasks_job_id', 'analysis_tasks', ['job_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_analysis_tasks_job_id', table_name='analysis_tasks')
+    op.drop_index('ix_analysis_tasks_status_available_at', table_name='analysis_tasks')
+    op.drop_table('analysis_tasks')
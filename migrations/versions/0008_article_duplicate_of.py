@@ -0,0 +1,44 @@
+"""near-duplicate articles as linked rows
+
+Near-duplicate copies of a story (same news from another source) used to be
+kept only as related_sources of the canonical article. They are now stored
+as their own rows with duplicate_of set to the canonical article_hash; list
+views show canonical articles only.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Plain ALTER TABLE (no batch table rebuild): the SQLite FTS triggers on articles stay in place
+    op.add_column('articles', sa.Column('duplicate_of', sa.String(length=32), nullable=True))
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_articles_duplicate_of ON articles (duplicate_of)")
+    else:
+        op.execute("CREATE INDEX IF NOT EXISTS ix_articles_duplicate_of ON articles (duplicate_of)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_articles_duplicate_of")
+    else:
+        op.execute("DROP INDEX IF EXISTS ix_articles_duplicate_of")
+    op.drop_column('articles', 'duplicate_of')
@@ -0,0 +1,50 @@
+"""updated_at change markers
+
+Other processes detected changes by max(created_at) / max(briefing id), which
+misses rows updated in place (a re-analysed article keeps its created_at).
+articles and executive_briefings get an updated_at column, backfilled from
+created_at; the event relay compares max(updated_at), served by the new
+articles index (built CONCURRENTLY on PostgreSQL).
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('articles', 'executive_briefings')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Plain ALTER TABLE (no batch table rebuild): the SQLite FTS triggers on articles stay in place
+    for table in TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(f"UPDATE {table} SET updated_at = created_at")
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_articles_updated_at ON articles (updated_at)")
+    else:
+        op.execute("CREATE INDEX IF NOT EXISTS ix_articles_updated_at ON articles (updated_at)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_articles_updated_at")
+    else:
+        op.execute("DROP INDEX IF EXISTS ix_articles_updated_at")
+    for table in TABLES:
+        op.drop_column(table, 'updated_at')
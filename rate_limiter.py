@@ -0,0 +1,49 @@
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Szálbiztos token bucket a szolgáltatói kvóták betartásához.
+    `rate_per_minute` token töltődik vissza percenként, legfeljebb `capacity`
+    halmozódhat fel (ennyi kérés mehet ki egyszerre, löketben).
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Token felvétele várakozás nélkül"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """Várakozás, amíg van elég token (timeout esetén False)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate if self.rate > 0 else 1.0
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
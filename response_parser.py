@@ -0,0 +1,422 @@
+import json
+import re
+from dataclasses import dataclass, field, fields, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Az ANALYSIS_JSON_SCHEMA sürgősségi szintjei (és a modell gyakori változatai)
+URGENCY_LEVELS = ('azonnali', '24h', '1hét', 'monitoring')
+URGENCY_ALIASES = {'24 óra': '24h', '24ó': '24h', '1 hét': '1hét', '1 het': '1hét', '1het': '1hét'}
+DEFAULT_URGENCY = 'monitoring'
+DEFAULT_IMPORTANCE = 5
+
+# Ennyi kezdő zárójelet próbálunk végig, ha az első nem értelmezhető
+# (pl. a JSON előtti gondolatmenetben is van kapcsos zárójel)
+MAX_CANDIDATES = 5
+
+# A scanner csak ezeknél a karaktereknél áll meg; a köztük lévő szöveget szeletként másolja
+_TOKEN_RE = re.compile(r'[{}\[\]",:\\\n\r\t]')
+_OPEN_RE = {'{[': re.compile(r'[{\[]'), '{': re.compile(r'\{'), '[': re.compile(r'\[')}
+_NON_SPACE_RE = re.compile(r'\S')
+_NUMBER_RE = re.compile(r'-?\d+(?:[.,]\d+)?')
+_STRING_ESCAPES = {'\n': '\\n', '\r': '\\r', '\t': '\\t'}
+_CLOSERS = {'{': '}', '[': ']'}
+# Záró idézőjel után ezek jöhetnek; minden más esetben a szövegbe tartozó, escape nélküli idézőjel
+_AFTER_STRING = frozenset(':,}]')
+_DECODER = json.JSONDecoder(strict=False)
+
+
+class AnalysisSchemaError(ValueError):
+    """A dekódolt JSON nem használható elemzés (pl. hiányzik a vezetői összefoglaló)"""
+
+
+@dataclass
+class ScanResult:
+    """Egy JSON érték beolvasásának eredménye (normalizált szöveg + a megszakadás állapota)"""
+    text: str
+    begin: int                      # a kezdő zárójel helye a bemenetben
+    complete: bool                  # a gyökér zárójel bezárult-e
+    stack: Tuple[str, ...]          # nyitva maradt zárójelek (csonka válasznál)
+    in_string: bool                 # stringen belül szakadt-e meg
+    string_is_value: bool           # ... és az érték (nem kulcs) string volt-e
+    cut: Optional[Tuple[int, int]]  # utolsó biztonságos vágási pont + az ottani veremmélység
+    elements: List[Tuple[int, int]]  # gyökér tömb hiánytalan objektum elemei (kezdet, vég)
+
+
+def scan_json(text: str, start: int = 0, openers: str = '{[') -> Optional[ScanResult]:
+    """
+    Egyetlen menetben beolvassa a `start` utáni első JSON objektumot / tömböt.
+    A stringeket felismeri (a bennük lévő zárójelek nem számítanak), és menet
+    közben javít: nyers sortörés / tab a stringben -> escape, záró zárójel előtti
+    vessző elhagyása, stringen belüli escape nélküli idézőjel escape-elése.
+    """
+    match = _OPEN_RE[openers].search(text, start)
+    if match is None:
+        return None
+    begin = match.start()
+
+    pieces = []        # a már kiírt (javított) szeletek
+    size = 0           # a kiírt szeletek összhossza
+    pos = begin        # innen kezdődik a még ki nem írt bemenet
+    stack = []
+    in_string = False
+    string_is_value = False
+    expect_value = True
+    skip_to = -1       # escape utáni karakter átugrása
+    comma = None       # utolsó, stringen kívüli vessző helye (záró előtt elhagyjuk)
+    cut = None
+    elements = []
+    element_start = None
+    end = len(text)
+    complete = False
+
+    for token in _TOKEN_RE.finditer(text, begin):
+        i = token.start()
+        if i < skip_to:
+            continue
+        ch = text[i]
+
+        if in_string:
+            if ch == '\\':
+                skip_to = i + 2
+            elif ch == '"':
+                # Gyakori eset (közvetlenül utána : , } ]) regex nélkül
+                if text[i + 1:i + 2] in _AFTER_STRING:
+                    following = None
+                else:
+                    following = _NON_SPACE_RE.search(text, i + 1)
+                if (following is not None and following.group() == '"' and string_is_value
+                        and '\n' in text[i + 1:following.start()]):
+                    # Hiányzó vessző a sor végén: "érték"\n  "következő_kulcs"
+                    pieces.append(text[pos:i + 1] + ',')
+                    size += i - pos + 2
+                    pos = i + 1
+                    in_string = False
+                    cut = (size - 1, len(stack))
+                    expect_value = bool(stack) and stack[-1] == '['
+                    continue
+                if following is not None and following.group() not in _AFTER_STRING:
+                    # A szöveg része: "a "kiemelt" szó" -> escape
+                    pieces.append(text[pos:i] + '\\"')
+                    size += i - pos + 2
+                    pos = i + 1
+                    continue
+                in_string = False
+                if string_is_value:
+                    cut = (size + i + 1 - pos, len(stack))
+            elif ch in _STRING_ESCAPES:
+                pieces.append(text[pos:i] + _STRING_ESCAPES[ch])
+                size += i - pos + 2
+                pos = i + 1
+            continue
+
+        if ch == '"':
+            in_string = True
+            string_is_value = expect_value
+            comma = None
+        elif ch == '{' or ch == '[':
+            if ch == '{' and len(stack) == 1 and stack[0] == '[':
+                element_start = size + i - pos
+            stack.append(ch)
+            expect_value = ch == '['
+            comma = None
+        elif ch == '}' or ch == ']':
+            if comma is not None:
+                # Záró előtti vessző: "[1, 2,]" -> "[1, 2]"
+                pieces.append(text[pos:comma])
+                size += comma - pos
+                pos = comma + 1
+                comma = None
+            if not stack or _CLOSERS[stack[-1]] != ch:
+                # Nem illeszkedő záró zárójel - elhagyjuk
+                pieces.append(text[pos:i])
+                size += i - pos
+                pos = i + 1
+                continue
+            stack.pop()
+            out_end = size + i + 1 - pos
+            if ch == '}' and element_start is not None and len(stack) == 1:
+                elements.append((element_start, out_end))
+                element_start = None
+            cut = (out_end, len(stack))
+            expect_value = False
+            if not stack:
+                end = i + 1
+                complete = True
+                break
+        elif ch == ',':
+            cut = (size + i - pos, len(stack))
+            comma = i
+            expect_value = bool(stack) and stack[-1] == '['
+        elif ch == ':':
+            expect_value = True
+            comma = None
+
+    pieces.append(text[pos:end])
+    return ScanResult(
+        text=''.join(pieces),
+        begin=begin,
+        complete=complete,
+        stack=tuple(stack),
+        in_string=in_string,
+        string_is_value=string_is_value,
+        cut=cut,
+        elements=elements
+    )
+
+
+def _close(stack) -> str:
+    return ''.join(_CLOSERS[opener] for opener in reversed(stack))
+
+
+def decode_scan(scan: ScanResult) -> Tuple[Any, bool]:
+    """
+    A beolvasott érték dekódolása. Csonka válasznál lezárja a nyitott stringet
+    és zárójeleket (vagy az utolsó hiánytalan értéknél vág). Visszatérés:
+    (érték, javított-e); ValueError, ha nem menthető.
+    """
+    if scan.complete:
+        return json.loads(scan.text), False
+
+    candidates = []
+    if scan.in_string:
+        if scan.string_is_value:
+            # Félbeszakadt szöveges érték: a megkezdett szöveg megmarad
+            candidates.append(scan.text.rstrip('\\') + '"' + _close(scan.stack))
+    else:
+        # Hiánytalan szám / literál után szakadt meg
+        candidates.append(scan.text.rstrip().rstrip(',') + _close(scan.stack))
+    if scan.cut is not None:
+        # A vágás óta a verem csak bővülhetett (minden záró / vessző új vágási pont)
+        position, depth = scan.cut
+        candidates.append(scan.text[:position] + _close(scan.stack[:depth]))
+
+    for candidate in candidates:
+        try:
+            return json.loads(candidate), True
+        except json.JSONDecodeError:
+            continue
+    raise ValueError('Truncated JSON could not be repaired')
+
+
+def _text(value: Any, default: str = '') -> str:
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value.strip() or default
+    if isinstance(value, list):
+        return '; '.join(_text(item) for item in value if item is not None) or default
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _text_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [text for text in (_text(item) for item in value) if text]
+    text = _text(value)
+    return [text] if text else []
+
+
+def _importance(value: Any) -> int:
+    """1-10 közötti egész; "8", "8/10", 8.5 is elfogadott"""
+    if isinstance(value, bool):
+        return DEFAULT_IMPORTANCE
+    if isinstance(value, (int, float)):
+        number = value
+    else:
+        match = _NUMBER_RE.search(str(value or ''))
+        if match is None:
+            return DEFAULT_IMPORTANCE
+        number = float(match.group().replace(',', '.'))
+    return max(1, min(10, int(round(number))))
+
+
+def _urgency(value: Any) -> str:
+    urgency = _text(value).lower()
+    urgency = URGENCY_ALIASES.get(urgency, urgency)
+    return urgency if urgency in URGENCY_LEVELS else DEFAULT_URGENCY
+
+
+class _Section:
+    """Al-objektum: szöveges mezők ('N/A' alapértékkel) és szöveglista mezők"""
+
+    @classmethod
+    def from_dict(cls, data: Any):
+        if not isinstance(data, dict):
+            return cls()
+        values = {}
+        for f in fields(cls):
+            if f.default_factory is list:
+                values[f.name] = _text_list(data.get(f.name))
+            else:
+                values[f.name] = _text(data.get(f.name), f.default)
+        return cls(**values)
+
+
+@dataclass
+class MacroImpacts(_Section):
+    gdp_effect: str = 'N/A'
+    inflation_effect: str = 'N/A'
+    budget_effect: str = 'N/A'
+    currency_effect: str = 'N/A'
+
+
+@dataclass
+class SectoralAnalysis(_Section):
+    affected_sectors: List[str] = field(default_factory=list)
+    company_examples: List[str] = field(default_factory=list)
+    employment_impact: str = 'N/A'
+
+
+@dataclass
+class GeopoliticalContext(_Section):
+    eu_relevance: str = 'N/A'
+    regional_impact: str = 'N/A'
+    global_trends: str = 'N/A'
+
+
+@dataclass
+class RisksOpportunities(_Section):
+    main_risks: List[str] = field(default_factory=list)
+    opportunities: List[str] = field(default_factory=list)
+    time_horizon: str = 'N/A'
+
+
+SECTIONS = {
+    'macro_impacts': MacroImpacts,
+    'sectoral_analysis': SectoralAnalysis,
+    'geopolitical_context': GeopoliticalContext,
+    'risks_opportunities': RisksOpportunities
+}
+LIST_FIELDS = ('policy_considerations', 'monitoring_points', 'keywords_hu')
+
+
+@dataclass
+class GovernmentAnalysis:
+    """Egy cikk kormányzati elemzése - az ANALYSIS_JSON_SCHEMA típusos, ellenőrzött alakja"""
+    executive_summary: str
+    hungarian_title: str = ''
+    importance_score: int = DEFAULT_IMPORTANCE
+    urgency: str = DEFAULT_URGENCY
+    macro_impacts: MacroImpacts = field(default_factory=MacroImpacts)
+    sectoral_analysis: SectoralAnalysis = field(default_factory=SectoralAnalysis)
+    geopolitical_context: GeopoliticalContext = field(default_factory=GeopoliticalContext)
+    risks_opportunities: RisksOpportunities = field(default_factory=RisksOpportunities)
+    policy_considerations: List[str] = field(default_factory=list)
+    monitoring_points: List[str] = field(default_factory=list)
+    keywords_hu: List[str] = field(default_factory=list)
+    extra: Dict[str, Any] = field(default_factory=dict)  # a sémán kívüli mezők változatlanul
+    repaired: bool = False  # csonka válaszból javítva (nem cache-eljük)
+
+    @classmethod
+    def from_dict(cls, data: Dict, repaired: bool = False) -> 'GovernmentAnalysis':
+        """Séma szerinti ellenőrzés és típusigazítás; AnalysisSchemaError, ha nem használható"""
+        if not isinstance(data, dict):
+            raise AnalysisSchemaError(f'Analysis must be an object, got {type(data).__name__}')
+        summary = _text(data.get('executive_summary'))
+        if not summary:
+            raise AnalysisSchemaError('Missing executive_summary')
+
+        known = {'executive_summary', 'hungarian_title', 'importance_score', 'urgency',
+                 *SECTIONS, *LIST_FIELDS}
+        return cls(
+            executive_summary=summary,
+            hungarian_title=_text(data.get('hungarian_title')),
+            importance_score=_importance(data.get('importance_score')),
+            urgency=_urgency(data.get('urgency')),
+            **{name: section.from_dict(data.get(name)) for name, section in SECTIONS.items()},
+            **{name: _text_list(data.get(name)) for name in LIST_FIELDS},
+            extra={key: value for key, value in data.items() if key not in known},
+            repaired=repaired
+        )
+
+    def to_dict(self) -> Dict:
+        """A tárolt / megjelenített elemzés JSON alakja (a séma kulcsaival)"""
+        data = asdict(self)
+        extra = data.pop('extra')
+        data.pop('repaired')
+        return {**extra, **data}
+
+
+def _fast_decode(text: str, begin: int) -> Any:
+    """Hibátlan válasz gyors útja: C dekóder (strict=False: nyers sortörés is mehet); None, ha nem sikerül"""
+    try:
+        return _DECODER.raw_decode(text, begin)[0]
+    except ValueError:
+        return None
+
+
+def parse_analysis(text: str) -> Optional[GovernmentAnalysis]:
+    """
+    Egy elemzés kinyerése a modell válaszából (gondolatmenet, ```json keret,
+    vessző- és sortörés-hibák, csonka vég). None, ha nincs használható elemzés.
+    """
+    if not text:
+        return None
+    start = 0
+    for _ in range(MAX_CANDIDATES):
+        match = _OPEN_RE['{['].search(text, start)
+        if match is None:
+            return None
+        begin = match.start()
+        try:
+            data, repaired = _fast_decode(text, begin), False
+            if data is None:
+                data, repaired = decode_scan(scan_json(text, begin))
+            if isinstance(data, list):
+                data = next((item for item in data if isinstance(item, dict)), None)
+            return GovernmentAnalysis.from_dict(data, repaired=repaired)
+        except ValueError:
+            start = begin + 1
+    return None
+
+
+def _array_items(text: str, begin: int) -> List[Any]:
+    """A tömb elemei; csonka / javítandó tömbnél csak a hiánytalan objektum elemek"""
+    items = _fast_decode(text, begin)
+    if isinstance(items, list):
+        return items
+    scan = scan_json(text, begin, openers='[')
+    items = []
+    for element_start, element_end in scan.elements:
+        try:
+            items.append(json.loads(scan.text[element_start:element_end]))
+        except ValueError:
+            continue
+    return items
+
+
+def parse_analysis_array(text: str, ids: List[str]) -> Dict[str, GovernmentAnalysis]:
+    """
+    Kötegelt válasz: JSON tömb, elemenként "article_id"-vel. Csak a hiánytalan
+    és a kért azonosítójú elemeket adja vissza - a csonka utolsó elemet a hívó
+    újrakéri, így nem kerül félkész elemzés az adatbázisba.
+    """
+    analyses = {}
+    if not text:
+        return analyses
+    wanted = set(ids)
+    start = 0
+    for _ in range(MAX_CANDIDATES):
+        match = _OPEN_RE['['].search(text, start)
+        if match is None:
+            break
+        begin = match.start()
+        for item in _array_items(text, begin):
+            if not isinstance(item, dict):
+                continue
+            article_id = str(item.get('article_id', ''))
+            if article_id not in wanted:
+                continue
+            try:
+                analyses[article_id] = GovernmentAnalysis.from_dict(
+                    {key: value for key, value in item.items() if key != 'article_id'})
+            except AnalysisSchemaError:
+                continue
+        if analyses:
+            break
+        # Pl. a gondolatmenetben lévő [..] - a következő tömbbel próbálkozunk
+        start = begin + 1
+    return analyses
@@ -37,10 +37,10 @@ def setup_database():
                 print("✅ Database manager is working")
                 
                 # Show current statistics
-                articles = db_manager.get_latest_articles(1000)
+                stats = db_manager.get_stats() or {}
                 briefing = db_manager.get_latest_executive_briefing()
                 
-                print(f"📊 Current articles in database: {len(articles)}")
+                print(f"📊 Current articles in database: {stats.get('article_count', 0)}")
                 print(f"📋 Latest briefing: {'Available' if briefing else 'None'}")
                 
                 return True
@@ -0,0 +1,205 @@
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+
+from feed_fetcher import fetch_all_feeds, feed_cache, FEED_MAX_WORKERS
+
+# Forrásonkénti lekérési gyakoriság határai (másodperc)
+MIN_POLL_INTERVAL = float(os.getenv('MIN_POLL_INTERVAL', '300'))
+MAX_POLL_INTERVAL = float(os.getenv('MAX_POLL_INTERVAL', '21600'))
+DEFAULT_POLL_INTERVAL = 1800
+
+# AI elemzés legfeljebb ilyen gyakran fut, és csak ha érkezett új cikk
+ANALYSIS_INTERVAL = float(os.getenv('ANALYSIS_INTERVAL', '7200'))
+
+SCHEDULER_TICK = 15
+RATE_WINDOW = timedelta(hours=24)
+JITTER = 0.1
+
+
+class SourceState:
+    """Egy forrás lekérési állapota: becsült publikálási ütem, hibák, következő lekérés"""
+
+    def __init__(self, source: Dict, next_poll_at: float):
+        self.source = source
+        self.interval = DEFAULT_POLL_INTERVAL
+        self.next_poll_at = next_poll_at
+        self.failures = 0
+        self.rate_per_hour = None
+        self.last_polled_at = None
+
+        # Az utolsó ismert bejegyzések (perzisztens feed cache-ből), hogy
+        # újraindítás után is csak a valóban új cikkeket számoljuk
+        cached = feed_cache.get(source['url'])
+        self.seen_links: Optional[Set[str]] = (
+            {e.get('link') for e in cached.get('entries', [])} if cached else None
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.source['name'],
+            'interval_seconds': int(self.interval),
+            'next_poll_in_seconds': max(0, int(self.next_poll_at - time.time())),
+            'failures': self.failures,
+            'rate_per_hour': round(self.rate_per_hour, 2) if self.rate_per_hour is not None else None
+        }
+
+
+def estimate_rate(entries: List[Dict], now: Optional[datetime] = None) -> Optional[float]:
+    """
+    Publikálási ütem becslése (cikk/óra) a bejegyzések dátumaiból.
+    Ha minden bejegyzés az ablakon belüli, a legrégebbitől eltelt idővel osztunk,
+    mert a feed csonkolása miatt a valós ütem ennél csak nagyobb lehet.
+    """
+    now = now or datetime.utcnow()
+    dates = []
+    for entry in entries:
+        if entry.get('pub_date'):
+            try:
+                dates.append(datetime.fromisoformat(entry['pub_date']))
+            except ValueError:
+                continue
+    if not dates:
+        return None
+
+    recent = [d for d in dates if now - d <= RATE_WINDOW]
+    if recent and len(recent) == len(dates):
+        span = max(now - min(recent), timedelta(minutes=30))
+    else:
+        span = RATE_WINDOW
+    return len(recent) / (span.total_seconds() / 3600)
+
+
+class AdaptiveScheduler:
+    """
+    Forrásonként adaptív RSS lekérés.
+    - A gyakran publikáló forrásokat sűrűbben kérdezzük le (kb. egy új cikk / lekérés)
+    - A csendes forrásoknál fokozatosan ritkítunk
+    - Hibáknál exponenciális visszalépés
+    - Véletlen szórás, hogy a lekérések ne egyszerre induljanak
+    Induláskor minden forrást lekér, és az első AI elemzést azonnal elindítja;
+    utána csak akkor elemez, ha új cikk érkezett és letelt az ANALYSIS_INTERVAL.
+    """
+
+    def __init__(self, sources: List[Dict],
+                 on_poll: Optional[Callable] = None,
+                 analyze: Optional[Callable] = None):
+        self.on_poll = on_poll
+        self.analyze = analyze
+        self.new_entries_since_analysis = 0
+        # None: ebben a folyamatban még nem futott elemzés
+        self.last_analysis_at: Optional[float] = None
+        self._analysis_thread = None
+        self._lock = threading.Lock()
+
+        # Induláskor minden forrás esedékes (initial_poll); a későbbi lekérések
+        # a forrásonkénti intervallum és a véletlen szórás miatt széthúzódnak
+        now = time.time()
+        self.states = [SourceState(source, now) for source in sources]
+
+    def _next_interval(self, state: SourceState, feed: Optional[Dict], new_count: int) -> float:
+        """Következő lekérési intervallum a forrás ütemétől és hibáitól függően"""
+        if feed is None:
+            state.failures += 1
+            return min(MAX_POLL_INTERVAL, DEFAULT_POLL_INTERVAL * (2 ** state.failures))
+
+        state.failures = 0
+        state.rate_per_hour = estimate_rate(feed.get('entries', []))
+        if state.rate_per_hour:
+            interval = 3600 / state.rate_per_hour
+        elif state.rate_per_hour == 0:
+            interval = state.interval * 2
+        elif new_count:
+            # Dátum nélküli feed: az új cikkek alapján igazítunk
+            interval = state.interval / 2
+        else:
+            interval = state.interval * 1.5
+        return max(MIN_POLL_INTERVAL, min(MAX_POLL_INTERVAL, interval))
+
+    def initial_poll(self) -> int:
+        """Induló lekérés: minden forrás egyszer, FEED_MAX_WORKERS méretű adagokban"""
+        total_new = 0
+        for _ in range(math.ceil(len(self.states) / FEED_MAX_WORKERS)):
+            total_new += self.poll_due_sources(initial=True)
+        return total_new
+
+    def poll_due_sources(self, initial: bool = False) -> int:
+        """Az esedékes források lekérése; visszaadja az új bejegyzések számát"""
+        now = time.time()
+        with self._lock:
+            due = sorted((s for s in self.states
+                          if s.next_poll_at <= now and not (initial and s.last_polled_at)),
+                         key=lambda s: s.next_poll_at)[:FEED_MAX_WORKERS]
+        if not due:
+            return 0
+
+        results = fetch_all_feeds([state.source for state in due])
+        total_new = 0
+        with self._lock:
+            for state, (source, feed) in zip(due, results):
+                new_count = 0
+                if feed is not None:
+                    links = {e.get('link') for e in feed.get('entries', [])}
+                    if state.seen_links is not None:
+                        new_count = len(links - state.seen_links)
+                    state.seen_links = links
+                total_new += new_count
+
+                state.interval = self._next_interval(state, feed, new_count)
+                state.last_polled_at = now
+                state.next_poll_at = time.time() + state.interval * random.uniform(1 - JITTER, 1 + JITTER)
+
+            self.new_entries_since_analysis += total_new
+
+        if self.on_poll:
+            self.on_poll(results)
+        if total_new:
+            print(f"🆕 {total_new} új bejegyzés {len(due)} forrásból")
+        return total_new
+
+    def maybe_start_analysis(self):
+        """
+        AI elemzés indítása háttérszálon, ha van új cikk és letelt az intervallum.
+        Az első elemzés feltétel nélkül, az induló lekérés után azonnal fut.
+        """
+        if not self.analyze:
+            return
+        if self._analysis_thread and self._analysis_thread.is_alive():
+            return
+        if self.last_analysis_at is None:
+            print("🤖 Első elemzés az induló lekérés után")
+        elif not self.new_entries_since_analysis:
+            return
+        elif time.time() - self.last_analysis_at < ANALYSIS_INTERVAL:
+            return
+        else:
+            print(f"🤖 Ütemezett elemzés: {self.new_entries_since_analysis} új bejegyzés az előző óta")
+
+        self.new_entries_since_analysis = 0
+        self.last_analysis_at = time.time()
+        self._analysis_thread = threading.Thread(target=self.analyze, daemon=True)
+        self._analysis_thread.start()
+
+    def status(self) -> List[Dict]:
+        """Források ütemezési állapota (diagnosztikához)"""
+        with self._lock:
+            return [state.to_dict() for state in self.states]
+
+    def run_forever(self):
+        """Ütemező főciklusa háttérszálon"""
+        try:
+            self.initial_poll()
+            self.maybe_start_analysis()
+        except Exception as e:
+            print(f"❌ Ütemező induló lekérési hiba: {e}")
+        while True:
+            try:
+                self.poll_due_sources()
+                self.maybe_start_analysis()
+            except Exception as e:
+                print(f"❌ Ütemező hiba: {e}")
+            time.sleep(SCHEDULER_TICK)
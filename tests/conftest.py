@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tesztadatbázis: TEST_DATABASE_URL (pl. PostgreSQL), egyébként ideiglenes SQLite fájl -
+# a database modul importkor olvassa a DATABASE_URL-t. A táblák tartalmát a tesztek törlik!
+os.environ['DATABASE_URL'] = os.getenv('TEST_DATABASE_URL') or \
+    'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='hirlevel-test-'), 'test.db')
+# Az app modul importja web szerepben nem indít ütemezőt / hírlekérést
+os.environ['APP_ROLE'] = 'web'
+
+
+@pytest.fixture(scope='session')
+def migrated_database():
+    from database import init_database
+    assert init_database()
+
+
+def _clear_tables():
+    from database import Base, get_session
+
+    session = get_session()
+    try:
+        for table in reversed(Base.metadata.sorted_tables):
+            session.execute(table.delete())
+        session.commit()
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def db(migrated_database):
+    """db_manager üres táblákkal (a teszt előtt és után minden sort törlünk)"""
+    from database_manager import db_manager
+
+    _clear_tables()
+    db_manager.invalidate_read_cache()
+    yield db_manager
+    _clear_tables()
+    db_manager.invalidate_read_cache()
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'postgres: csak PostgreSQL TEST_DATABASE_URL mellett fut')
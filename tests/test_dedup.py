@@ -0,0 +1,75 @@
+import pytest
+
+from dedup import StoryFingerprint, group_near_duplicates
+
+SAME_STORY = [
+    # Szó szerint átvett hír (ügynökségi anyag két forrásban)
+    (("Oil prices jump as OPEC+ agrees to deeper output cuts",
+      "Brent crude rose 3% on Sunday after the group agreed to cut supply."),
+     ("Oil prices jump as OPEC+ agrees to deeper output cuts",
+      "Brent crude rose 3% on Sunday after the group agreed to cut supply")),
+    # Eltérő nagybetűzés és HTML a leírásban
+    (("Oil prices jump as OPEC+ agrees to deeper output cuts",
+      "Brent crude rose 3% on Sunday after the group agreed to cut supply."),
+     ("Oil Prices Jump as OPEC+ Agrees to Deeper Output Cuts",
+      "<p>Brent crude rose 3% on Sunday after the group agreed to cut supply.</p>")),
+    (("Fed holds rates steady, signals two cuts in 2025",
+      "The Federal Reserve left its benchmark rate unchanged at 4.25%-4.5%."),
+     ("Fed holds rates steady, signals two cuts in 2025.",
+      "The Federal Reserve left its benchmark rate unchanged at 4.25%-4.5%.")),
+]
+
+DIFFERENT_STORIES = [
+    (("Fed raises interest rates by 25 basis points", ""),
+     ("ECB raises interest rates by 25 basis points", "")),
+    (("Apple shares fall after earnings miss", ""),
+     ("Tesla shares fall after earnings miss", "")),
+    (("Fed raises interest rates by 25 basis points", ""),
+     ("Fed raises interest rates by 50 basis points", "")),
+    (("Hungary GDP grows 0.5% in second quarter", "Output expanded quarter on quarter."),
+     ("Poland GDP grows 0.5% in second quarter", "Output expanded quarter on quarter.")),
+]
+
+
+@pytest.mark.parametrize('first, second', SAME_STORY)
+def test_known_duplicates_match(first, second):
+    assert StoryFingerprint(*first).matches(StoryFingerprint(*second))
+
+
+@pytest.mark.parametrize('first, second', DIFFERENT_STORIES)
+def test_distinct_stories_do_not_match(first, second):
+    assert not StoryFingerprint(*first).matches(StoryFingerprint(*second))
+    assert not StoryFingerprint(*second).matches(StoryFingerprint(*first))
+
+
+def test_more_detailed_title_is_not_a_conflict():
+    short = StoryFingerprint("Fed raises interest rates", "The Fed raised rates by 25 basis points.")
+    detailed = StoryFingerprint("Fed raises interest rates by 25 basis points", "")
+    assert not short.conflicts(detailed)
+
+
+def article(article_id, source, title, description=''):
+    return {'id': article_id, 'source': source, 'link': f'https://{source}/{article_id}', 'category': 'makro',
+            'title': title, 'original_title': title, 'description': description,
+            'original_description': description, 'pub_date': '2026-10-16T08:00:00'}
+
+
+def test_group_keeps_duplicates_linked_to_canonical():
+    (first, second), = SAME_STORY[:1]
+    articles = [article('a1', 'reuters', *first), article('b1', 'ft', *second),
+                article('c1', 'ft', *DIFFERENT_STORIES[0][0])]
+    canonical, duplicates = group_near_duplicates(articles)
+    assert [a['id'] for a in canonical] == ['a1', 'c1']
+    assert [a['id'] for a in duplicates] == ['b1']
+    assert duplicates[0]['duplicate_of'] == 'a1'
+    assert canonical[0]['related_sources'][0]['id'] == 'b1'
+
+
+def test_duplicates_are_stored_but_not_listed(db):
+    (first, second), = SAME_STORY[:1]
+    canonical, duplicates = group_near_duplicates([article('a1', 'reuters', *first), article('b1', 'ft', *second)])
+    db.save_articles_bulk([(article, None) for article in canonical + duplicates])
+
+    assert db.get_article('b1')['duplicate_of'] == 'a1'
+    assert [a['id'] for a in db.get_articles_page()['articles']] == ['a1']
+    assert [a['id'] for a in db.get_latest_articles()] == ['a1']
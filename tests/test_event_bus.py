@@ -0,0 +1,70 @@
+import json
+import threading
+
+import event_bus as event_bus_module
+from event_bus import EventBus, SUBSCRIBER_QUEUE_SIZE
+
+
+def events(stream, count):
+    """A következő `count` esemény (heartbeat / retry sorok nélkül) (id, típus, adat) alakban"""
+    received = []
+    for message in stream:
+        if not message.startswith('id:'):
+            continue
+        lines = dict(line.split(': ', 1) for line in message.strip().split('\n'))
+        received.append((int(lines['id']), lines['event'], json.loads(lines['data'])))
+        if len(received) == count:
+            return received
+    return received
+
+
+def test_subscriber_receives_published_events_in_order():
+    bus = EventBus()
+    stream = bus.open_stream(max_seconds=5)
+    first = bus.publish('article', {'id': 'a'})
+    bus.publish('status', {'status': 'processing'})
+    assert events(stream, 2) == [(first, 'article', {'id': 'a'}), (first + 1, 'status', {'status': 'processing'})]
+    stream.close()
+    assert bus.subscriber_count() == 0
+
+
+def test_reconnect_replays_events_after_last_event_id():
+    bus = EventBus()
+    ids = [bus.publish('article', {'n': n}) for n in range(3)]
+    stream = bus.open_stream(last_event_id=ids[0], max_seconds=5)
+    assert [data['n'] for _, _, data in events(stream, 2)] == [1, 2]
+    stream.close()
+
+
+def test_full_subscriber_does_not_block_publish():
+    bus = EventBus()
+    stream = bus.open_stream(max_seconds=5)
+    publisher = threading.Thread(target=lambda: [bus.publish('x', {'n': n}) for n in range(SUBSCRIBER_QUEUE_SIZE * 2)])
+    publisher.start()
+    publisher.join(5)
+    assert not publisher.is_alive()
+    # A lassú klienst lecsatlakoztattuk: a streamje véget ér
+    assert bus.subscriber_count() == 0
+    assert events(stream, 1) == []
+
+
+def test_connection_cap():
+    bus = EventBus()
+    streams = [bus.open_stream(max_seconds=5, max_connections=2) for _ in range(2)]
+    assert all(stream is not None for stream in streams)
+    assert bus.open_stream(max_seconds=5, max_connections=2) is None
+    streams[0].close()
+    assert bus.open_stream(max_seconds=5, max_connections=2) is not None
+
+
+def test_events_endpoint_returns_503_when_full(db, monkeypatch):
+    import app as web_app
+
+    monkeypatch.setattr(event_bus_module, 'SSE_MAX_CONNECTIONS', 1)
+    held = web_app.event_bus.open_stream(max_seconds=5)
+    try:
+        response = web_app.app.test_client().get('/api/events')
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == str(web_app.SSE_RETRY_AFTER_SECONDS)
+    finally:
+        held.close()
@@ -0,0 +1,45 @@
+import time
+
+import event_relay
+from event_relay import DatabaseEventRelay
+
+ARTICLE = {'id': 'a1', 'source': 'reuters', 'link': 'https://reuters/a1', 'category': 'makro',
+           'title': 'Cím', 'original_title': 'Title', 'pub_date': '2026-10-16T08:00:00'}
+
+
+def analysis(score):
+    return {'importance_score': score, 'urgency': 'monitoring', 'executive_summary': f'Összefoglaló {score}',
+            'hungarian_title': 'Cím'}
+
+
+def test_reanalysis_in_place_changes_markers(db):
+    db.save_articles_bulk([(ARTICLE, analysis(5))])
+    before = db.get_change_markers()
+    time.sleep(0.01)
+
+    # Újraelemzés: ugyanaz a sor, created_at nem változik
+    db.save_articles_bulk([(ARTICLE, analysis(9))])
+    after = db.get_change_markers()
+    assert after['article_updated_at'] > before['article_updated_at']
+    changed = db.get_analyzed_articles_since(before['article_updated_at'])
+    assert [(a['id'], a['importance_score']) for a in changed] == [('a1', 9)]
+
+
+def test_relay_publishes_reanalysed_article_and_invalidates_cache(db, monkeypatch):
+    published = []
+    monkeypatch.setattr(event_relay.event_bus, 'publish', lambda kind, data: published.append((kind, data)))
+    db.save_articles_bulk([(ARTICLE, analysis(5))])
+    db.save_executive_briefing('<p>1</p>', 1)
+
+    relay = DatabaseEventRelay(on_status=lambda status: None)
+    relay._markers = db.get_change_markers()
+    time.sleep(0.01)
+    # Másik folyamat írása: ebben a folyamatban a helyi írás nem érvényteleníti a cache-t
+    db.save_articles_bulk([(ARTICLE, analysis(9))])
+    invalidated = []
+    monkeypatch.setattr(db, 'invalidate_read_cache', lambda: invalidated.append(True))
+    relay.poll()
+
+    assert invalidated
+    assert [(kind, data['importance_score']) for kind, data in published if kind == 'article'] == [('article', 9)]
+    assert not [kind for kind, _ in published if kind == 'briefing']
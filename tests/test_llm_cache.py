@@ -0,0 +1,49 @@
+import json
+
+import ai_processor
+from database_manager import db_manager
+from llm_cache import LLMCache
+from llm_providers import Completion, LLMProvider, ProviderRouter
+
+ANALYSIS = {'hungarian_title': 'Cím', 'executive_summary': 'Összefoglaló', 'importance_score': 7}
+
+
+class FailingProvider(LLMProvider):
+    name = 'primary'
+
+    def __init__(self):
+        super().__init__('primary-model', max_retries=0)
+
+    def _generate(self, prompt, system, max_tokens, temperature):
+        raise ConnectionError('primary down')
+
+
+class FallbackProvider(LLMProvider):
+    name = 'fallback'
+
+    def __init__(self):
+        super().__init__('fallback-model', max_retries=0)
+
+    def _generate(self, prompt, system, max_tokens, temperature):
+        return Completion(text=json.dumps(ANALYSIS), provider=self.name, model=self.model)
+
+
+def test_fallback_answer_is_served_from_cache(monkeypatch):
+    # Adatbázis nélkül: memóriabeli cache
+    monkeypatch.setattr(db_manager, 'available', False)
+    cache = LLMCache()
+    monkeypatch.setattr(ai_processor, 'llm_cache', cache)
+
+    analyzer = ai_processor.GovernmentEconomicAnalyzer()
+    fallback = FallbackProvider()
+    analyzer.analysis_llm = ProviderRouter([FailingProvider(), fallback], failover=True, hedge=False)
+    article = {'title': 'Cikk', 'source': 'Forrás', 'link': 'https://example.com/1'}
+
+    first = analyzer.analyze_for_government(article)
+    assert first['hungarian_title'] == 'Cím'
+    assert fallback.calls == 1
+
+    second = analyzer.analyze_for_government(article)
+    assert second == first
+    assert fallback.calls == 1
+    assert cache.hits == 1
@@ -0,0 +1,119 @@
+import pytest
+
+from llm_providers import CircuitBreaker, Completion, LLMProvider, ProviderRouter
+
+
+class FakeStreamProvider(LLMProvider):
+    """Streamelő teszt szolgáltató: `chunks` részlet, utána opcionálisan hiba"""
+
+    name = 'fake'
+
+    def __init__(self, chunks, error=None):
+        super().__init__('fake-model', max_retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0))
+        self.chunks = chunks
+        self.error = error
+
+    def _generate(self, prompt, system, max_tokens, temperature):
+        return Completion(text=''.join(self.chunks), provider=self.name, model=self.model)
+
+    def _stream(self, prompt, system, max_tokens, temperature):
+        yield from self.chunks
+        if self.error:
+            raise self.error
+
+
+def half_open(provider):
+    """A megszakító nyitva, a reset idő letelt: a következő hívás a próbahívás"""
+    provider.breaker.record_failure()
+    assert provider.breaker.state == 'open'
+
+
+def test_stream_error_after_first_chunk_records_failure():
+    provider = FakeStreamProvider(['a', 'b'], error=ConnectionError('reset'))
+    half_open(provider)
+    stream = provider.stream('prompt')
+    assert next(stream) == 'a'
+    with pytest.raises(ConnectionError):
+        list(stream)
+    assert provider.breaker.state == 'open'
+    assert not provider.breaker._trial_running
+    assert provider.breaker.allow()
+
+
+def test_stream_closed_early_releases_trial():
+    provider = FakeStreamProvider(['a', 'b', 'c'])
+    half_open(provider)
+    stream = provider.stream('prompt')
+    assert next(stream) == 'a'
+    stream.close()
+    assert not provider.breaker._trial_running
+    assert provider.breaker.allow()
+
+
+def test_router_stream_closed_early_releases_trial():
+    provider = FakeStreamProvider(['a', 'b', 'c'])
+    half_open(provider)
+    stream = ProviderRouter([provider]).stream('prompt')
+    assert next(stream) == 'a'
+    stream.close()
+    assert not provider.breaker._trial_running
+    assert provider.breaker.allow()
+
+
+def test_router_stream_error_after_first_chunk_records_failure():
+    provider = FakeStreamProvider(['a'], error=ConnectionError('reset'))
+    fallback = FakeStreamProvider(['x'])
+    half_open(provider)
+    stream = ProviderRouter([provider, fallback]).stream('prompt')
+    assert next(stream) == 'a'
+    with pytest.raises(ConnectionError):
+        list(stream)
+    assert provider.breaker.state == 'open'
+    assert not provider.breaker._trial_running
+
+
+def test_stream_success_closes_breaker():
+    provider = FakeStreamProvider(['a', 'b'])
+    half_open(provider)
+    assert ''.join(provider.stream('prompt')) == 'ab'
+    assert provider.breaker.state == 'closed'
+
+
+class HTTPError(Exception):
+    """Szolgáltatói kivétel HTTP státusszal (mint az openai APIStatusError)"""
+
+    def __init__(self, status_code):
+        super().__init__(f'HTTP {status_code}')
+        self.status_code = status_code
+
+
+class FailingProvider(FakeStreamProvider):
+    def _generate(self, prompt, system, max_tokens, temperature):
+        raise self.error
+
+
+@pytest.mark.parametrize('code', [400, 401, 404])
+def test_client_error_leaves_breaker_closed(code):
+    provider = FailingProvider([], error=HTTPError(code))
+    with pytest.raises(HTTPError):
+        provider.generate('prompt')
+    assert provider.breaker.state == 'closed'
+    assert provider.breaker.failures == 0
+    assert provider.breaker.allow()
+
+
+def test_client_error_releases_half_open_trial():
+    provider = FailingProvider([], error=HTTPError(400))
+    half_open(provider)
+    with pytest.raises(HTTPError):
+        provider.generate('prompt')
+    assert not provider.breaker._trial_running
+    assert provider.breaker.allow()
+
+
+@pytest.mark.parametrize('error', [HTTPError(429), HTTPError(503), TimeoutError('timeout'), ConnectionError('reset')])
+def test_outage_opens_breaker(error):
+    provider = FailingProvider([], error=error)
+    with pytest.raises(type(error)):
+        provider.generate('prompt')
+    assert provider.breaker.state == 'open'
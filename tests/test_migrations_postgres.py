@@ -0,0 +1,102 @@
+"""
+PostgreSQL-only migration paths: CREATE INDEX CONCURRENTLY az autocommit_block-ban,
+a GIN / tsvector keresőindex és a FOR UPDATE SKIP LOCKED feladatfelvétel.
+Csak PostgreSQL TEST_DATABASE_URL mellett fut (a séma teljes le- és visszaépítése!).
+"""
+import threading
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+
+import database
+from database import ALEMBIC_INI, PG_SEARCH_VECTOR, run_migrations
+from database_manager import PG_SEARCH_QUERY
+
+pytestmark = [
+    pytest.mark.postgres,
+    pytest.mark.skipif(database.engine is None or database.engine.dialect.name != 'postgresql',
+                       reason='PostgreSQL TEST_DATABASE_URL szükséges'),
+]
+
+CONCURRENT_INDEXES = {
+    'ix_articles_search', 'ix_articles_importance_pub_date', 'ix_articles_created_at',
+    'ix_executive_briefings_created_at', 'ix_processing_status_status_started_at',
+    'ix_articles_duplicate_of', 'ix_articles_updated_at',
+}
+
+
+def alembic_config():
+    # Kapcsolat nélkül a migrations/env.py a DATABASE_URL-ből nyit sajátot (mint az alembic CLI)
+    config = Config(ALEMBIC_INI)
+    config.attributes['configure_logger'] = False
+    return config
+
+
+def indexes():
+    with database.engine.connect() as connection:
+        return {
+            row.name: row for row in connection.execute(text(
+                "SELECT c.relname AS name, i.indisvalid AS valid, am.amname AS method "
+                "FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "JOIN pg_am am ON am.oid = c.relam "
+                "JOIN pg_namespace n ON n.oid = c.relnamespace WHERE n.nspname = current_schema()"
+            ))
+        }
+
+
+def test_migrations_round_trip(migrated_database):
+    command.downgrade(alembic_config(), 'base')
+    assert not CONCURRENT_INDEXES & set(indexes())
+
+    # Az alkalmazás útja: advisory lockkal védett, átadott kapcsolat
+    run_migrations()
+    found = indexes()
+    assert CONCURRENT_INDEXES <= set(found)
+    assert all(found[name].valid for name in CONCURRENT_INDEXES)
+    assert found['ix_articles_search'].method == 'gin'
+
+    # A modellek és a migrációk nem térnek el
+    command.check(alembic_config())
+
+
+def test_search_uses_gin_index(db):
+    db.save_articles_bulk([({
+        'id': 'pg1', 'source': 'reuters', 'link': 'https://reuters/pg1', 'category': 'makro',
+        'title': 'Inflation slows in the euro area', 'original_title': 'Inflation slows in the euro area',
+        'description': '', 'original_description': '', 'pub_date': '2026-10-16T08:00:00'
+    }, None)])
+    assert [a['id'] for a in db.search_articles('inflation')['results']] == ['pg1']
+
+    # A lekérdezés kifejezése pontosan az indexé, különben a GIN index nem használható
+    with database.engine.connect() as connection:
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = '\n'.join(row[0] for row in connection.execute(
+            text(f"EXPLAIN SELECT id FROM articles WHERE ({PG_SEARCH_VECTOR}) @@ ({PG_SEARCH_QUERY})"),
+            {'q': 'inflation'}
+        ))
+    assert 'ix_articles_search' in plan
+
+
+def test_claim_skips_locked_tasks(db):
+    assert db.enqueue_analysis_tasks([{'id': f'task{n}'} for n in range(3)], job_id='job') == 3
+
+    # Egy másik worker tranzakciója fogja az első feladatot
+    locker = database.engine.connect()
+    transaction = locker.begin()
+    try:
+        locked = locker.execute(text(
+            "SELECT article_hash FROM analysis_tasks ORDER BY id LIMIT 1 FOR UPDATE"
+        )).scalar()
+
+        claimed = []
+        claimer = threading.Thread(target=lambda: claimed.extend(db.claim_analysis_tasks('worker-2', 3)))
+        claimer.start()
+        claimer.join(10)
+        assert not claimer.is_alive(), 'a felvétel a zárolt sorra várt (nincs SKIP LOCKED)'
+    finally:
+        transaction.rollback()
+        locker.close()
+
+    assert sorted(task['article_hash'] for task in claimed) == sorted({'task0', 'task1', 'task2'} - {locked})
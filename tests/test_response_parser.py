@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+from response_parser import parse_analysis, parse_analysis_array
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'benchmarks', 'response_corpus.json')
+
+with open(CORPUS_PATH, encoding='utf-8') as f:
+    CORPUS = json.load(f)
+
+SUMMARY = '"hungarian_title": "Cím", "executive_summary": "Összefoglaló", "importance_score": 8'
+
+
+def lookup(data, path):
+    for key in path.split('.'):
+        data = data.get(key) if isinstance(data, dict) else None
+    return data
+
+
+@pytest.mark.parametrize('case', CORPUS, ids=[case['name'] for case in CORPUS])
+def test_corpus_case(case):
+    expect = case['expect']
+    if case['mode'] == 'batch':
+        assert sorted(parse_analysis_array(case['response'], case['ids'])) == sorted(expect['ids'])
+        return
+
+    analysis = parse_analysis(case['response'])
+    if expect is None:
+        assert analysis is None
+        return
+    assert analysis is not None
+    assert analysis.repaired == expect['repaired']
+    data = analysis.to_dict()
+    for path, value in expect['fields'].items():
+        assert lookup(data, path) == value, path
+
+
+def test_truncated_inside_nested_object_is_repaired():
+    analysis = parse_analysis('{' + SUMMARY + ', "macro_impacts": {"gdp_effect": "Lassul')
+    assert analysis.repaired
+    assert analysis.importance_score == 8
+    assert analysis.to_dict()['macro_impacts']['gdp_effect'] == 'Lassul'
+
+
+def test_truncated_after_key_drops_the_dangling_field():
+    analysis = parse_analysis('{' + SUMMARY + ', "urgency": ')
+    assert analysis.repaired
+    assert analysis.urgency == 'monitoring'
+    assert analysis.executive_summary == 'Összefoglaló'
+
+
+def test_trailing_commas_in_nested_list():
+    analysis = parse_analysis('{' + SUMMARY + ', "monitoring_points": ["a", "b",],}')
+    assert analysis.monitoring_points == ['a', 'b']
+
+
+def test_raw_control_characters_in_strings():
+    analysis = parse_analysis('{"hungarian_title": "Cím", "executive_summary": "Első sor\nmásodik", '
+                              '"importance_score": "9"}')
+    assert analysis.executive_summary == 'Első sor\nmásodik'
+    assert analysis.importance_score == 9
+
+
+def test_non_object_response_is_rejected():
+    assert parse_analysis('["nem", "objektum"]') is None
+
+
+def test_batch_keeps_complete_items_of_a_truncated_array():
+    response = ('[{"article_id": "x1", ' + SUMMARY + '}, '
+                '{"article_id": "x2", "executive_summary": "Csonk')
+    assert list(parse_analysis_array(response, ['x1', 'x2'])) == ['x1']
@@ -0,0 +1,47 @@
+import threading
+
+import source_scheduler
+from source_scheduler import AdaptiveScheduler
+
+SOURCES = [{'name': f'Forrás {n}', 'url': f'https://example.com/{n}.xml'} for n in range(5)]
+
+
+def fake_fetch(fetched):
+    def fetch_all_feeds(sources):
+        fetched.extend(source['name'] for source in sources)
+        return [(source, {'entries': [{'link': source['url'] + '#1'}]}) for source in sources]
+    return fetch_all_feeds
+
+
+def test_first_analysis_runs_right_after_initial_poll(db, monkeypatch):
+    fetched = []
+    analyzed = threading.Event()
+    monkeypatch.setattr(source_scheduler, 'fetch_all_feeds', fake_fetch(fetched))
+    monkeypatch.setattr(source_scheduler, 'FEED_MAX_WORKERS', 2)
+
+    scheduler = AdaptiveScheduler(SOURCES, analyze=analyzed.set)
+    scheduler.initial_poll()
+    scheduler.maybe_start_analysis()
+
+    # Minden forrás pontosan egyszer, adagokban
+    assert sorted(fetched) == sorted(source['name'] for source in SOURCES)
+    assert analyzed.wait(5)
+    assert scheduler.last_analysis_at is not None
+
+
+def test_later_analysis_waits_for_interval_and_new_entries(db, monkeypatch):
+    monkeypatch.setattr(source_scheduler, 'fetch_all_feeds', fake_fetch([]))
+    calls = []
+    scheduler = AdaptiveScheduler(SOURCES, analyze=lambda: calls.append(1))
+    scheduler.initial_poll()
+    scheduler.maybe_start_analysis()
+    scheduler._analysis_thread.join(5)
+
+    scheduler.new_entries_since_analysis = 3
+    scheduler.maybe_start_analysis()
+    assert calls == [1]
+
+    scheduler.last_analysis_at -= source_scheduler.ANALYSIS_INTERVAL
+    scheduler.maybe_start_analysis()
+    scheduler._analysis_thread.join(5)
+    assert calls == [1, 1]
@@ -0,0 +1,44 @@
+import pytest
+
+import app as web_app
+from jobs import job_registry
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    calls = []
+    monkeypatch.setattr(web_app, 'fetch_and_process_news', lambda **kwargs: calls.append(kwargs))
+
+    def in_process(*args, **kwargs):
+        raise AssertionError('web role must not run the pipeline in-process')
+    monkeypatch.setattr(job_registry, 'submit', in_process)
+    yield web_app.app.test_client(), calls
+
+
+def test_web_role_records_refresh_for_worker(client, db):
+    http, calls = client
+    response = http.post('/api/refresh')
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+
+    assert job_registry.active() is None
+    assert calls == []
+    assert db.get_processing_job(job_id)['status'] == 'queued'
+    assert http.get(f'/api/jobs/{job_id}').get_json()['job']['status'] == 'queued'
+
+    # Amíg a kérés vár, az újabb kérés a várakozóra mutat
+    again = http.post('/api/test-refresh')
+    assert again.status_code == 409
+    assert again.get_json()['job_id'] == job_id
+
+
+def test_worker_claims_requested_refresh(client, db):
+    http, calls = client
+    job_id = http.post('/api/refresh').get_json()['job_id']
+
+    job = job_registry.claim_request(web_app.requested_pipeline)
+    assert job is not None and job.id == job_id
+    assert job.wait(10)
+    assert calls == [{'refresh_feeds': True, 'job': job}]
+    assert db.get_processing_job(job_id)['status'] == 'completed'
+    assert job_registry.claim_request(web_app.requested_pipeline) is None
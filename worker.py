@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Kormányzati Külgazdasági Szemle - háttér worker
+Adaptív RSS ütemezés és AI elemzés HTTP kiszolgálás nélkül. A webes folyamatok
+(APP_ROLE=web) így csak olvasnak, és tőle függetlenül skálázhatók.
+
+Indítás: python worker.py  (Procfile: worker)
+"""
+
+import os
+import signal
+import sys
+
+# Az app modul importálásakor még ne induljanak el a háttérszálak - itt indítjuk őket
+os.environ['APP_ROLE'] = 'worker'
+
+import app
+from jobs import job_registry
+
+
+def shutdown(signum, frame):
+    """SIGTERM / SIGINT: a futó feladat lease-ét azonnal feladjuk, ne kelljen kivárni a TTL-t"""
+    print("\n🛑 Worker leállítása...")
+    job_registry.abandon_active('Worker leállítva feldolgozás közben')
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    print(f"\n⚙️ Háttér worker indul (pid {os.getpid()})")
+    print(f"🔧 Teszt mód: {'BE' if app.TEST_MODE else 'KI'}")
+    print(f"💾 Adatbázis: {'PostgreSQL' if app.is_database_available() else 'Memória mód'}")
+
+    scheduler_thread = app.start_background_tasks()
+    scheduler_thread.join()